@@ -1,40 +1,167 @@
-from flask import Flask, request
-from systemdataclasses import vendor, batch, medicine, inventory, sales, cart
+from datetime import datetime, timezone
+import functools
+import io
+import os
+import uuid
+import click
+from flask import Flask, Response, make_response, request, stream_with_context
+from systemdataclasses import vendor, batch, medicine, inventory, sales, cart, storage
+from systemdataclasses import bulkio, forecast, paging, replenishment, shared
+from systemdataclasses.fastjson import dumps, join_array
 from flask_cors import CORS  # add this import
 
-inventory_obj = inventory.Inventory()
-medicine_list = medicine.MedicineList()
-vendor_list = vendor.VendorList()
+SHARED_MODE = os.environ.get("PHARMACY_SHARED", "") not in ("", "0")
+storage_obj = storage.open_storage(os.environ.get("PHARMACY_DB"), shared=SHARED_MODE)
 
-v1 = vendor.Vendor("V001", "Acme Corp", "123-456-7890", inventory_obj, medicine_list)
-v2 = vendor.Vendor("V002", "Globex Inc", "987-654-3210", inventory_obj, medicine_list)
-vendor_list.add_vendor(v1)
-vendor_list.add_vendor(v2)
+inventory_obj = inventory.Inventory(storage=storage_obj)
+medicine_list = medicine.MedicineList(storage=storage_obj)
+vendor_list = vendor.VendorList(storage=storage_obj)
+batch_list = batch.BatchList(storage=storage_obj)
+sales_instance = sales.Sales(storage=storage_obj)
 
-batch_list = batch.BatchList()
-b1 = batch.Batch("B001", "2024-12-31")
-b2 = batch.Batch("B002", "2025-06-30")
-batch_list.add_batch(b1)
-batch_list.add_batch(b2)
+registry_sync = None
+if SHARED_MODE:
+    registry_sync = shared.RegistrySync(
+        storage_obj, batch_list, vendor_list, medicine_list, inventory_obj, sales_instance
+    )
+    registry_sync.attach()
+
+batch_list.load()
+vendor_list.load(inventory_obj, medicine_list)
+medicine_list.load(batch_list, vendor_list)
+inventory_obj.load(medicine_list)
+sales_instance.load(medicine_list)
+
+with storage_obj.transaction():
+    if not vendor_list.get_vendors():
+        v1 = vendor.Vendor("V001", "Acme Corp", "123-456-7890", inventory_obj, medicine_list)
+        v2 = vendor.Vendor("V002", "Globex Inc", "987-654-3210", inventory_obj, medicine_list)
+        vendor_list.add_vendor(v1)
+        vendor_list.add_vendor(v2)
 
-m1 = medicine.Medicine("Aspirin", b1, "2024-12-31", 9.99, v1)
-m2 = medicine.Medicine("Ibuprofen", b2, "2025-06-30", 12.99, v2)
-medicine_list.add_medicine(m1)
-medicine_list.add_medicine(m2)
+        b1 = batch.Batch("B001", "2030-12-31")
+        b2 = batch.Batch("B002", "2031-06-30")
+        batch_list.add_batch(b1)
+        batch_list.add_batch(b2)
 
-for x in medicine_list.get_medicines():
-    inventory_obj.add_medicine(x, 10)
+        m1 = medicine.Medicine("Aspirin", b1, "2030-12-31", 9.99, v1)
+        m2 = medicine.Medicine("Ibuprofen", b2, "2031-06-30", 12.99, v2)
+        medicine_list.add_medicine(m1)
+        medicine_list.add_medicine(m2)
 
-sales_instance = sales.Sales()
+        for x in medicine_list.get_medicines():
+            inventory_obj.add_medicine(x, 10)
+
+replenishment_engine = replenishment.ReplenishmentEngine(inventory_obj, sales_instance)
+replenishment_engine.start()
 
 app = Flask(__name__)
 CORS(app)
 
 
+@app.before_request
+def refresh_registries():
+    if registry_sync is not None:
+        registry_sync.refresh()
+
+
+BOOT_ID = uuid.uuid4().hex[:12]
+
+
+def _reset_boot_id():
+    global BOOT_ID
+    BOOT_ID = uuid.uuid4().hex[:12]
+
+
+os.register_at_fork(after_in_child=_reset_boot_id)
+
+
+def _json_response(body: bytes, status: int = 200) -> Response:
+    return Response(body, status=status, mimetype="application/json")
+
+
+def _paged() -> bool:
+    return "limit" in request.args or "cursor" in request.args
+
+
+def _listing_response(items, row_bytes, row_json, key: str = None, page=None):
+    limit = request.args.get("limit", default=None, type=int)
+    cursor = request.args.get("cursor", default=None, type=str)
+    fields = [f for f in request.args.get("fields", default="", type=str).split(",") if f]
+    paged = _paged()
+    try:
+        if page is not None:
+            rows, next_cursor = page(limit, cursor)
+        else:
+            rows, next_cursor = paging.paginate(items, limit, cursor)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    if fields:
+        body = dumps([row_json(row, fields) for row in rows])
+    else:
+        body = join_array(row_bytes(row) for row in rows)
+    if key is None and not paged:
+        return _json_response(body)
+    envelope = b'{"' + (key or "items").encode() + b'":' + body
+    if paged:
+        envelope += b',"next_cursor":' + dumps(next_cursor)
+    return _json_response(envelope + b"}")
+
+
+def _project_entity(entity, fields):
+    return paging.project(entity.toJson(), fields)
+
+
+def _project_stock(row, fields):
+    med, qty = row
+    return {"medicine": paging.project(med.toJson(), fields), "quantity": qty}
+
+
+def _stock_bytes(row):
+    med, qty = row
+    return b'{"medicine":' + med.toJsonBytes() + b',"quantity":' + str(qty).encode() + b"}"
+
+
+def _medicine_filters():
+    return {
+        "vendor_id": request.args.get("vendor_id", default=None, type=str),
+        "batch_number": request.args.get("batch_number", default=None, type=str),
+        "name_prefix": request.args.get("name", default=None, type=str),
+    }
+
+
+def conditional(registries):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = "-".join(
+                [BOOT_ID] + [str(registry.version) for registry in registries()]
+            )
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
 # Vendor routes
 @app.route("/vendors", methods=["GET"])
+@conditional(lambda: (vendor_list,))
 def get_vendors():
-    return {"vendors": vendor_list.toJson()}
+    vendors = vendor_list.query(
+        vendor_id=request.args.get("vendor_id", default=None, type=str),
+        name_prefix=request.args.get("name", default=None, type=str),
+    )
+    return _listing_response(
+        vendors, vendor.Vendor.toJsonBytes, _project_entity, key="vendors"
+    )
 
 
 @app.route("/vendors/<vendor_id>/orders", methods=["GET"])
@@ -43,9 +170,21 @@ def get_vendor(vendor_id):
     vendor_obj: vendor.Vendor = vendor_list.find_vendor(vendor_id)
     if not vendor_obj:
         return {"message": "Vendor not found"}, 404
-    if request_type == "fulfilled":
-        return vendor_obj.get_fulfilled_orders()
-    return vendor_obj.get_orders()
+    limit = request.args.get("limit", default=None, type=int)
+    cursor = request.args.get("cursor", default=None, type=str)
+    try:
+        if request_type == "fulfilled":
+            orders, next_cursor = vendor_obj.get_fulfilled_orders_page(limit, cursor)
+        else:
+            orders, next_cursor = vendor_obj.get_orders_page(limit, cursor)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    body = join_array(order.toJsonBytes() for order in orders)
+    if not _paged():
+        return _json_response(body)
+    return _json_response(
+        b'{"items":' + body + b',"next_cursor":' + dumps(next_cursor) + b"}"
+    )
 
 
 @app.route("/vendors/<vendor_id>/orders/process", methods=["GET"])
@@ -58,8 +197,48 @@ def fulfill_order(vendor_id):
     if action != "approve" and action != "deny":
         return {"message": "Invalid action"}, 400
     vendor_obj: vendor.Vendor = vendor_list.find_vendor(vendor_id)
+    if not vendor_obj:
+        return {"message": "Vendor not found"}, 404
+    return _process_order(vendor_obj, order_id, action)
+
+
+@app.route("/vendors/<vendor_id>/orders/process", methods=["POST"])
+def fulfill_orders(vendor_id):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {"message": "Order IDs and action are required"}, 400
+    action = data.get("action", "")
+    order_ids = data.get("order_ids", [])
+    if not action or not order_ids:
+        return {"message": "Order IDs and action are required"}, 400
+    if not isinstance(order_ids, list) or not all(
+        isinstance(order_id, str) for order_id in order_ids
+    ):
+        return {"message": "Order IDs must be a list of strings"}, 400
+    vendor_obj: vendor.Vendor = vendor_list.find_vendor(vendor_id)
     if not vendor_obj:
         return {"message": "Vendor not found"}, 404
+    try:
+        return {"results": vendor_obj.process_orders(order_ids, action)}, 200
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
+
+@app.route("/orders/process", methods=["GET"])
+def process_order():
+    order_id = request.args.get("order_id", default="", type=str)
+    action = request.args.get("action", default="", type=str)
+    if not order_id or not action:
+        return {"message": "Order ID and action are required"}, 400
+    if action != "approve" and action != "deny":
+        return {"message": "Invalid action"}, 400
+    vendor_obj = vendor_list.find_order_vendor(order_id)
+    if not vendor_obj:
+        return {"message": "Order not found"}, 404
+    return _process_order(vendor_obj, order_id, action)
+
+
+def _process_order(vendor_obj: vendor.Vendor, order_id: str, action: str):
     try:
         if action == "approve":
             vendor_obj.fullfill_order(order_id)
@@ -74,27 +253,59 @@ def fulfill_order(vendor_id):
 @app.route("/vendors/add", methods=["POST"])
 def add_vendor():
     data = request.get_json()
-    new_vendor = vendor.Vendor(data["vendor_id"], data["name"], data["contact_info"], inventory_obj, medicine_list)
-    vendor_list.add_vendor(new_vendor)
+    try:
+        new_vendor = vendor.Vendor(data["vendor_id"], data["name"], data["contact_info"], inventory_obj, medicine_list)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    try:
+        vendor_list.add_vendor(new_vendor)
+    except ValueError as e:
+        return {"message": str(e)}, 409
     return {"message": "Vendor added successfully"}, 201
 
 
 @app.route("/batches", methods=["GET"])
+@conditional(lambda: (batch_list,))
 def get_batches():
-    return batch_list.toJson()
+    batches = batch_list.query(
+        batch_number=request.args.get("batch_number", default=None, type=str)
+    )
+    return _listing_response(batches, batch.Batch.toJsonBytes, _project_entity)
 
 
 @app.route("/batches/add", methods=["POST"])
 def add_batch():
     data = request.get_json()
-    new_batch = batch.Batch(data["batch_number"], data["expiry_date"])
-    batch_list.add_batch(new_batch)
+    try:
+        new_batch = batch.Batch(data["batch_number"], data["expiry_date"])
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    try:
+        batch_list.add_batch(new_batch)
+    except ValueError as e:
+        return {"message": str(e)}, 409
     return {"message": "Batch added successfully"}, 201
 
 
 @app.route("/medicines", methods=["GET"])
+@conditional(lambda: (medicine_list, vendor_list, batch_list))
 def get_medicines():
-    return medicine_list.toJson()
+    medicines = medicine_list.query(**_medicine_filters())
+    return _listing_response(
+        medicines, medicine.Medicine.toJsonBytes, _project_entity
+    )
+
+
+@app.route("/medicines/search", methods=["GET"])
+@conditional(lambda: (medicine_list, vendor_list, batch_list))
+def search_medicines():
+    query = request.args.get("q", default="", type=str)
+    limit = request.args.get("limit", default=10, type=int)
+    try:
+        results = medicine_list.search(query, limit)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    return _json_response(join_array(med.toJsonBytes() for med in results))
 
 
 @app.route("/medicines/add", methods=["POST"])
@@ -114,8 +325,17 @@ def add_medicine():
 
 
 @app.route("/inventory", methods=["GET"])
+@conditional(lambda: (inventory_obj, medicine_list, vendor_list, batch_list))
 def get_inventory():
-    return inventory_obj.toJson()
+    filters = _medicine_filters()
+    if any(value is not None for value in filters.values()):
+        stock = inventory_obj.stock_of(medicine_list.query(**filters))
+        return _listing_response(stock, _stock_bytes, _project_stock)
+    if _paged():
+        return _listing_response(
+            None, _stock_bytes, _project_stock, page=inventory_obj.stock_page
+        )
+    return _listing_response(inventory_obj.stock_of(), _stock_bytes, _project_stock)
 
 
 @app.route("/inventory/add", methods=["POST"])
@@ -128,21 +348,118 @@ def add_inventory_item():
     return {"message": "Inventory item added successfully"}, 201
 
 
+@app.route("/inventory/reorder", methods=["POST"])
+def set_reorder_point():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("identifier"), str):
+        return {"message": "Identifier is required"}, 400
+    reorder_point = data.get("reorder_point")
+    if isinstance(reorder_point, bool) or not isinstance(reorder_point, int):
+        return {"message": "Reorder point must be an integer"}, 400
+    if not medicine_list.find_medicine(data["identifier"]):
+        return {"message": "Medicine not found"}, 404
+    try:
+        replenishment_engine.set_reorder_point(data["identifier"], reorder_point)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    return {"message": "Reorder point updated successfully"}, 200
+
+
 @app.route("/inventory/threshold", methods=["GET"])
+@conditional(lambda: (inventory_obj, medicine_list, vendor_list, batch_list))
 def get_threshold_alerts():
     threshold = request.args.get("threshold", default=0, type=int)
-    return inventory_obj.threshold_toJson(threshold)
+    limit = request.args.get("limit", default=None, type=int)
+    cursor = request.args.get("cursor", default=None, type=str)
+    if cursor is not None and limit is None:
+        return {"message": "Cursor requires a limit"}, 400
+    try:
+        if limit is not None:
+            return inventory_obj.threshold_page_toJson(threshold, limit, cursor)
+        return _json_response(inventory_obj.threshold_toJsonBytes(threshold))
+    except ValueError as e:
+        return {"message": str(e)}, 400
 
 
 @app.route("/inventory/expiry", methods=["GET"])
+@conditional(lambda: (inventory_obj, medicine_list, vendor_list, batch_list))
 def get_expiry_alerts():
     current_date = request.args.get("target_date", default="2023-10-01", type=str)
-    return inventory_obj.expiry_toJson(current_date)
+    within_days = request.args.get("within_days", default=None, type=int)
+    try:
+        if within_days is not None:
+            return _json_response(
+                inventory_obj.expiring_within_toJsonBytes(current_date, within_days)
+            )
+        return _json_response(inventory_obj.expiry_toJsonBytes(current_date))
+    except ValueError as e:
+        return {"message": str(e)}, 400
 
 
 @app.route("/inventory/valuation", methods=["GET"])
+@conditional(lambda: (inventory_obj,))
 def get_stock_valuation():
-    return {"stock_valuation": inventory_obj.get_stock_valuation()}
+    group_by = request.args.get("group_by", default="", type=str)
+    result = {"stock_valuation": inventory_obj.get_stock_valuation()}
+    if group_by == "vendor":
+        result["by_vendor"] = inventory_obj.get_stock_valuation_by_vendor()
+    elif group_by == "batch":
+        result["by_batch"] = inventory_obj.get_stock_valuation_by_batch()
+    elif group_by:
+        return {"message": "Invalid group_by"}, 400
+    return result
+
+
+@app.route("/inventory/analytics/valuation", methods=["GET"])
+@conditional(lambda: (inventory_obj,))
+def get_valuation_report():
+    group_by = request.args.get("group_by", default="vendor", type=str)
+    field = request.args.get("field", default="value", type=str)
+    snapshot = inventory_obj.columnar_snapshot()
+    try:
+        return {
+            "total": snapshot.total(field),
+            "groups": snapshot.group_sum(group_by, field),
+        }
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
+
+@app.route("/inventory/analytics/low_stock", methods=["GET"])
+@conditional(lambda: (inventory_obj,))
+def get_low_stock_report():
+    threshold = request.args.get("threshold", default=10, type=int)
+    group_by = request.args.get("group_by", default="batch", type=str)
+    snapshot = inventory_obj.columnar_snapshot()
+    mask = snapshot.mask(max_quantity=threshold)
+    try:
+        return {
+            "count": int(mask.sum()),
+            "by_group": snapshot.group_count(group_by, mask),
+        }
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
+
+@app.route("/inventory/analytics/expiry", methods=["GET"])
+@conditional(lambda: (inventory_obj,))
+def get_expiry_histogram():
+    current_date = request.args.get("target_date", default="2023-10-01", type=str)
+    bucket_days = request.args.get("bucket_days", default=30, type=int)
+    buckets = request.args.get("buckets", default=12, type=int)
+    field = request.args.get("field", default="quantity", type=str)
+    try:
+        return inventory_obj.columnar_snapshot().expiry_histogram(
+            current_date, bucket_days, buckets, field
+        )
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
+
+@app.route("/inventory/analytics/export", methods=["GET"])
+@conditional(lambda: (inventory_obj,))
+def export_inventory_columns():
+    return _json_response(dumps(inventory_obj.columnar_snapshot().toJson()))
 
 
 @app.route("/cart/checkout", methods=["POST"])
@@ -155,19 +472,211 @@ def create_cart():
             return {"message": "Medicine not found"}, 404
         curr_cart.add_item(medicine_obj, item["quantity"])
 
-    return curr_cart.generate_reciept_json(), 201
+    try:
+        return curr_cart.generate_reciept_json(), 201
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
+
+@app.route("/cart/checkout/bulk", methods=["POST"])
+def create_carts():
+    data = request.get_json()
+    if not isinstance(data, dict) or not isinstance(data.get("carts"), list):
+        return {"message": "Carts must be a list"}, 400
+    results = [None] * len(data["carts"])
+    cart_lines = []
+    for pos, cart_data in enumerate(data["carts"]):
+        try:
+            cart_lines.append((pos, _cart_lines(cart_data)))
+        except ValueError as e:
+            results[pos] = {"status": "error", "message": str(e)}
+    medicines = medicine_list.find_medicines(
+        identifier for _, lines in cart_lines for identifier, _ in lines
+    )
+    carts = []
+    positions = []
+    for pos, lines in cart_lines:
+        curr_cart = cart.Cart(sales_instance, inventory_obj)
+        try:
+            for identifier, quantity in lines:
+                medicine_obj = medicines.get(identifier)
+                if not medicine_obj:
+                    raise ValueError("Medicine not found")
+                curr_cart.add_item(medicine_obj, quantity)
+        except ValueError as e:
+            results[pos] = {"status": "error", "message": str(e)}
+            continue
+        carts.append(curr_cart)
+        positions.append(pos)
+    for pos, result in zip(positions, cart.Cart.checkout_many(carts)):
+        results[pos] = result
+    return {"results": results}, 200
+
+
+def _cart_lines(cart_data) -> list[tuple[str, int]]:
+    if not isinstance(cart_data, dict) or not isinstance(cart_data.get("items"), list):
+        raise ValueError("Cart must have a list of items")
+    lines = []
+    for item in cart_data["items"]:
+        try:
+            identifier = item["medicine"]["identifier"]
+            quantity = item["quantity"]
+        except (KeyError, TypeError):
+            raise ValueError("Each item needs a medicine identifier and a quantity")
+        if not isinstance(identifier, str):
+            raise ValueError("Medicine identifier must be a string")
+        if not isinstance(quantity, int) or isinstance(quantity, bool):
+            raise ValueError("Quantity must be an integer")
+        lines.append((identifier, quantity))
+    return lines
 
 
 @app.route("/statistics", methods=["GET"])
+@conditional(lambda: (sales_instance, medicine_list, vendor_list, batch_list))
 def get_value_statistics():
-    return sales_instance.get_sales_statistics()
+    return _json_response(sales_instance.get_sales_statistics_bytes())
+
+
+@app.route("/statistics/rollup", methods=["GET"])
+@conditional(lambda: (sales_instance,))
+def get_statistics_rollup():
+    granularity = request.args.get("granularity", default="daily", type=str)
+    try:
+        start = _parse_date_arg("start")
+        end = _parse_date_arg("end")
+        return sales_instance.get_sales_rollup(granularity, start, end)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
+
+@app.route("/statistics/forecast", methods=["GET"])
+def get_statistics_forecast():
+    window = request.args.get("window", default=forecast.DEFAULT_WINDOW_DAYS, type=int)
+    horizon = request.args.get(
+        "horizon", default=forecast.DEFAULT_HORIZON_DAYS, type=int
+    )
+    series = sales_instance.series_snapshot()
+    medicines = medicine_list.find_medicines(series.identifiers)
+    stock = {
+        medicine_obj.identifier: quantity
+        for medicine_obj, quantity in inventory_obj.stock_of(medicines.values())
+    }
+    try:
+        rows = forecast.forecast(
+            series,
+            datetime.now(timezone.utc).timestamp(),
+            stock,
+            window_days=window,
+            horizon_days=horizon,
+        )
+    except ValueError as e:
+        return {"message": str(e)}, 400
+    for row in rows:
+        medicine_obj = medicines.get(row["identifier"])
+        row["name"] = medicine_obj.name if medicine_obj is not None else None
+    return _json_response(dumps(rows))
+
+
+def _parse_date_arg(name: str):
+    value = request.args.get(name, default="", type=str)
+    if not value:
+        return None
+    try:
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{name} must be in YYYY-MM-DD format")
+    return parsed.replace(tzinfo=timezone.utc).timestamp()
 
 
 @app.route("/history", methods=["GET"])
+@conditional(lambda: (sales_instance,))
 def get_history():
-    temp = sales_instance.get_sales_history_json()
-    temp.reverse()
-    return temp
+    if not any(arg in request.args for arg in ("limit", "before", "start", "end")):
+        return sales_instance.get_sales_history_json(newest_first=True)
+    limit = request.args.get("limit", default=None, type=int)
+    before = request.args.get("before", default=None, type=int)
+    try:
+        start = _parse_date_arg("start")
+        end = _parse_date_arg("end")
+        return sales_instance.get_sales_history_page_json(limit, before, start, end)
+    except ValueError as e:
+        return {"message": str(e)}, 400
+
+
+CATALOG_KINDS = ("medicines", "batches", "vendors")
+
+
+def _import_catalog(kind: str, stream, fmt: str) -> dict:
+    rows = bulkio.read_rows(stream, fmt)
+    if kind == "vendors":
+        return bulkio.import_vendors(rows, vendor_list, inventory_obj, medicine_list)
+    if kind == "batches":
+        return bulkio.import_batches(rows, batch_list)
+    if kind == "medicines":
+        return bulkio.import_medicines(rows, medicine_list, batch_list, vendor_list)
+    raise ValueError("Unknown catalog kind")
+
+
+def _export_catalog(kind: str, fmt: str):
+    if kind == "vendors":
+        rows, fields = bulkio.export_vendors(vendor_list), bulkio.VENDOR_FIELDS
+    elif kind == "batches":
+        rows, fields = bulkio.export_batches(batch_list), bulkio.BATCH_FIELDS
+    elif kind == "medicines":
+        rows, fields = bulkio.export_medicines(medicine_list), bulkio.MEDICINE_FIELDS
+    else:
+        raise ValueError("Unknown catalog kind")
+    return bulkio.write_rows(rows, fmt, fields)
+
+
+def _format_from_path(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+@app.route("/<kind>/import", methods=["POST"])
+def import_catalog(kind):
+    if kind not in CATALOG_KINDS:
+        return {"message": "Unknown catalog kind"}, 404
+    fmt = request.args.get("format", default="jsonl", type=str)
+    if fmt not in bulkio.FORMATS:
+        return {"message": "Format must be one of: jsonl, csv"}, 400
+    stream = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+    return _import_catalog(kind, stream, fmt), 200
+
+
+@app.route("/<kind>/export", methods=["GET"])
+def export_catalog(kind):
+    if kind not in CATALOG_KINDS:
+        return {"message": "Unknown catalog kind"}, 404
+    fmt = request.args.get("format", default="jsonl", type=str)
+    if fmt not in bulkio.FORMATS:
+        return {"message": "Format must be one of: jsonl, csv"}, 400
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(_export_catalog(kind, fmt)), mimetype=mimetype)
+
+
+@app.cli.command("import-catalog")
+@click.argument("kind", type=click.Choice(CATALOG_KINDS))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(bulkio.FORMATS), default=None)
+def import_catalog_command(kind, path, fmt):
+    with open(path, encoding="utf-8", newline="") as stream:
+        summary = _import_catalog(kind, stream, fmt or _format_from_path(path))
+    for rejection in summary["rejected"]:
+        click.echo(f"row {rejection['row']}: {rejection['message']}", err=True)
+    click.echo(
+        f"Imported {summary['imported']} {kind}, rejected {len(summary['rejected'])}"
+    )
+
+
+@app.cli.command("export-catalog")
+@click.argument("kind", type=click.Choice(CATALOG_KINDS))
+@click.argument("path", type=click.Path(dir_okay=False, allow_dash=True))
+@click.option("--format", "fmt", type=click.Choice(bulkio.FORMATS), default=None)
+def export_catalog_command(kind, path, fmt):
+    with click.open_file(path, "w", encoding="utf-8") as out:
+        for chunk in _export_catalog(kind, fmt or _format_from_path(path)):
+            out.write(chunk)
 
 
 @app.route("/")
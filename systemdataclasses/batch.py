@@ -1,7 +1,16 @@
+from __future__ import annotations
 from datetime import datetime
+from typing import TYPE_CHECKING
+from .fastjson import CachedJson, join_array
+from .storage import MemoryStorage
 
+if TYPE_CHECKING:
+    import storage
+
+
+class Batch(CachedJson):
+    _json_fields = ("batch_number", "expiry_date")
 
-class Batch:
     def __init__(self, batch_number: str, expiry_date: str):
         if batch_number is None or batch_number == "":
             raise ValueError("Batch number cannot be None or empty")
@@ -17,32 +26,62 @@ class Batch:
             f"Batch(batch_number={self.batch_number}, expiry_date={self.expiry_date})"
         )
 
-    def toJson(self):
+    def _build_json(self):
         return {"batch_number": self.batch_number, "expiry_date": self.expiry_date}
 
 
 class BatchList:
-    def __init__(self):
-        self.batches = []
+    def __init__(self, storage: storage.Storage = None):
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.batches = {}
+        self.version = 0
 
     def add_batch(self, batch: Batch):
         if batch is None:
             raise ValueError("Batch cannot be None")
-        self.batches.append(batch)
+        if batch.batch_number in self.batches:
+            raise ValueError("Batch with this batch number already exists")
+        self._insert(batch)
+        self.storage.save_batch(batch)
 
     def remove_batch(self, batch_number: str):
-        self.batches = [
-            batch for batch in self.batches if batch.batch_number != batch_number
-        ]
+        if self._discard(batch_number) is not None:
+            self.storage.delete_batch(batch_number)
+
+    def load(self):
+        for row in self.storage.load_batches():
+            self._insert(Batch(row["batch_number"], row["expiry_date"]))
+        self.version += 1
+
+    def _insert(self, batch: Batch):
+        self.batches[batch.batch_number] = batch
+        batch.watch(self._touch)
+        self.version += 1
+
+    def _discard(self, batch_number: str):
+        batch = self.batches.pop(batch_number, None)
+        if batch is not None:
+            batch.unwatch(self._touch)
+            self.version += 1
+        return batch
+
+    def _touch(self, batch: Batch):
+        self.version += 1
 
     def get_batches(self):
-        return self.batches
+        return list(self.batches.values())
 
     def find_batch(self, batch_number: str):
-        for batch in self.batches:
-            if batch.batch_number == batch_number:
-                return batch
-        return None
+        return self.batches.get(batch_number)
+
+    def query(self, batch_number: str = None):
+        if batch_number is None:
+            return iter(self.batches.values())
+        batch = self.batches.get(batch_number)
+        return iter([] if batch is None else [batch])
 
     def toJson(self):
-        return [batch.toJson() for batch in self.batches]
+        return [batch.toJson() for batch in self.batches.values()]
+
+    def toJsonBytes(self) -> bytes:
+        return join_array(batch.toJsonBytes() for batch in self.batches.values())
@@ -0,0 +1,194 @@
+from __future__ import annotations
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, TextIO
+import csv
+import io
+import json
+import math
+
+from .batch import Batch
+from .medicine import Medicine
+from .storage import batch_row, medicine_row, vendor_row
+from .vendor import Vendor
+
+if TYPE_CHECKING:
+    import batch
+    import inventory
+    import medicine
+    import vendor
+
+CHUNK_SIZE = 1000
+FORMATS = ("jsonl", "csv")
+VENDOR_FIELDS = ["vendor_id", "name", "contact_info"]
+BATCH_FIELDS = ["batch_number", "expiry_date"]
+MEDICINE_FIELDS = [
+    "identifier",
+    "name",
+    "batch_number",
+    "expiry_date",
+    "price",
+    "vendor_id",
+]
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[tuple[int, dict, str]]:
+    if fmt == "jsonl":
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(row, dict):
+                yield line_no, None, "Row must be a JSON object"
+                continue
+            yield line_no, row, None
+    elif fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+    else:
+        raise ValueError("Format must be one of: jsonl, csv")
+
+
+def write_rows(rows: Iterable[dict], fmt: str, fieldnames: list[str]) -> Iterator[str]:
+    if fmt == "jsonl":
+        for row in rows:
+            yield json.dumps(row) + "\n"
+    elif fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        raise ValueError("Format must be one of: jsonl, csv")
+
+
+def _chunks(rows: Iterator, size: int) -> Iterator[list]:
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _required(row: dict, field: str) -> str:
+    value = row.get(field)
+    if value is None or value == "":
+        raise ValueError(f"{field} is required")
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    return value
+
+
+def _price(row: dict) -> float:
+    value = row.get("price")
+    if value is None or value == "":
+        raise ValueError("price is required")
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError("Price must be a number")
+    try:
+        price = float(value)
+    except ValueError:
+        raise ValueError("Price must be a number")
+    if not math.isfinite(price):
+        raise ValueError("Price must be a finite number")
+    return price
+
+
+def _import(rows: Iterator[tuple[int, dict, str]], storage, build_and_add) -> dict:
+    imported = 0
+    rejected = []
+    for chunk in _chunks(rows, CHUNK_SIZE):
+        with storage.transaction():
+            for line_no, row, error in chunk:
+                if error is None:
+                    try:
+                        build_and_add(row)
+                        imported += 1
+                        continue
+                    except (ValueError, TypeError) as e:
+                        error = str(e)
+                rejected.append({"row": line_no, "message": error})
+    return {"imported": imported, "rejected": rejected}
+
+
+def import_vendors(
+    rows: Iterator[tuple[int, dict, str]],
+    vendor_list_obj: vendor.VendorList,
+    inventory_obj: inventory.Inventory,
+    medicine_list_obj: medicine.MedicineList,
+) -> dict:
+    def build_and_add(row: dict):
+        vendor_obj = Vendor(
+            _required(row, "vendor_id"),
+            _required(row, "name"),
+            _required(row, "contact_info"),
+            inventory_obj,
+            medicine_list_obj,
+        )
+        vendor_list_obj.add_vendor(vendor_obj)
+
+    return _import(rows, vendor_list_obj.storage, build_and_add)
+
+
+def import_batches(
+    rows: Iterator[tuple[int, dict, str]], batch_list_obj: batch.BatchList
+) -> dict:
+    def build_and_add(row: dict):
+        batch_list_obj.add_batch(
+            Batch(_required(row, "batch_number"), _required(row, "expiry_date"))
+        )
+
+    return _import(rows, batch_list_obj.storage, build_and_add)
+
+
+def import_medicines(
+    rows: Iterator[tuple[int, dict, str]],
+    medicine_list_obj: medicine.MedicineList,
+    batch_list_obj: batch.BatchList,
+    vendor_list_obj: vendor.VendorList,
+) -> dict:
+    batches = {b.batch_number: b for b in batch_list_obj.get_batches()}
+    vendors = {v.vendor_id: v for v in vendor_list_obj.get_vendors()}
+
+    def build_and_add(row: dict):
+        batch_obj = batches.get(_required(row, "batch_number"))
+        if batch_obj is None:
+            raise ValueError("Batch not found")
+        vendor_obj = vendors.get(_required(row, "vendor_id"))
+        if vendor_obj is None:
+            raise ValueError("Vendor not found")
+        identifier = row.get("identifier") or None
+        if identifier is not None and not isinstance(identifier, str):
+            raise ValueError("identifier must be a string")
+        medicine_obj = Medicine(
+            _required(row, "name"),
+            batch_obj,
+            _required(row, "expiry_date"),
+            _price(row),
+            vendor_obj,
+            identifier=identifier,
+        )
+        medicine_list_obj.add_medicine(medicine_obj)
+
+    return _import(rows, medicine_list_obj.storage, build_and_add)
+
+
+def export_vendors(vendor_list_obj: vendor.VendorList) -> Iterator[dict]:
+    return (vendor_row(v) for v in vendor_list_obj.get_vendors())
+
+
+def export_batches(batch_list_obj: batch.BatchList) -> Iterator[dict]:
+    return (batch_row(b) for b in batch_list_obj.get_batches())
+
+
+def export_medicines(medicine_list_obj: medicine.MedicineList) -> Iterator[dict]:
+    return (medicine_row(m) for m in medicine_list_obj.get_medicines())
@@ -50,12 +50,61 @@ class Cart:
         return total
 
     def generate_reciept_json(self):
+        with self.inventory.storage.transaction():
+            plan = self.inventory.remove_medicines_fefo(self.cart)
+            items, self.cart = self.cart, plan
+            try:
+                self.sales.add_sale(self)
+            except BaseException:
+                self.cart = items
+                self.inventory.add_medicines(plan)
+                raise
+        return self._receipt_json()
+
+    @staticmethod
+    def checkout_many(carts: list[Cart]) -> list[dict]:
+        if not carts:
+            return []
+        sales_obj = carts[0].sales
+        inventory_obj = carts[0].inventory
+        if any(
+            cart_obj.sales is not sales_obj or cart_obj.inventory is not inventory_obj
+            for cart_obj in carts
+        ):
+            raise ValueError("All carts must share the same Sales and Inventory.")
+        with inventory_obj.storage.transaction():
+            allocations = inventory_obj.remove_medicines_fefo_bulk(
+                [cart_obj.cart for cart_obj in carts]
+            )
+            items = [cart_obj.cart for cart_obj in carts]
+            errors = []
+            for cart_obj, (plan, error) in zip(carts, allocations):
+                if error is None:
+                    cart_obj.cart = plan
+                errors.append(error)
+            sold = [cart_obj for cart_obj, error in zip(carts, errors) if error is None]
+            try:
+                sales_obj.add_sales(sold)
+            except BaseException:
+                restock = {}
+                for cart_obj in sold:
+                    for medicine_obj, quantity in cart_obj.cart.items():
+                        restock[medicine_obj] = restock.get(medicine_obj, 0) + quantity
+                for cart_obj, cart_items in zip(carts, items):
+                    cart_obj.cart = cart_items
+                inventory_obj.add_medicines(restock)
+                raise
+        return [
+            {"status": "error", "message": error}
+            if error is not None
+            else {"status": "ok", "receipt": cart_obj._receipt_json()}
+            for cart_obj, error in zip(carts, errors)
+        ]
+
+    def _receipt_json(self):
         receipt = {"items": [], "total": self.calculate_total()}
         item: medicine.Medicine
         for item, quantity in self.cart.items():
-            if self.inventory.get_quantity(item) < quantity:
-                raise ValueError(f"Not enough {item.name} in inventory.")
-            self.inventory.remove_medicine(item, quantity)
             receipt["items"].append(
                 {
                     "name": item.name,
@@ -63,7 +112,6 @@ class Cart:
                     "price": item.price,
                 }
             )
-        self.sales.add_sale(self)
         return receipt
 
     def get_cart(self) -> dict[medicine.Medicine, int]:
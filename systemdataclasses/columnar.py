@@ -0,0 +1,148 @@
+from __future__ import annotations
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    import medicine
+
+
+class InventorySnapshot:
+    def __init__(self, rows: list[tuple[medicine.Medicine, int]], version: int = 0):
+        self.version = version
+        self.identifiers = [medicine_obj.identifier for medicine_obj, _ in rows]
+        self.vendors = []
+        self.batches = []
+        vendor_codes = {}
+        batch_codes = {}
+        expiry_codes = {}
+        size = len(rows)
+        self.price = np.empty(size, dtype=np.float64)
+        self.quantity = np.empty(size, dtype=np.int64)
+        self.expiry = np.empty(size, dtype=np.int64)
+        self.vendor = np.empty(size, dtype=np.int32)
+        self.batch = np.empty(size, dtype=np.int32)
+        for pos, (medicine_obj, quantity) in enumerate(rows):
+            self.price[pos] = medicine_obj.price
+            self.quantity[pos] = quantity
+            expiry_date = medicine_obj.batch.expiry_date
+            ordinal = expiry_codes.get(expiry_date)
+            if ordinal is None:
+                ordinal = expiry_codes[expiry_date] = _ordinal(expiry_date)
+            self.expiry[pos] = ordinal
+            self.vendor[pos] = _code(
+                vendor_codes, self.vendors, medicine_obj.vendor.vendor_id
+            )
+            self.batch[pos] = _code(
+                batch_codes, self.batches, medicine_obj.batch.batch_number
+            )
+
+    def __len__(self):
+        return len(self.identifiers)
+
+    @property
+    def value(self) -> np.ndarray:
+        return self.price * self.quantity
+
+    def mask(
+        self, max_quantity: int = None, expiring_before: str = None
+    ) -> np.ndarray:
+        selected = np.ones(len(self), dtype=bool)
+        if max_quantity is not None:
+            selected &= self.quantity <= max_quantity
+        if expiring_before is not None:
+            selected &= self.expiry < _ordinal(expiring_before)
+        return selected
+
+    def total(self, field: str = "value", mask: np.ndarray = None) -> float:
+        column = self._field(field)
+        if mask is not None:
+            column = column[mask]
+        return column.sum().item()
+
+    def group_sum(
+        self, by: str, field: str = "value", mask: np.ndarray = None
+    ) -> dict[str, float]:
+        keys, codes = self._group(by)
+        weights = self._field(field)
+        if mask is not None:
+            codes, weights = codes[mask], weights[mask]
+        sums = np.bincount(codes, weights=weights, minlength=len(keys))
+        if field == "quantity":
+            sums = sums.astype(np.int64)
+        present = np.bincount(codes, minlength=len(keys)) > 0
+        return {keys[code]: sums[code].item() for code in np.flatnonzero(present)}
+
+    def group_count(self, by: str, mask: np.ndarray = None) -> dict[str, int]:
+        keys, codes = self._group(by)
+        if mask is not None:
+            codes = codes[mask]
+        counts = np.bincount(codes, minlength=len(keys))
+        return {keys[code]: counts[code].item() for code in np.flatnonzero(counts)}
+
+    def expiry_histogram(
+        self,
+        current_date: str,
+        bucket_days: int = 30,
+        buckets: int = 12,
+        field: str = "quantity",
+    ) -> dict:
+        if bucket_days <= 0 or buckets <= 0:
+            raise ValueError("Bucket size and count must be greater than 0")
+        days_left = self.expiry - _ordinal(current_date)
+        weights = self._field(field)
+        edges = np.arange(buckets + 1) * bucket_days
+        counts, _ = np.histogram(days_left, bins=edges, weights=weights)
+        return {
+            "expired": weights[days_left < 0].sum().item(),
+            "buckets": [
+                {
+                    "from_days": int(edges[pos]),
+                    "to_days": int(edges[pos + 1]),
+                    field: counts[pos].item(),
+                }
+                for pos in range(buckets)
+            ],
+            "later": weights[days_left >= edges[-1]].sum().item(),
+        }
+
+    def toJson(self):
+        return {
+            "identifier": self.identifiers,
+            "price": self.price.tolist(),
+            "quantity": self.quantity.tolist(),
+            "expiry_date": [
+                date.fromordinal(ordinal).isoformat() for ordinal in self.expiry.tolist()
+            ],
+            "vendor_id": [self.vendors[code] for code in self.vendor.tolist()],
+            "batch_number": [self.batches[code] for code in self.batch.tolist()],
+        }
+
+    def _field(self, field: str) -> np.ndarray:
+        if field == "quantity":
+            return self.quantity
+        if field == "value":
+            return self.value
+        raise ValueError("Field must be one of: quantity, value")
+
+    def _group(self, by: str):
+        if by == "vendor":
+            return self.vendors, self.vendor
+        if by == "batch":
+            return self.batches, self.batch
+        raise ValueError("Group must be one of: vendor, batch")
+
+
+def _code(codes: dict, keys: list, key: str) -> int:
+    code = codes.get(key)
+    if code is None:
+        code = codes[key] = len(keys)
+        keys.append(key)
+    return code
+
+
+def _ordinal(value: str) -> int:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date().toordinal()
+    except ValueError:
+        raise ValueError("Date must be in YYYY-MM-DD format")
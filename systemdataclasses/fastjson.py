@@ -0,0 +1,76 @@
+from typing import Iterable
+import json
+
+_encoder = json.JSONEncoder(separators=(",", ":"))
+
+
+def dumps(obj) -> bytes:
+    return _encoder.encode(obj).encode("utf-8")
+
+
+def join_array(fragments: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(fragments) + b"]"
+
+
+def extend_object(fragment: bytes, **fields) -> bytes:
+    extra = b",".join(
+        dumps(key) + b":" + dumps(value) for key, value in fields.items()
+    )
+    if fragment == b"{}":
+        return b"{" + extra + b"}"
+    return fragment[:-1] + b"," + extra + b"}"
+
+
+def _copy_json(value):
+    if isinstance(value, dict):
+        return {key: _copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(item) for item in value]
+    return value
+
+
+class CachedJson:
+    _json_fields = ()
+    _rev = 0
+    _json_key = None
+    _json_cache = None
+    _json_bytes = None
+    _watchers = ()
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self._json_fields:
+            object.__setattr__(self, "_rev", self._rev + 1)
+            for watcher in self._watchers:
+                watcher(self)
+
+    def watch(self, watcher):
+        object.__setattr__(self, "_watchers", self._watchers + (watcher,))
+
+    def unwatch(self, watcher):
+        object.__setattr__(
+            self, "_watchers", tuple(w for w in self._watchers if w != watcher)
+        )
+
+    def _json_dependencies(self) -> tuple:
+        return ()
+
+    def _build_json(self) -> dict:
+        raise NotImplementedError
+
+    def _cached_json(self) -> dict:
+        key = (self._rev,) + tuple(dep._rev for dep in self._json_dependencies())
+        if self._json_key != key:
+            object.__setattr__(self, "_json_cache", self._build_json())
+            object.__setattr__(self, "_json_bytes", None)
+            object.__setattr__(self, "_json_key", key)
+        return self._json_cache
+
+    def toJson(self) -> dict:
+        return _copy_json(self._cached_json())
+
+    def toJsonBytes(self) -> bytes:
+        cached = self._cached_json()
+        if self._json_bytes is None:
+            object.__setattr__(self, "_json_bytes", dumps(cached))
+        return self._json_bytes
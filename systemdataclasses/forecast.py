@@ -0,0 +1,94 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    import timeseries
+
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_SEASON_DAYS = 7
+DEFAULT_SEASONS = 4
+DEFAULT_HORIZON_DAYS = 7
+MAX_WINDOW_DAYS = 90
+MAX_HORIZON_DAYS = 90
+MAX_HISTORY_DAYS = 366
+
+
+def rolling_mean(matrix: np.ndarray, window: int) -> np.ndarray:
+    if window <= 0 or window > matrix.shape[1]:
+        raise ValueError("Window must be between 1 and the number of days")
+    cumulative = np.cumsum(matrix, axis=1)
+    cumulative = np.concatenate(
+        (np.zeros((matrix.shape[0], 1)), cumulative), axis=1
+    )
+    return (cumulative[:, window:] - cumulative[:, :-window]) / window
+
+
+def rolling_std(matrix: np.ndarray, window: int) -> np.ndarray:
+    mean = rolling_mean(matrix, window)
+    mean_sq = rolling_mean(matrix * matrix, window)
+    return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+
+def seasonal_forecast(
+    matrix: np.ndarray, season_days: int, horizon_days: int
+) -> np.ndarray:
+    seasons = matrix.shape[1] // season_days
+    if seasons == 0:
+        raise ValueError("History must cover at least one season")
+    recent = matrix[:, matrix.shape[1] - seasons * season_days :]
+    profile = recent.reshape(matrix.shape[0], seasons, season_days).mean(axis=1)
+    repeats = -(-horizon_days // season_days)
+    return np.tile(profile, (1, repeats))[:, :horizon_days]
+
+
+def forecast(
+    series: timeseries.SeriesSnapshot,
+    now: float,
+    stock: dict[str, int] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    season_days: int = DEFAULT_SEASON_DAYS,
+    seasons: int = DEFAULT_SEASONS,
+    horizon_days: int = DEFAULT_HORIZON_DAYS,
+) -> list[dict]:
+    if window_days <= 0 or season_days <= 0 or seasons <= 0 or horizon_days <= 0:
+        raise ValueError("Window, season and horizon must be greater than 0")
+    if window_days > MAX_WINDOW_DAYS:
+        raise ValueError(f"Window cannot be longer than {MAX_WINDOW_DAYS} days")
+    if horizon_days > MAX_HORIZON_DAYS:
+        raise ValueError(f"Horizon cannot be longer than {MAX_HORIZON_DAYS} days")
+    if season_days * seasons > MAX_HISTORY_DAYS:
+        raise ValueError(f"Seasons cannot cover more than {MAX_HISTORY_DAYS} days")
+    history_days = max(window_days * 2, season_days * seasons)
+    today = int(now // 86400) * 86400
+    start = today - (history_days - 1) * 86400
+    quantities = series.daily_matrix(start, history_days)
+    values = series.daily_matrix(start, history_days, field="values")
+
+    averages = rolling_mean(quantities, window_days)
+    deviations = rolling_std(quantities, window_days)
+    moving_average = averages[:, -1]
+    previous_average = averages[:, -1 - window_days]
+    projected = seasonal_forecast(quantities, season_days, horizon_days)
+    stock_levels = np.array(
+        [(stock or {}).get(identifier, 0) for identifier in series.identifiers],
+        dtype=np.float64,
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cover = np.where(moving_average > 0, stock_levels / moving_average, np.inf)
+    window_value = values[:, -window_days:].sum(axis=1)
+
+    return [
+        {
+            "identifier": identifier,
+            "moving_average": float(moving_average[pos]),
+            "previous_average": float(previous_average[pos]),
+            "std_dev": float(deviations[pos, -1]),
+            "value_sold": float(window_value[pos]),
+            "stock": int(stock_levels[pos]),
+            "days_of_cover": None if np.isinf(cover[pos]) else float(cover[pos]),
+            "forecast": [float(qty) for qty in projected[pos]],
+            "forecast_total": float(projected[pos].sum()),
+        }
+        for pos, identifier in enumerate(series.identifiers)
+    ]
@@ -0,0 +1,49 @@
+import secrets
+import threading
+import time
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+
+def encode_ulid(value: int) -> str:
+    chars = []
+    for _ in range(26):
+        chars.append(_CROCKFORD[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def ulid_timestamp(ulid: str) -> float:
+    value = 0
+    for char in ulid.upper():
+        value = (value << 5) | _CROCKFORD.index(char)
+    return (value >> _RANDOM_BITS) / 1000
+
+
+class UlidGenerator:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._last_random = 0
+
+    def new(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._last_random = secrets.randbits(_RANDOM_BITS - 1)
+            elif self._last_random < _RANDOM_MAX:
+                self._last_random += 1
+            else:
+                self._last_ms += 1
+                self._last_random = secrets.randbits(_RANDOM_BITS - 1)
+            return encode_ulid((self._last_ms << _RANDOM_BITS) | self._last_random)
+
+
+_generator = UlidGenerator()
+
+
+def new_ulid() -> str:
+    return _generator.new()
@@ -1,27 +1,80 @@
 from __future__ import annotations
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from heapq import heapify, heappop, heappush
+from itertools import count
+import logging
+import math
+import threading
 from typing import TYPE_CHECKING
+from .columnar import InventorySnapshot
+from .fastjson import dumps, join_array
+from .search import normalize
+from .sortedindex import SortedIndex
+from .storage import MemoryStorage
 
 if TYPE_CHECKING:
     import medicine
+    import storage
+
+VALUATION_CHECK_INTERVAL = 10000
+VALUATION_CHECK_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
 
 
 class Inventory:
     def __init__(
-        self, medicines: list[medicine.Medicine] = None, quantity: list[int] = None
+        self,
+        medicines: list[medicine.Medicine] = None,
+        quantity: list[int] = None,
+        storage: storage.Storage = None,
     ):
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.inventory = {}
+        self.version = 0
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._index_lock = threading.RLock()
+        self._expiry_index = SortedIndex()
+        self._quantity_index = SortedIndex()
+        self._identifier_index = SortedIndex()
+        self._valuation = 0.0
+        self._valuation_by_vendor = {}
+        self._valuation_by_batch = {}
+        self._valuation_basis = {}
+        self._mutations_since_check = 0
+        self.valuation_drift = 0
+        self._listeners = []
+        self._columnar = None
+        self._lots = {}
+        self._lot_entries = {}
+        self._stale_lots = {}
+        self._product_stock = {}
+        self._lot_seq = count()
         if medicines is None or quantity is None:
-            self.inventory = {}
             return
         if len(medicines) != len(quantity):
             raise ValueError("Medicines and quantities must have the same length.")
-        self.inventory = {}
         for med, qty in zip(medicines, quantity):
             if med is None:
                 raise ValueError("Medicine cannot be None or not of type Medicine")
             if qty <= 0:
                 raise ValueError("Quantity must be greater than 0")
-            self.inventory[med] = qty
+            self._set_quantity(med, qty)
+
+    def load(self, medicine_list_obj: medicine.MedicineList):
+        for identifier, qty in self.storage.load_stock():
+            medicine_obj = medicine_list_obj.find_medicine(identifier)
+            if medicine_obj is None:
+                raise ValueError(f"Medicine {identifier} not found.")
+            self._set_quantity(medicine_obj, qty, persist=False)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
 
     def queue_order(self, medicine_obj: medicine.Medicine, quantity: int):
         if medicine_obj is None:
@@ -35,25 +88,255 @@ class Inventory:
             raise ValueError("Medicine cannot be None or not of type Medicine")
         if quantity <= 0:
             raise ValueError("Quantity must be greater than 0")
-        if medicine_obj in self.inventory:
-            self.inventory[medicine_obj] += quantity
-        else:
-            self.inventory[medicine_obj] = quantity
+        with self.storage.transaction(), self._locked([medicine_obj]):
+            self._set_quantity(
+                medicine_obj, self.inventory.get(medicine_obj, 0) + quantity
+            )
+
+    def add_medicines(self, items: dict[medicine.Medicine, int]):
+        for medicine_obj, quantity in items.items():
+            if medicine_obj is None:
+                raise ValueError("Medicine cannot be None or not of type Medicine")
+            if quantity <= 0:
+                raise ValueError("Quantity must be greater than 0")
+        with self.storage.transaction(), self._locked(items):
+            for medicine_obj, quantity in items.items():
+                self._set_quantity(
+                    medicine_obj, self.inventory.get(medicine_obj, 0) + quantity
+                )
 
     def remove_medicine(self, medicine_obj: medicine.Medicine, quantity: int):
         if medicine_obj is None:
             raise ValueError("Medicine cannot be None")
         if quantity <= 0:
             raise ValueError("Quantity must be greater than 0")
-        if medicine_obj in self.inventory:
-            if self.inventory[medicine_obj] >= quantity:
-                self.inventory[medicine_obj] -= quantity
-                if self.inventory[medicine_obj] == 0:
-                    del self.inventory[medicine_obj]
+        with self.storage.transaction(), self._locked([medicine_obj]):
+            if medicine_obj in self.inventory:
+                if self.inventory[medicine_obj] >= quantity:
+                    self._set_quantity(
+                        medicine_obj, self.inventory[medicine_obj] - quantity
+                    )
+                else:
+                    raise ValueError("Not enough quantity to remove.")
             else:
-                raise ValueError("Not enough quantity to remove.")
+                raise ValueError("Medicine not found in inventory.")
+
+    def _lock_for(self, medicine_obj: medicine.Medicine) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(medicine_obj)
+            if lock is None:
+                lock = self._locks[medicine_obj] = threading.Lock()
+            return lock
+
+    @contextmanager
+    def _locked(self, medicines):
+        locks = [self._lock_for(med) for med in sorted(set(medicines), key=id)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _set_quantity(
+        self, medicine_obj: medicine.Medicine, quantity: int, persist: bool = True
+    ):
+        with self._index_lock:
+            self._apply_quantity(medicine_obj, quantity, persist)
+
+    def _apply_quantity(
+        self, medicine_obj: medicine.Medicine, quantity: int, persist: bool
+    ):
+        previous = self.inventory.get(medicine_obj, 0)
+        self._adjust_valuation(medicine_obj, quantity)
+        entry = self._lot_entries.get(medicine_obj)
+        product = product_key(medicine_obj) if entry is None else entry[3]
+        stock = self._product_stock.get(product, 0) + quantity - previous
+        if stock:
+            self._product_stock[product] = stock
         else:
-            raise ValueError("Medicine not found in inventory.")
+            self._product_stock.pop(product, None)
+        if quantity == 0:
+            self.inventory.pop(medicine_obj, None)
+            self._expiry_index.discard(medicine_obj)
+            self._quantity_index.discard(medicine_obj)
+            self._identifier_index.discard(medicine_obj)
+            self._discard_lot(medicine_obj)
+            medicine_obj.unwatch(self._restate)
+        else:
+            if medicine_obj not in self.inventory:
+                medicine_obj.watch(self._restate)
+                expiry = _parse_date(medicine_obj.batch.expiry_date)
+                self._expiry_index.add(medicine_obj, expiry)
+                self._identifier_index.add(medicine_obj, medicine_obj.identifier)
+                self._push_lot(medicine_obj, product, expiry)
+            self.inventory[medicine_obj] = quantity
+            self._quantity_index.add(medicine_obj, quantity)
+        self.version += 1
+        if persist:
+            self.storage.save_stock(medicine_obj.identifier, quantity)
+        self._mutations_since_check += 1
+        if persist:
+            for listener in self._listeners:
+                listener(medicine_obj, previous, quantity)
+
+    def _restate(self, medicine_obj: medicine.Medicine):
+        with self._index_lock:
+            quantity = self.inventory.get(medicine_obj, 0)
+            if quantity:
+                self._apply_quantity(medicine_obj, 0, False)
+                self._apply_quantity(medicine_obj, quantity, False)
+
+    def _push_lot(self, medicine_obj: medicine.Medicine, product: tuple, expiry: date):
+        entry = (expiry, next(self._lot_seq), medicine_obj, product)
+        self._lot_entries[medicine_obj] = entry
+        heappush(self._lots.setdefault(product, []), entry)
+
+    def _discard_lot(self, medicine_obj: medicine.Medicine):
+        entry = self._lot_entries.pop(medicine_obj, None)
+        if entry is None:
+            return
+        product = entry[3]
+        lots = self._lots[product]
+        stale = self._stale_lots.get(product, 0) + 1
+        if stale * 2 <= len(lots):
+            self._stale_lots[product] = stale
+            return
+        self._stale_lots.pop(product, None)
+        lots[:] = [entry for entry in lots if self._lot_entries.get(entry[2]) is entry]
+        if lots:
+            heapify(lots)
+        else:
+            del self._lots[product]
+
+    def _live_lot(self, entry) -> bool:
+        return self._lot_entries.get(entry[2]) is entry
+
+    def _product_of(self, medicine_obj: medicine.Medicine) -> tuple:
+        entry = self._lot_entries.get(medicine_obj)
+        return product_key(medicine_obj) if entry is None else entry[3]
+
+    def _plan_lots(
+        self,
+        product: tuple,
+        quantity: int,
+        today: date,
+        planned: dict[medicine.Medicine, int],
+        cart_plan: dict[medicine.Medicine, int],
+    ) -> bool:
+        lots = self._lots.get(product)
+        if lots is None or self._product_stock.get(product, 0) < quantity:
+            return False
+        taken = []
+        while quantity > 0 and lots:
+            entry = heappop(lots)
+            if not self._live_lot(entry):
+                self._stale_lots[product] -= 1
+                continue
+            taken.append(entry)
+            lot = entry[2]
+            available = (
+                self.inventory[lot] - planned.get(lot, 0) - cart_plan.get(lot, 0)
+            )
+            if entry[0] < today or available <= 0:
+                continue
+            allocated = min(quantity, available)
+            cart_plan[lot] = cart_plan.get(lot, 0) + allocated
+            quantity -= allocated
+        for entry in taken:
+            heappush(lots, entry)
+        return quantity == 0
+
+    def lots_of(self, medicine_obj: medicine.Medicine) -> list[tuple[medicine.Medicine, int]]:
+        with self._index_lock:
+            lots = sorted(self._lots.get(self._product_of(medicine_obj), ()))
+            return [
+                (entry[2], self.inventory[entry[2]])
+                for entry in lots
+                if self._live_lot(entry)
+            ]
+
+    def remove_medicines_fefo(
+        self, items: dict[medicine.Medicine, int], current_date: str = None
+    ) -> dict[medicine.Medicine, int]:
+        plan, error = self.remove_medicines_fefo_bulk([items], current_date)[0]
+        if error is not None:
+            raise ValueError(error)
+        return plan
+
+    def remove_medicines_fefo_bulk(
+        self, carts: list[dict[medicine.Medicine, int]], current_date: str = None
+    ) -> list[tuple[dict[medicine.Medicine, int], str]]:
+        today = _sale_date(current_date)
+        demands = []
+        for items in carts:
+            demand = {}
+            error = None
+            for medicine_obj, quantity in items.items():
+                if medicine_obj is None:
+                    error = "Medicine cannot be None"
+                    break
+                if quantity <= 0:
+                    error = "Quantity must be greater than 0"
+                    break
+                line = demand.setdefault(self._product_of(medicine_obj), [medicine_obj, 0])
+                line[1] += quantity
+            demands.append((demand, error))
+        with self.storage.transaction():
+            while True:
+                results = []
+                planned = {}
+                with self._index_lock:
+                    for demand, error in demands:
+                        cart_plan = {}
+                        if error is None:
+                            for product, (medicine_obj, quantity) in demand.items():
+                                if not self._plan_lots(
+                                    product, quantity, today, planned, cart_plan
+                                ):
+                                    error = f"Not enough {medicine_obj.name} in inventory."
+                                    break
+                        if error is not None:
+                            results.append(({}, error))
+                            continue
+                        for lot, quantity in cart_plan.items():
+                            planned[lot] = planned.get(lot, 0) + quantity
+                        results.append((cart_plan, None))
+                with self._locked(planned):
+                    if any(self.inventory.get(m, 0) < q for m, q in planned.items()):
+                        continue
+                    for medicine_obj, quantity in planned.items():
+                        self._set_quantity(
+                            medicine_obj, self.inventory[medicine_obj] - quantity
+                        )
+                    return results
+
+    def _adjust_valuation(self, medicine_obj: medicine.Medicine, quantity: int):
+        basis = self._valuation_basis.pop(medicine_obj, None)
+        if basis is not None:
+            value, vendor_id, batch_number = basis
+            self._add_valuation(-value, vendor_id, batch_number)
+        if quantity:
+            basis = (
+                medicine_obj.price * quantity,
+                medicine_obj.vendor.vendor_id,
+                medicine_obj.batch.batch_number,
+            )
+            self._valuation_basis[medicine_obj] = basis
+            self._add_valuation(*basis)
+
+    def _add_valuation(self, delta: float, vendor_id: str, batch_number: str):
+        self._valuation += delta
+        for subtotals, key in (
+            (self._valuation_by_vendor, vendor_id),
+            (self._valuation_by_batch, batch_number),
+        ):
+            value = subtotals.get(key, 0.0) + delta
+            if math.isclose(value, 0.0, abs_tol=1e-9):
+                subtotals.pop(key, None)
+            else:
+                subtotals[key] = value
 
     def get_quantity(self, medicine_obj: medicine.Medicine) -> int:
         if medicine_obj is None:
@@ -62,47 +345,144 @@ class Inventory:
             raise ValueError("Medicine not found in inventory.")
         return self.inventory.get(medicine_obj, 0)
 
+    def _snapshot(self) -> list[tuple[medicine.Medicine, int]]:
+        with self._index_lock:
+            return list(self.inventory.items())
+
+    def columnar_snapshot(self) -> InventorySnapshot:
+        with self._index_lock:
+            snapshot = self._columnar
+            if snapshot is None or snapshot.version != self.version:
+                snapshot = InventorySnapshot(list(self.inventory.items()), self.version)
+                self._columnar = snapshot
+            return snapshot
+
     def search_medicine(self, id: str) -> medicine.Medicine:
-        for med in self.inventory.keys():
+        for med, _ in self._snapshot():
             if med.identifier == id:
                 return med
         raise ValueError("Medicine not found in inventory 1.")
 
     def get_medicines(self) -> list[medicine.Medicine]:
-        return list(self.inventory.keys())
+        return [med for med, _ in self._snapshot()]
+
+    def stock_of(self, medicines=None) -> list[tuple[medicine.Medicine, int]]:
+        if medicines is None:
+            return self._snapshot()
+        with self._index_lock:
+            return [
+                (med, self.inventory[med]) for med in medicines if med in self.inventory
+            ]
+
+    def stock_page(
+        self, limit: int = None, cursor: str = None
+    ) -> tuple[list[tuple[medicine.Medicine, int]], str]:
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be greater than 0")
+        after = (cursor, math.inf) if cursor else None
+        rows = []
+        next_cursor = None
+        with self._index_lock:
+            for _, _, med in self._identifier_index.irange(after=after):
+                if limit is not None and len(rows) == limit:
+                    next_cursor = rows[-1][0].identifier
+                    break
+                rows.append((med, self.inventory[med]))
+        return rows, next_cursor
 
     def get_stock_valuation(self) -> float:
-        total_value = 0.0
+        return self._valuation
+
+    def get_stock_valuation_by_vendor(self) -> dict[str, float]:
+        return dict(self._valuation_by_vendor)
 
-        med: medicine.Medicine
-        qty: int
-        for med, qty in self.inventory.items():
-            total_value += med.price * qty
-        return total_value
+    def get_stock_valuation_by_batch(self) -> dict[str, float]:
+        return dict(self._valuation_by_batch)
+
+    def valuation_check_due(self) -> bool:
+        return self._mutations_since_check >= VALUATION_CHECK_INTERVAL
+
+    def check_stock_valuation(self) -> bool:
+        for _ in range(VALUATION_CHECK_ATTEMPTS):
+            with self._index_lock:
+                version = self.version
+                stock = list(self.inventory.items())
+            revalued = _revalue(stock)
+            with self._index_lock:
+                if self.version == version:
+                    return self._install_valuation(*revalued)
+        with self._index_lock:
+            return self._check_stock_valuation()
+
+    def _check_stock_valuation(self) -> bool:
+        return self._install_valuation(*_revalue(self.inventory.items()))
+
+    def _install_valuation(
+        self, total_value: float, by_vendor: dict, by_batch: dict, basis: dict
+    ) -> bool:
+        consistent = _totals_match(self._valuation, total_value) and all(
+            _subtotals_match(running, recomputed)
+            for running, recomputed in (
+                (self._valuation_by_vendor, by_vendor),
+                (self._valuation_by_batch, by_batch),
+            )
+        )
+        self._valuation = total_value
+        self._valuation_by_vendor = by_vendor
+        self._valuation_by_batch = by_batch
+        self._valuation_basis = basis
+        self._mutations_since_check = 0
+        if not consistent:
+            self.valuation_drift += 1
+            logger.warning("Stock valuation drifted from its running totals.")
+        return consistent
 
     def get_threshold_alerts(
         self, threshold: int
     ) -> list[tuple[medicine.Medicine, int]]:
-        alerts = []
+        return self.threshold_page(threshold)[0]
+
+    def threshold_page(
+        self, threshold: int, limit: int = None, cursor: str = None
+    ) -> tuple[list[tuple[medicine.Medicine, int]], str]:
         if threshold <= 0:
             raise ValueError("Threshold must be greater than 0")
-        for med, qty in self.inventory.items():
-            if qty <= threshold:
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be greater than 0")
+        after = _decode_cursor(cursor)
+        alerts = []
+        next_cursor = None
+        with self._index_lock:
+            for qty, seq, med in self._quantity_index.irange(
+                hi=threshold, include_hi=True, after=after
+            ):
+                if limit is not None and len(alerts) == limit:
+                    break
                 alerts.append((med, qty))
-        return alerts
+                next_cursor = f"{qty}:{seq}"
+            else:
+                next_cursor = None
+        return alerts, next_cursor
 
     def track_batch_expiry(
         self, current_date: str
     ) -> list[tuple[medicine.Medicine, str]]:
-        expired_medicines = []
-        try:
-            datetime.strptime(current_date, "%Y-%m-%d")
-        except ValueError:
-            raise ValueError("Expiry date must be in YYYY-MM-DD format")
-        for med in self.inventory.keys():
-            if med.batch.expiry_date < current_date:
-                expired_medicines.append((med, med.batch.expiry_date))
-        return expired_medicines
+        current = _parse_date(current_date)
+        with self._index_lock:
+            medicines = self._expiry_index.values(hi=current)
+        return [(med, med.batch.expiry_date) for med in medicines]
+
+    def get_expiring_within(
+        self, current_date: str, days: int
+    ) -> list[tuple[medicine.Medicine, str]]:
+        if days < 0:
+            raise ValueError("Days must be greater than or equal to 0")
+        start = _parse_date(current_date)
+        with self._index_lock:
+            medicines = self._expiry_index.values(
+                lo=start, hi=start + timedelta(days=days), include_hi=True
+            )
+        return [(med, med.batch.expiry_date) for med in medicines]
 
     def __str__(self):
         return f"Inventory(medicine={self.medicine}, quantity={self.quantity})"
@@ -113,32 +493,139 @@ class Inventory:
                 "medicine": med.toJson(),
                 "quantity": qty,
             }
-            for med, qty in self.inventory.items()
+            for med, qty in self._snapshot()
         ]
 
+    def toJsonBytes(self) -> bytes:
+        return join_array(_stock_row_bytes(med, qty) for med, qty in self._snapshot())
+
     def threshold_toJson(self, threshold: int):
-        if threshold <= 0:
-            raise ValueError("Threshold must be greater than 0")
+        return self._threshold_rows_toJson(self.get_threshold_alerts(threshold))
+
+    def threshold_toJsonBytes(self, threshold: int) -> bytes:
+        return join_array(
+            _stock_row_bytes(med, qty)
+            for med, qty in self.get_threshold_alerts(threshold)
+        )
+
+    def threshold_page_toJson(self, threshold: int, limit: int, cursor: str = None):
+        alerts, next_cursor = self.threshold_page(threshold, limit, cursor)
+        return {
+            "items": self._threshold_rows_toJson(alerts),
+            "next_cursor": next_cursor,
+        }
+
+    def _threshold_rows_toJson(self, rows: list[tuple[medicine.Medicine, int]]):
         return [
             {
                 "medicine": med.toJson(),
                 "quantity": qty,
             }
-            for med, qty in self.inventory.items()
-            if qty <= threshold
+            for med, qty in rows
         ]
 
     def expiry_toJson(self, current_date: str):
-        try:
-            datetime.strptime(current_date, "%Y-%m-%d")
-        except ValueError:
-            raise ValueError("Expiry date must be in YYYY-MM-DD format")
+        return self._expiry_rows_toJson(self.track_batch_expiry(current_date))
+
+    def expiring_within_toJson(self, current_date: str, days: int):
+        return self._expiry_rows_toJson(self.get_expiring_within(current_date, days))
+
+    def expiry_toJsonBytes(self, current_date: str) -> bytes:
+        return self._expiry_rows_toJsonBytes(self.track_batch_expiry(current_date))
+
+    def expiring_within_toJsonBytes(self, current_date: str, days: int) -> bytes:
+        return self._expiry_rows_toJsonBytes(
+            self.get_expiring_within(current_date, days)
+        )
+
+    def _expiry_rows_toJsonBytes(self, rows: list[tuple[medicine.Medicine, str]]):
+        return join_array(
+            b'{"medicine":'
+            + med.toJsonBytes()
+            + b',"expiry_date":'
+            + dumps(expiry_date)
+            + b',"quantity":'
+            + str(self.inventory.get(med, 0)).encode()
+            + b"}"
+            for med, expiry_date in rows
+        )
+
+    def _expiry_rows_toJson(self, rows: list[tuple[medicine.Medicine, str]]):
         return [
             {
                 "medicine": med.toJson(),
-                "expiry_date": med.batch.expiry_date,
-                "quantity": qty,
+                "expiry_date": expiry_date,
+                "quantity": self.inventory.get(med, 0),
             }
-            for med, qty in self.inventory.items()
-            if med.batch.expiry_date < current_date
+            for med, expiry_date in rows
         ]
+
+
+def _stock_row_bytes(medicine_obj: medicine.Medicine, quantity: int) -> bytes:
+    return (
+        b'{"medicine":'
+        + medicine_obj.toJsonBytes()
+        + b',"quantity":'
+        + str(quantity).encode()
+        + b"}"
+    )
+
+
+def product_key(medicine_obj: medicine.Medicine) -> tuple:
+    return (
+        medicine_obj.vendor.vendor_id,
+        normalize(medicine_obj.name),
+        medicine_obj.price,
+    )
+
+
+def _parse_date(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("Expiry date must be in YYYY-MM-DD format")
+
+
+def _sale_date(current_date: str = None) -> date:
+    if current_date is None:
+        return datetime.now(timezone.utc).date()
+    return _parse_date(current_date)
+
+
+def _revalue(stock) -> tuple[float, dict, dict, dict]:
+    total_value = 0.0
+    by_vendor = {}
+    by_batch = {}
+    basis = {}
+
+    med: medicine.Medicine
+    qty: int
+    for med, qty in stock:
+        value = med.price * qty
+        total_value += value
+        vendor_id = med.vendor.vendor_id
+        batch_number = med.batch.batch_number
+        by_vendor[vendor_id] = by_vendor.get(vendor_id, 0.0) + value
+        by_batch[batch_number] = by_batch.get(batch_number, 0.0) + value
+        basis[med] = (value, vendor_id, batch_number)
+    return total_value, by_vendor, by_batch, basis
+
+
+def _totals_match(running: float, recomputed: float) -> bool:
+    return math.isclose(running, recomputed, rel_tol=1e-9, abs_tol=1e-6)
+
+
+def _subtotals_match(running: dict, recomputed: dict) -> bool:
+    if running.keys() != recomputed.keys():
+        return False
+    return all(_totals_match(running[key], recomputed[key]) for key in running)
+
+
+def _decode_cursor(cursor: str):
+    if cursor is None or cursor == "":
+        return None
+    try:
+        key, seq = cursor.split(":")
+        return int(key), int(seq)
+    except ValueError:
+        raise ValueError("Invalid cursor")
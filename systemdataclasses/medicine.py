@@ -1,14 +1,33 @@
 from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
+import threading
 import time
 
+from .fastjson import CachedJson, join_array
+from .search import SearchIndex, normalize
+from .sortedindex import SortedIndex
+from .storage import MemoryStorage
+
 if TYPE_CHECKING:
     import vendor  # noqa: F401
     import batch
+    import storage
+
+_stamp_lock = threading.Lock()
+_last_stamp = 0
+
+
+def _unique_stamp() -> int:
+    global _last_stamp
+    with _stamp_lock:
+        _last_stamp = max(time.time_ns(), _last_stamp + 1)
+        return _last_stamp
 
 
-class Medicine:
+class Medicine(CachedJson):
+    _json_fields = ("name", "identifier", "batch", "expiry_date", "price", "vendor")
+
     def __init__(
         self,
         name: str,
@@ -16,6 +35,7 @@ class Medicine:
         expiry_date: str,
         price: float,
         vendor: vendor.Vendor,
+        identifier: str = None,
     ):
         if batch is None:
             raise ValueError("Batch cannot be None")
@@ -32,7 +52,9 @@ class Medicine:
         except ValueError:
             raise ValueError("Expiry date must be in YYYY-MM-DD format")
         self.name = name
-        self.identifier = name.replace(" ", "_").lower() + "_" + str(time.time())
+        if identifier is None:
+            identifier = name.replace(" ", "_").lower() + "_" + str(_unique_stamp())
+        self.identifier = identifier
         self.batch = batch
         self.expiry_date = expiry_date
         self.price = price
@@ -48,7 +70,10 @@ class Medicine:
     def __str__(self):
         return f"Medicine(name={self.name}, batch_number={str(self.batch)}, expiry_date={self.expiry_date}, price={self.price}, vendor={self.vendor})"
 
-    def toJson(self):
+    def _json_dependencies(self):
+        return (self.batch, self.vendor)
+
+    def _build_json(self):
         return {
             "name": self.name,
             "identifier": self.identifier,
@@ -60,29 +85,152 @@ class Medicine:
 
 
 class MedicineList:
-    def __init__(self):
-        self.medicines = []
+    def __init__(self, storage: storage.Storage = None):
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.medicines = {}
+        self.version = 0
+        self._by_name = {}
+        self._by_vendor = {}
+        self._by_batch = {}
+        self._index_entries = {}
+        self._names = SortedIndex()
+        self.search_index = SearchIndex()
 
     def add_medicine(self, medicine_obj: Medicine):
         if medicine_obj is None:
             raise ValueError("Medicine cannot be None or not of type Medicine")
-        self.medicines.append(medicine_obj)
+        if medicine_obj.identifier in self.medicines:
+            raise ValueError("Medicine with this identifier already exists")
+        self._insert(medicine_obj)
+        self.storage.save_medicine(medicine_obj)
 
     def remove_medicine(self, identifier: str):
-        self.medicines = [
-            medicine_obj
-            for medicine_obj in self.medicines
-            if medicine_obj.identifier != identifier
-        ]
+        if self._discard(identifier) is not None:
+            self.storage.delete_medicine(identifier)
+
+    def load(self, batch_list_obj: batch.BatchList, vendor_list_obj: vendor.VendorList):
+        for row in self.storage.load_medicines():
+            batch_obj = batch_list_obj.find_batch(row["batch_number"])
+            if batch_obj is None:
+                raise ValueError(f"Batch {row['batch_number']} not found.")
+            vendor_obj = vendor_list_obj.find_vendor(row["vendor_id"])
+            if vendor_obj is None:
+                raise ValueError(f"Vendor {row['vendor_id']} not found.")
+            self._insert(
+                Medicine(
+                    row["name"],
+                    batch_obj,
+                    row["expiry_date"],
+                    row["price"],
+                    vendor_obj,
+                    identifier=row["identifier"],
+                )
+            )
 
     def find_medicine(self, identifier: str):
-        for medicine_obj in self.medicines:
-            if medicine_obj.identifier == identifier:
-                return medicine_obj
-        return None
+        return self.medicines.get(identifier)
+
+    def find_medicines(self, identifiers) -> dict[str, Medicine]:
+        found = {}
+        for identifier in identifiers:
+            medicine_obj = self.medicines.get(identifier)
+            if medicine_obj is not None:
+                found[identifier] = medicine_obj
+        return found
+
+    def search(self, query: str, limit: int = 10) -> list[Medicine]:
+        return self.search_index.search(query, limit)
+
+    def find_by_name_prefix(self, prefix: str) -> list[Medicine]:
+        prefix = normalize(prefix)
+        return self._names.values(lo=prefix, hi=prefix + "\uffff")
+
+    def query(
+        self, vendor_id: str = None, batch_number: str = None, name_prefix: str = None
+    ):
+        candidates = []
+        if vendor_id is not None:
+            candidates.append(self._by_vendor.get(vendor_id, {}).values())
+        if batch_number is not None:
+            candidates.append(self._by_batch.get(batch_number, {}).values())
+        if name_prefix is not None:
+            candidates.append(self.find_by_name_prefix(name_prefix))
+        if not candidates:
+            return iter(self.medicines.values())
+        smallest = min(candidates, key=len)
+        prefix = None if name_prefix is None else normalize(name_prefix)
+        return (
+            medicine_obj
+            for medicine_obj in list(smallest)
+            if (vendor_id is None or medicine_obj.vendor.vendor_id == vendor_id)
+            and (
+                batch_number is None
+                or medicine_obj.batch.batch_number == batch_number
+            )
+            and (prefix is None or normalize(medicine_obj.name).startswith(prefix))
+        )
+
+    def find_by_name(self, name: str) -> list[Medicine]:
+        return list(self._by_name.get(normalize(name), {}).values())
+
+    def find_by_vendor(self, vendor_id: str) -> list[Medicine]:
+        return list(self._by_vendor.get(vendor_id, {}).values())
+
+    def find_by_batch(self, batch_number: str) -> list[Medicine]:
+        return list(self._by_batch.get(batch_number, {}).values())
 
     def get_medicines(self):
-        return self.medicines
+        return list(self.medicines.values())
 
     def toJson(self):
-        return [medicine_obj.toJson() for medicine_obj in self.medicines]
+        return [medicine_obj.toJson() for medicine_obj in self.medicines.values()]
+
+    def toJsonBytes(self) -> bytes:
+        return join_array(
+            medicine_obj.toJsonBytes() for medicine_obj in self.medicines.values()
+        )
+
+    def _insert(self, medicine_obj: Medicine):
+        self.medicines[medicine_obj.identifier] = medicine_obj
+        self._index(medicine_obj)
+        medicine_obj.watch(self._touch)
+        self.version += 1
+
+    def _discard(self, identifier: str):
+        medicine_obj = self.medicines.pop(identifier, None)
+        if medicine_obj is not None:
+            self._unindex(medicine_obj)
+            medicine_obj.unwatch(self._touch)
+            self.version += 1
+        return medicine_obj
+
+    def _touch(self, medicine_obj: Medicine):
+        self._unindex(medicine_obj)
+        self._index(medicine_obj)
+        self.version += 1
+
+    def _index_keys(self, medicine_obj: Medicine):
+        return (
+            (self._by_name, normalize(medicine_obj.name)),
+            (self._by_vendor, medicine_obj.vendor.vendor_id),
+            (self._by_batch, medicine_obj.batch.batch_number),
+        )
+
+    def _index(self, medicine_obj: Medicine):
+        keys = self._index_keys(medicine_obj)
+        self._index_entries[medicine_obj.identifier] = keys
+        for index, key in keys:
+            index.setdefault(key, {})[medicine_obj.identifier] = medicine_obj
+        self._names.add(medicine_obj, normalize(medicine_obj.name))
+        self.search_index.add(medicine_obj.identifier, medicine_obj.name, medicine_obj)
+
+    def _unindex(self, medicine_obj: Medicine):
+        self._names.discard(medicine_obj)
+        self.search_index.remove(medicine_obj.identifier)
+        for index, key in self._index_entries.pop(medicine_obj.identifier, ()):
+            bucket = index.get(key)
+            if bucket is None:
+                continue
+            bucket.pop(medicine_obj.identifier, None)
+            if not bucket:
+                del index[key]
@@ -0,0 +1,32 @@
+from itertools import islice
+from typing import Iterable
+
+
+def decode_offset(cursor: str) -> int:
+    if cursor is None or cursor == "":
+        return 0
+    try:
+        offset = int(cursor)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
+
+
+def paginate(items: Iterable, limit: int = None, cursor: str = None) -> tuple[list, str]:
+    offset = decode_offset(cursor)
+    if limit is None:
+        return list(islice(items, offset, None)), None
+    if limit <= 0:
+        raise ValueError("Limit must be greater than 0")
+    rows = list(islice(items, offset, offset + limit + 1))
+    if len(rows) > limit:
+        return rows[:limit], str(offset + limit)
+    return rows, None
+
+
+def project(row: dict, fields: list[str]) -> dict:
+    if not fields:
+        return row
+    return {field: row[field] for field in fields if field in row}
@@ -0,0 +1,161 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import logging
+import math
+import threading
+import time
+from .ids import new_ulid
+
+if TYPE_CHECKING:
+    import inventory
+    import medicine
+    import sales
+
+DEFAULT_REORDER_POINT = 5
+VELOCITY_WINDOW_DAYS = 14
+LEAD_TIME_DAYS = 7
+COALESCE_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
+class ReplenishmentEngine:
+    def __init__(
+        self,
+        inventory_obj: inventory.Inventory,
+        sales_obj: sales.Sales,
+        default_reorder_point: int = DEFAULT_REORDER_POINT,
+        window_days: int = VELOCITY_WINDOW_DAYS,
+        lead_time_days: int = LEAD_TIME_DAYS,
+    ):
+        if inventory_obj is None:
+            raise ValueError("Inventory object cannot be None")
+        if sales_obj is None:
+            raise ValueError("Sales object cannot be None")
+        if default_reorder_point < 0:
+            raise ValueError("Reorder point cannot be negative")
+        if window_days <= 0 or lead_time_days <= 0:
+            raise ValueError("Window and lead time must be greater than 0")
+        self.inventory_obj = inventory_obj
+        self.sales_obj = sales_obj
+        self.default_reorder_point = default_reorder_point
+        self.window_days = window_days
+        self.lead_time_days = lead_time_days
+        self.reorder_points = {}
+        self._pending = {}
+        self._on_order = set()
+        self._revalue = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        inventory_obj.add_listener(self.on_stock_change)
+
+    def set_reorder_point(self, identifier: str, reorder_point: int):
+        if identifier is None or identifier == "":
+            raise ValueError("Identifier cannot be None or empty")
+        if reorder_point < 0:
+            raise ValueError("Reorder point cannot be negative")
+        self.reorder_points[identifier] = reorder_point
+
+    def reorder_point(self, identifier: str) -> int:
+        return self.reorder_points.get(identifier, self.default_reorder_point)
+
+    def on_stock_change(
+        self, medicine_obj: medicine.Medicine, previous: int, quantity: int
+    ):
+        point = self.reorder_point(medicine_obj.identifier)
+        with self._lock:
+            if quantity > point:
+                self._on_order.discard(medicine_obj.identifier)
+            elif previous > point and medicine_obj.identifier not in self._on_order:
+                self._pending[medicine_obj.identifier] = medicine_obj
+                self._wakeup.set()
+            if self.inventory_obj.valuation_check_due():
+                self._revalue = True
+                self._wakeup.set()
+
+    def order_quantity(self, medicine_obj: medicine.Medicine, now: float = None) -> int:
+        if now is None:
+            now = time.time()
+        sold = self.sales_obj.get_quantity_sold(
+            medicine_obj.identifier, now - self.window_days * 86400, now
+        )
+        velocity = sold / self.window_days
+        target = self.reorder_point(medicine_obj.identifier) + math.ceil(
+            velocity * self.lead_time_days
+        )
+        stock = self.inventory_obj.inventory.get(medicine_obj, 0)
+        return max(target - stock, 1)
+
+    def run_once(self, now: float = None) -> dict[str, list[str]]:
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._wakeup.clear()
+            revalue = self._revalue
+            self._revalue = False
+        if revalue:
+            self.inventory_obj.check_stock_valuation()
+        by_vendor = {}
+        for medicine_obj in pending.values():
+            vendor_medicines = by_vendor.setdefault(
+                medicine_obj.vendor.vendor_id, (medicine_obj.vendor, [])
+            )
+            vendor_medicines[1].append(medicine_obj)
+        placed = {}
+        failed = []
+        for vendor_id, (vendor_obj, medicines) in by_vendor.items():
+            try:
+                placed[vendor_id] = vendor_obj.add_orders(
+                    self._orders(medicines, now)
+                )
+            except Exception:
+                logger.exception("Replenishment for vendor %s failed", vendor_id)
+                failed.extend(medicines)
+                continue
+            with self._lock:
+                for medicine_obj in medicines:
+                    stock = self.inventory_obj.inventory.get(medicine_obj, 0)
+                    if stock <= self.reorder_point(medicine_obj.identifier):
+                        self._on_order.add(medicine_obj.identifier)
+        with self._lock:
+            for medicine_obj in failed:
+                self._pending.setdefault(medicine_obj.identifier, medicine_obj)
+        return placed
+
+    def _orders(self, medicines: list[medicine.Medicine], now: float) -> list[dict]:
+        replenishment_id = new_ulid()
+        orders = []
+        for medicine_obj in medicines:
+            order = medicine_obj.toJson()
+            order["quantity"] = self.order_quantity(medicine_obj, now)
+            order["replenishment_id"] = replenishment_id
+            orders.append(order)
+        return orders
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="replenishment", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            if self._stopped.wait(COALESCE_SECONDS):
+                return
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Replenishment run failed")
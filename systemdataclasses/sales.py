@@ -1,49 +1,430 @@
 from __future__ import annotations
+from bisect import bisect_left
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING
+import threading
+import time
+from .fastjson import dumps, extend_object, join_array
+from .forecast import MAX_HISTORY_DAYS
+from .storage import MemoryStorage
+from .timeseries import SalesSeries, SeriesSnapshot
 
 if TYPE_CHECKING:
     import medicine  # noqa: F401
     import inventory  # noqa: F401
     import cart  # noqa: F401
+    import storage
+
+ROLLUP_GRANULARITIES = {"hourly": 3600, "daily": 86400}
+
+
+@dataclass(frozen=True, slots=True)
+class SaleLine:
+    identifier: str
+    name: str
+    quantity: int
+    unit_price: float
+    expiry_date: str
+    batch_number: str
+    batch_expiry_date: str
+    vendor_id: str
+    vendor_name: str
+
+    @classmethod
+    def from_medicine(cls, medicine_obj: medicine.Medicine, quantity: int):
+        return cls(
+            medicine_obj.identifier,
+            medicine_obj.name,
+            quantity,
+            medicine_obj.price,
+            medicine_obj.expiry_date,
+            medicine_obj.batch.batch_number,
+            medicine_obj.batch.expiry_date,
+            medicine_obj.vendor.vendor_id,
+            medicine_obj.vendor.name,
+        )
+
+    @property
+    def total_price(self) -> float:
+        return self.unit_price * self.quantity
+
+    def toJson(self):
+        return {
+            "name": self.name,
+            "identifier": self.identifier,
+            "batch": {
+                "batch_number": self.batch_number,
+                "expiry_date": self.batch_expiry_date,
+            },
+            "expiry_date": self.expiry_date,
+            "price": self.unit_price,
+            "vendor": {"vendor_id": self.vendor_id, "name": self.vendor_name},
+            "quantity": self.quantity,
+            "total_price": self.total_price,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class SaleRecord:
+    sale_id: int
+    timestamp: float
+    lines: tuple[SaleLine, ...]
+
+    @classmethod
+    def from_cart(cls, sale_id: int, cart_obj: cart.Cart, timestamp: float):
+        return cls(
+            sale_id,
+            timestamp,
+            tuple(
+                SaleLine.from_medicine(medicine_obj, quantity)
+                for medicine_obj, quantity in cart_obj.get_cart().items()
+            ),
+        )
+
+    @classmethod
+    def from_row(cls, row: dict):
+        return cls(
+            row["sale_id"],
+            row["timestamp"],
+            tuple(SaleLine(**line) for line in row["lines"]),
+        )
+
+    @property
+    def total(self) -> float:
+        return sum(line.total_price for line in self.lines)
+
+    def toJson(self):
+        return [line.toJson() for line in self.lines]
+
+    def toPageJson(self):
+        return {
+            "sale_id": self.sale_id,
+            "timestamp": self.timestamp,
+            "total": self.total,
+            "items": self.toJson(),
+        }
+
+
+class SaleLog:
+    def __init__(self, storage: storage.Storage):
+        self.storage = storage
+        self.offset = 0
+        self.records = []
+        self.timestamps = []
+
+    def __len__(self):
+        return self.offset + len(self.records)
+
+    def __getitem__(self, pos: int) -> SaleRecord:
+        if pos < 0:
+            pos += len(self)
+        if pos < 0 or pos >= len(self):
+            raise IndexError("Sale index out of range")
+        return self.range(pos, pos + 1)[0]
+
+    def __iter__(self):
+        return iter(self.range(0, len(self)))
+
+    def __reversed__(self):
+        return reversed(self.range(0, len(self)))
+
+    def append(self, record: SaleRecord, timestamp: float):
+        self.records.append(record)
+        self.timestamps.append(timestamp)
+
+    def restore(self, count: int):
+        self.offset = count
+        self.records = []
+        self.timestamps = []
+
+    def range(self, start: int, stop: int) -> list[SaleRecord]:
+        records = []
+        if start < self.offset:
+            records = [
+                SaleRecord.from_row(row)
+                for row in self.storage.load_sales(start, min(stop, self.offset))
+            ]
+        return records + self.records[
+            max(start - self.offset, 0) : max(stop - self.offset, 0)
+        ]
+
+    def bisect(self, timestamp: float) -> int:
+        pos = bisect_left(self.timestamps, timestamp)
+        if pos == 0 and self.offset > 0:
+            return self.storage.bisect_sales(timestamp, self.offset)
+        return self.offset + pos
 
 
 class Sales:
-    def __init__(self):
-        self.sales_list = []
+    def __init__(self, storage: storage.Storage = None):
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.sales_list = SaleLog(self.storage)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._last_timestamp = None
+        self._medicines = {}
+        self._latest_lines = {}
+        self._quantity_sold = {}
+        self._value_sold = {}
+        self._rollups = {granularity: {} for granularity in ROLLUP_GRANULARITIES}
+        self.series = SalesSeries()
+        self.storage.add_checkpoint("sales", self.checkpoint)
 
-    def add_sale(self, cart_obj: cart.Cart):
+    def add_sale(self, cart_obj: cart.Cart, timestamp: float = None) -> SaleRecord:
         if cart_obj is None:
             raise ValueError("Cart object cannot be None or not of type Cart.")
-        self.sales_list.append(cart_obj)
+        with self.storage.transaction(), self._lock:
+            timestamp = self._next_timestamp(timestamp)
+            record = SaleRecord.from_cart(len(self.sales_list), cart_obj, timestamp)
+            for medicine_obj in cart_obj.get_cart():
+                self._medicines[medicine_obj.identifier] = medicine_obj
+            self._append(record)
+            self.storage.save_sale(record)
+        return record
 
-    def get_sales_statistics(self):
-        quantity_data = {}
-        value_data = {}
-        mapping = {}
-
-        cart: cart.Cart
-        for cart in self.sales_list:
-            for medicine_obj, quantity in cart.get_cart().items():
-                if medicine_obj.identifier not in mapping:
-                    mapping.update({medicine_obj.identifier: medicine_obj})
-                if medicine_obj.identifier not in quantity_data:
-                    quantity_data.update({medicine_obj.identifier: 0})
-                    value_data.update({medicine_obj.identifier: 0})
-                quantity_data[medicine_obj.identifier] += quantity
-                value_data[medicine_obj.identifier] += medicine_obj.price * quantity
+    def add_sales(
+        self, carts: list[cart.Cart], timestamp: float = None
+    ) -> list[SaleRecord]:
+        if any(cart_obj is None for cart_obj in carts):
+            raise ValueError("Cart object cannot be None or not of type Cart.")
+        records = []
+        with self.storage.transaction(), self._lock:
+            timestamp = self._next_timestamp(timestamp)
+            for cart_obj in carts:
+                record = SaleRecord.from_cart(len(self.sales_list), cart_obj, timestamp)
+                for medicine_obj in cart_obj.get_cart():
+                    self._medicines[medicine_obj.identifier] = medicine_obj
+                self._append(record)
+                self.storage.save_sale(record)
+                records.append(record)
+        return records
+
+    def load(self, medicine_list_obj: medicine.MedicineList):
+        if len(self.sales_list) == 0:
+            state = self.storage.load_checkpoint("sales")
+            if state is not None:
+                self._restore(state, medicine_list_obj)
+        for row in self.storage.load_sales(len(self.sales_list)):
+            record = SaleRecord.from_row(row)
+            for line in record.lines:
+                medicine_obj = medicine_list_obj.find_medicine(line.identifier)
+                if medicine_obj is not None:
+                    self._medicines[line.identifier] = medicine_obj
+            self._append(record)
+
+    def checkpoint(self) -> dict:
+        with self._lock:
+            since = None
+            if self._last_timestamp is not None:
+                since = self._last_timestamp - MAX_HISTORY_DAYS * 86400
+            return {
+                "count": len(self.sales_list),
+                "last_timestamp": self._last_timestamp,
+                "latest_lines": {
+                    identifier: asdict(line)
+                    for identifier, line in self._latest_lines.items()
+                },
+                "quantity_sold": dict(self._quantity_sold),
+                "value_sold": dict(self._value_sold),
+                "rollups": {
+                    granularity: {
+                        str(bucket_start): {
+                            identifier: list(totals)
+                            for identifier, totals in bucket.items()
+                        }
+                        for bucket_start, bucket in buckets.items()
+                    }
+                    for granularity, buckets in self._rollups.items()
+                },
+                "series": self.series.snapshot().toJson(since),
+            }
+
+    def _restore(self, state: dict, medicine_list_obj: medicine.MedicineList):
+        self.sales_list.restore(state["count"])
+        self.version += state["count"]
+        self._last_timestamp = state["last_timestamp"]
+        self._latest_lines = {
+            identifier: SaleLine(**line)
+            for identifier, line in state["latest_lines"].items()
+        }
+        for identifier in self._latest_lines:
+            medicine_obj = medicine_list_obj.find_medicine(identifier)
+            if medicine_obj is not None:
+                self._medicines[identifier] = medicine_obj
+        self._quantity_sold = dict(state["quantity_sold"])
+        self._value_sold = dict(state["value_sold"])
+        self._rollups = {
+            granularity: {
+                int(bucket_start): bucket
+                for bucket_start, bucket in state["rollups"][granularity].items()
+            }
+            for granularity in ROLLUP_GRANULARITIES
+        }
+        self.series = SalesSeries.from_json(state["series"])
+
+    def _next_timestamp(self, timestamp: float = None) -> float:
+        if timestamp is None:
+            timestamp = time.time()
+        if self._last_timestamp is not None:
+            timestamp = max(timestamp, self._last_timestamp)
+        return timestamp
+
+    def _append(self, record: SaleRecord):
+        self._last_timestamp = self._next_timestamp(record.timestamp)
+        self.sales_list.append(record, self._last_timestamp)
+        self.version += 1
+        for line in record.lines:
+            self._latest_lines[line.identifier] = line
+            self._record_line(line, record.timestamp)
 
+    def _record_line(self, line: SaleLine, timestamp: float):
+        identifier = line.identifier
+        quantity = line.quantity
+        value = line.total_price
+        self._quantity_sold[identifier] = self._quantity_sold.get(identifier, 0) + quantity
+        self._value_sold[identifier] = self._value_sold.get(identifier, 0) + value
+        self.series.append(timestamp, identifier, quantity, value)
+        for granularity, width in ROLLUP_GRANULARITIES.items():
+            bucket = self._rollups[granularity].setdefault(
+                int(timestamp // width) * width, {}
+            )
+            totals = bucket.setdefault(identifier, [0, 0])
+            totals[0] += quantity
+            totals[1] += value
+
+    def _statistics_rows(self):
+        with self._lock:
+            return [
+                (
+                    line,
+                    self._medicines.get(identifier),
+                    self._quantity_sold[identifier],
+                    self._value_sold[identifier],
+                )
+                for identifier, line in self._latest_lines.items()
+            ]
+
+    def get_sales_statistics(self):
         result = []
-        for identifier in mapping:
-            medicine_data = mapping[identifier].toJson()
-            medicine_data["quantity_sold"] = quantity_data[identifier]
-            medicine_data["value_sold"] = value_data[identifier]
+        for line, medicine_obj, quantity_sold, value_sold in self._statistics_rows():
+            if medicine_obj is not None:
+                medicine_data = medicine_obj.toJson()
+            else:
+                medicine_data = line.toJson()
+                del medicine_data["quantity"], medicine_data["total_price"]
+            medicine_data["quantity_sold"] = quantity_sold
+            medicine_data["value_sold"] = value_sold
             result.append(medicine_data)
+        return result
+
+    def get_sales_statistics_bytes(self) -> bytes:
+        fragments = []
+        for line, medicine_obj, quantity_sold, value_sold in self._statistics_rows():
+            if medicine_obj is not None:
+                fragment = medicine_obj.toJsonBytes()
+            else:
+                medicine_data = line.toJson()
+                del medicine_data["quantity"], medicine_data["total_price"]
+                fragment = dumps(medicine_data)
+            fragments.append(
+                extend_object(
+                    fragment, quantity_sold=quantity_sold, value_sold=value_sold
+                )
+            )
+        return join_array(fragments)
 
+    def series_snapshot(self) -> SeriesSnapshot:
+        with self._lock:
+            return self.series.snapshot()
+
+    def get_quantity_sold(self, identifier: str, start: float, end: float) -> int:
+        width = ROLLUP_GRANULARITIES["daily"]
+        buckets = self._rollups["daily"]
+        total = 0
+        with self._lock:
+            for bucket_start in range(int(start // width) * width, int(end), width):
+                totals = buckets.get(bucket_start, {}).get(identifier)
+                if totals is not None:
+                    total += totals[0]
+        return total
+
+    def get_sales_rollup(
+        self, granularity: str, start: float = None, end: float = None
+    ):
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise ValueError("Granularity must be one of: hourly, daily")
+        with self._lock:
+            buckets = [
+                (
+                    bucket_start,
+                    [
+                        (identifier, self._latest_lines[identifier].name, *totals)
+                        for identifier, totals in bucket.items()
+                    ],
+                )
+                for bucket_start, bucket in self._rollups[granularity].items()
+                if (start is None or bucket_start >= start)
+                and (end is None or bucket_start < end)
+            ]
+        result = []
+        for bucket_start, totals in sorted(buckets):
+            items = [
+                {
+                    "identifier": identifier,
+                    "name": name,
+                    "quantity_sold": quantity,
+                    "value_sold": value,
+                }
+                for identifier, name, quantity, value in totals
+            ]
+            result.append(
+                {
+                    "bucket_start": datetime.fromtimestamp(
+                        bucket_start, tz=timezone.utc
+                    ).isoformat(),
+                    "quantity_sold": sum(item["quantity_sold"] for item in items),
+                    "value_sold": sum(item["value_sold"] for item in items),
+                    "items": items,
+                }
+            )
         return result
 
-    def get_sales_history_json(self) -> list[cart.Cart]:
-        res = []
-        cart_obj: cart.Cart
-        for cart_obj in self.sales_list:
-            res.append(cart_obj.get_cart_json())
-        return res
+    def get_sales_history_json(self, newest_first: bool = False) -> list[list[dict]]:
+        records = self.sales_list.range(0, len(self.sales_list))
+        if newest_first:
+            records.reverse()
+        return [record.toJson() for record in records]
+
+    def get_sales_history_page(
+        self,
+        limit: int = None,
+        before: int = None,
+        start: float = None,
+        end: float = None,
+    ) -> tuple[list[SaleRecord], int]:
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be greater than 0")
+        stop = len(self.sales_list)
+        if before is not None:
+            stop = max(0, min(stop, before))
+        if end is not None:
+            stop = min(stop, self.sales_list.bisect(end))
+        lower = 0 if start is None else self.sales_list.bisect(start)
+        first = lower if limit is None else max(lower, stop - limit)
+        records = self.sales_list.range(first, stop)[::-1]
+        next_before = first if records and first > lower else None
+        return records, next_before
+
+    def get_sales_history_page_json(
+        self,
+        limit: int = None,
+        before: int = None,
+        start: float = None,
+        end: float = None,
+    ):
+        records, next_before = self.get_sales_history_page(limit, before, start, end)
+        return {
+            "items": [record.toPageJson() for record in records],
+            "next_before": next_before,
+        }
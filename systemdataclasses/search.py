@@ -0,0 +1,128 @@
+from bisect import bisect_left, insort
+from heapq import nlargest, nsmallest
+
+MAX_FUZZY_TOKENS = 50
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def trigrams(word: str) -> set[str]:
+    padded = "$$" + word
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SearchIndex:
+    def __init__(self):
+        self._docs = {}
+        self._postings = {}
+        self._vocab = []
+        self._grams = {}
+
+    def add(self, key: str, name: str, item):
+        self.remove(key)
+        text = normalize(name)
+        tokens = tuple(dict.fromkeys(text.split()))
+        self._docs[key] = (item, text, tokens)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._vocab, token)
+                for gram in trigrams(token):
+                    self._grams.setdefault(gram, set()).add(token)
+            postings[key] = None
+
+    def remove(self, key: str):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for token in doc[2]:
+            postings = self._postings[token]
+            del postings[key]
+            if postings:
+                continue
+            del self._postings[token]
+            del self._vocab[bisect_left(self._vocab, token)]
+            for gram in trigrams(token):
+                tokens = self._grams[gram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._grams[gram]
+
+    def search(self, query: str, limit: int = 10) -> list:
+        if limit <= 0:
+            raise ValueError("Limit must be greater than 0")
+        text = normalize(query)
+        if not text:
+            return []
+        words = text.split()
+        ranked = {}
+        for key in self._prefix_keys(words[0]):
+            _, name, tokens = self._docs[key]
+            if all(any(t.startswith(w) for t in tokens) for w in words[1:]):
+                if name == text:
+                    rank = 0
+                elif name.startswith(text):
+                    rank = 1
+                else:
+                    rank = 2
+                ranked[key] = (rank, 0)
+        if len(ranked) < limit:
+            for token, distance in self._fuzzy_tokens(words[-1]):
+                for key in self._postings[token]:
+                    if ranked.get(key, (4,)) <= (3, distance):
+                        continue
+                    tokens = self._docs[key][2]
+                    if all(any(t.startswith(w) for t in tokens) for w in words[:-1]):
+                        ranked[key] = (3, distance)
+        ordered = nsmallest(
+            limit,
+            ranked,
+            key=lambda key: (ranked[key], len(self._docs[key][1]), self._docs[key][1]),
+        )
+        return [self._docs[key][0] for key in ordered]
+
+    def _prefix_keys(self, prefix: str):
+        keys = {}
+        pos = bisect_left(self._vocab, prefix)
+        while pos < len(self._vocab) and self._vocab[pos].startswith(prefix):
+            keys.update(self._postings[self._vocab[pos]])
+            pos += 1
+        return keys
+
+    def _fuzzy_tokens(self, word: str):
+        max_distance = 1 if len(word) <= 5 else 2
+        counts = {}
+        for gram in trigrams(word):
+            for token in self._grams.get(gram, ()):
+                counts[token] = counts.get(token, 0) + 1
+        for token in nlargest(MAX_FUZZY_TOKENS, counts, key=counts.get):
+            distance = min(
+                bounded_edit_distance(word, token[:length], max_distance)
+                for length in (len(word) - 1, len(word), len(word) + 1)
+                if length > 0
+            )
+            if distance <= max_distance:
+                yield token, distance
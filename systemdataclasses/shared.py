@@ -0,0 +1,195 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from .batch import Batch
+from .medicine import Medicine
+from .vendor import Order, Vendor
+
+if TYPE_CHECKING:
+    import batch
+    import inventory
+    import medicine
+    import sales
+    import storage
+    import vendor
+
+CHANGES_RETAINED = 100000
+PRUNE_EVERY = 1000
+
+
+class RegistrySync:
+    def __init__(
+        self,
+        storage_obj: storage.SQLiteStorage,
+        batch_list: batch.BatchList,
+        vendor_list: vendor.VendorList,
+        medicine_list: medicine.MedicineList,
+        inventory_obj: inventory.Inventory,
+        sales_obj: sales.Sales,
+    ):
+        if not getattr(storage_obj, "shared", False):
+            raise ValueError("Registry sync needs a shared SQLite storage")
+        self.storage = storage_obj
+        self.batch_list = batch_list
+        self.vendor_list = vendor_list
+        self.medicine_list = medicine_list
+        self.inventory_obj = inventory_obj
+        self.sales_obj = sales_obj
+        self.seq = storage_obj.last_change()
+        self._data_version = storage_obj.data_version()
+        self._refreshes = 0
+
+    def attach(self):
+        self.storage.add_begin_hook(self.refresh)
+        self.storage.add_rollback_hook(self.resync)
+
+    def refresh(self) -> bool:
+        with self.storage.locked():
+            data_version = self.storage.data_version()
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+            seq, changed = self.storage.changes_since(self.seq)
+            if changed is None:
+                changed = self._everything()
+            self._apply(changed)
+            self.seq = seq
+            self._refreshes += 1
+            if self._refreshes % PRUNE_EVERY == 0:
+                self.storage.prune_changes(seq - CHANGES_RETAINED)
+            return True
+
+    def resync(self):
+        with self.storage.locked():
+            self._data_version = self.storage.data_version()
+            self.seq = self.storage.last_change()
+            changed = self._everything()
+            del changed["orders"]
+            self._apply(changed)
+            for vendor_obj in self.vendor_list.vendors.values():
+                vendor_obj.clear_orders()
+            for row in self.storage.load_orders():
+                vendor_obj = self.vendor_list.vendors.get(row["vendor_id"])
+                if vendor_obj is not None:
+                    vendor_obj.restore_order(Order.from_row(row))
+
+    def _everything(self) -> dict[str, set[str]]:
+        return {
+            "batches": set(self.batch_list.batches)
+            | {row["batch_number"] for row in self.storage.load_batches()},
+            "vendors": set(self.vendor_list.vendors)
+            | {row["vendor_id"] for row in self.storage.load_vendors()},
+            "medicines": set(self.medicine_list.medicines)
+            | {row["identifier"] for row in self.storage.load_medicines()},
+            "stock": {med.identifier for med in self.inventory_obj.inventory}
+            | {identifier for identifier, _ in self.storage.load_stock()},
+            "orders": set(self.vendor_list.order_index)
+            | {row["order_id"] for row in self.storage.load_orders()},
+            "sales": {"*"},
+        }
+
+    def _apply(self, changed: dict[str, set[str]]):
+        if "batches" in changed:
+            self._sync_batches(changed["batches"])
+        if "vendors" in changed:
+            self._sync_vendors(changed["vendors"])
+        if "medicines" in changed:
+            self._sync_medicines(changed["medicines"])
+        if "stock" in changed:
+            self._sync_stock(changed["stock"])
+        if "orders" in changed:
+            self._sync_orders(changed["orders"])
+        if "sales" in changed:
+            self.sales_obj.load(self.medicine_list)
+
+    def _sync_batches(self, keys: set[str]):
+        rows = self.storage.load_keys("batches", keys)
+        for batch_number in keys:
+            row = rows.get(batch_number)
+            batch_obj = self.batch_list.batches.get(batch_number)
+            if row is None:
+                self.batch_list._discard(batch_number)
+            elif batch_obj is not None:
+                _update(batch_obj, expiry_date=row["expiry_date"])
+            else:
+                self.batch_list._insert(Batch(row["batch_number"], row["expiry_date"]))
+
+    def _sync_vendors(self, keys: set[str]):
+        rows = self.storage.load_keys("vendors", keys)
+        for vendor_id in keys:
+            row = rows.get(vendor_id)
+            vendor_obj = self.vendor_list.vendors.get(vendor_id)
+            if row is None:
+                self.vendor_list._discard(vendor_id)
+            elif vendor_obj is not None:
+                _update(vendor_obj, name=row["name"], contact_info=row["contact_info"])
+            else:
+                self.vendor_list._insert(
+                    Vendor(
+                        row["vendor_id"],
+                        row["name"],
+                        row["contact_info"],
+                        self.inventory_obj,
+                        self.medicine_list,
+                    )
+                )
+
+    def _sync_medicines(self, keys: set[str]):
+        rows = self.storage.load_keys("medicines", keys)
+        for identifier in keys:
+            row = rows.get(identifier)
+            if row is None:
+                self.medicine_list._discard(identifier)
+                continue
+            batch_obj = self.batch_list.find_batch(row["batch_number"])
+            vendor_obj = self.vendor_list.vendors.get(row["vendor_id"])
+            if batch_obj is None or vendor_obj is None:
+                continue
+            medicine_obj = self.medicine_list.medicines.get(identifier)
+            if medicine_obj is not None:
+                _update(
+                    medicine_obj,
+                    name=row["name"],
+                    batch=batch_obj,
+                    expiry_date=row["expiry_date"],
+                    price=row["price"],
+                    vendor=vendor_obj,
+                )
+                continue
+            self.medicine_list._insert(
+                Medicine(
+                    row["name"],
+                    batch_obj,
+                    row["expiry_date"],
+                    row["price"],
+                    vendor_obj,
+                    identifier=identifier,
+                )
+            )
+
+    def _sync_stock(self, keys: set[str]):
+        rows = self.storage.load_keys("stock", keys)
+        medicines = self.medicine_list.find_medicines(keys)
+        for identifier, medicine_obj in medicines.items():
+            row = rows.get(identifier)
+            quantity = 0 if row is None else row["quantity"]
+            if self.inventory_obj.inventory.get(medicine_obj, 0) != quantity:
+                self.inventory_obj._set_quantity(medicine_obj, quantity, persist=False)
+
+    def _sync_orders(self, keys: set[str]):
+        rows = self.storage.load_keys("orders", keys)
+        for order_id in keys:
+            row = rows.get(order_id)
+            if row is None:
+                vendor_obj = self.vendor_list.order_index.get(order_id)
+                if vendor_obj is not None:
+                    vendor_obj.sync_order(order_id)
+                continue
+            vendor_obj = self.vendor_list.vendors.get(row["vendor_id"])
+            if vendor_obj is not None:
+                vendor_obj.sync_order(order_id, Order.from_row(row))
+
+
+def _update(obj, **fields):
+    for name, value in fields.items():
+        if getattr(obj, name) != value:
+            setattr(obj, name, value)
@@ -0,0 +1,54 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+
+_MAX_SEQ = float("inf")
+
+
+class SortedIndex:
+    def __init__(self):
+        self._entries = []
+        self._items = {}
+        self._keys = {}
+        self._seq = count()
+
+    def add(self, item, key):
+        self.discard(item)
+        seq = next(self._seq)
+        insort(self._entries, (key, seq))
+        self._items[seq] = item
+        self._keys[item] = (key, seq)
+
+    def discard(self, item):
+        entry = self._keys.pop(item, None)
+        if entry is None:
+            return
+        pos = bisect_left(self._entries, entry)
+        del self._entries[pos]
+        del self._items[entry[1]]
+
+    def key(self, item):
+        entry = self._keys.get(item)
+        return None if entry is None else entry[0]
+
+    def irange(self, lo=None, hi=None, include_hi=False, after=None):
+        start = 0 if lo is None else bisect_left(self._entries, (lo,))
+        if after is not None:
+            start = max(start, bisect_right(self._entries, tuple(after)))
+        if hi is None:
+            stop = len(self._entries)
+        elif include_hi:
+            stop = bisect_right(self._entries, (hi, _MAX_SEQ))
+        else:
+            stop = bisect_left(self._entries, (hi,))
+        for pos in range(start, stop):
+            key, seq = self._entries[pos]
+            yield key, seq, self._items[seq]
+
+    def values(self, lo=None, hi=None, include_hi=False):
+        return [item for _, _, item in self.irange(lo, hi, include_hi)]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        return item in self._keys
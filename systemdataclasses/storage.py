@@ -0,0 +1,902 @@
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import asdict
+from typing import TYPE_CHECKING
+import json
+import os
+import sqlite3
+import struct
+import threading
+
+if TYPE_CHECKING:
+    import batch
+    import medicine
+    import sales
+    import vendor
+
+
+def vendor_row(vendor_obj: vendor.Vendor) -> dict:
+    return {
+        "vendor_id": vendor_obj.vendor_id,
+        "name": vendor_obj.name,
+        "contact_info": vendor_obj.contact_info,
+    }
+
+
+def batch_row(batch_obj: batch.Batch) -> dict:
+    return {
+        "batch_number": batch_obj.batch_number,
+        "expiry_date": batch_obj.expiry_date,
+    }
+
+
+def medicine_row(medicine_obj: medicine.Medicine) -> dict:
+    return {
+        "identifier": medicine_obj.identifier,
+        "name": medicine_obj.name,
+        "batch_number": medicine_obj.batch.batch_number,
+        "expiry_date": medicine_obj.expiry_date,
+        "price": medicine_obj.price,
+        "vendor_id": medicine_obj.vendor.vendor_id,
+    }
+
+
+def order_row(vendor_id: str, order: vendor.Order) -> dict:
+    return {
+        "order_id": order.order_id,
+        "vendor_id": vendor_id,
+        "identifier": order.identifier,
+        "quantity": order.quantity,
+        "created_at": order.created_at,
+        "details": order.details.decode(),
+        "fulfilled_at": order.fulfilled_at,
+    }
+
+
+def order_sort_key(row: dict):
+    fulfilled_at = row["fulfilled_at"]
+    return (fulfilled_at is not None, fulfilled_at or 0.0, row["order_id"])
+
+
+def sale_row(record: sales.SaleRecord) -> dict:
+    return {
+        "sale_id": record.sale_id,
+        "timestamp": record.timestamp,
+        "lines": [asdict(line) for line in record.lines],
+    }
+
+
+class Storage:
+    def save_vendor(self, vendor_obj: vendor.Vendor):
+        raise NotImplementedError
+
+    def delete_vendor(self, vendor_id: str):
+        raise NotImplementedError
+
+    def load_vendors(self) -> list[dict]:
+        raise NotImplementedError
+
+    def save_batch(self, batch_obj: batch.Batch):
+        raise NotImplementedError
+
+    def delete_batch(self, batch_number: str):
+        raise NotImplementedError
+
+    def load_batches(self) -> list[dict]:
+        raise NotImplementedError
+
+    def save_medicine(self, medicine_obj: medicine.Medicine):
+        raise NotImplementedError
+
+    def delete_medicine(self, identifier: str):
+        raise NotImplementedError
+
+    def load_medicines(self) -> list[dict]:
+        raise NotImplementedError
+
+    def save_stock(self, identifier: str, quantity: int):
+        raise NotImplementedError
+
+    def load_stock(self) -> list[tuple[str, int]]:
+        raise NotImplementedError
+
+    def save_order(self, vendor_id: str, order: vendor.Order):
+        raise NotImplementedError
+
+    def delete_order(self, order_id: str):
+        raise NotImplementedError
+
+    def load_orders(self) -> list[dict]:
+        raise NotImplementedError
+
+    def save_sale(self, record: sales.SaleRecord):
+        raise NotImplementedError
+
+    def load_sales(self, start: int = 0, stop: int = None) -> list[dict]:
+        raise NotImplementedError
+
+    def bisect_sales(self, timestamp: float, hi: int) -> int:
+        raise NotImplementedError
+
+    def add_checkpoint(self, name: str, provider):
+        pass
+
+    def load_checkpoint(self, name: str) -> dict:
+        return None
+
+    @contextmanager
+    def transaction(self):
+        yield self
+
+    def close(self):
+        pass
+
+
+class MemoryStorage(Storage):
+    def __init__(self):
+        self.vendors = {}
+        self.batches = {}
+        self.medicines = {}
+        self.stock = {}
+        self.orders = {}
+        self.sales = []
+
+    def save_vendor(self, vendor_obj: vendor.Vendor):
+        self.vendors[vendor_obj.vendor_id] = vendor_obj
+
+    def delete_vendor(self, vendor_id: str):
+        self.vendors.pop(vendor_id, None)
+
+    def load_vendors(self) -> list[dict]:
+        return [vendor_row(vendor_obj) for vendor_obj in self.vendors.values()]
+
+    def save_batch(self, batch_obj: batch.Batch):
+        self.batches[batch_obj.batch_number] = batch_obj
+
+    def delete_batch(self, batch_number: str):
+        self.batches.pop(batch_number, None)
+
+    def load_batches(self) -> list[dict]:
+        return [batch_row(batch_obj) for batch_obj in self.batches.values()]
+
+    def save_medicine(self, medicine_obj: medicine.Medicine):
+        self.medicines[medicine_obj.identifier] = medicine_obj
+
+    def delete_medicine(self, identifier: str):
+        self.medicines.pop(identifier, None)
+
+    def load_medicines(self) -> list[dict]:
+        return [medicine_row(medicine_obj) for medicine_obj in self.medicines.values()]
+
+    def save_stock(self, identifier: str, quantity: int):
+        if quantity == 0:
+            self.stock.pop(identifier, None)
+        else:
+            self.stock[identifier] = quantity
+
+    def load_stock(self) -> list[tuple[str, int]]:
+        return list(self.stock.items())
+
+    def save_order(self, vendor_id: str, order: vendor.Order):
+        self.orders[order.order_id] = (vendor_id, order)
+
+    def delete_order(self, order_id: str):
+        self.orders.pop(order_id, None)
+
+    def load_orders(self) -> list[dict]:
+        rows = [order_row(vendor_id, order) for vendor_id, order in self.orders.values()]
+        return sorted(rows, key=order_sort_key)
+
+    def save_sale(self, record: sales.SaleRecord):
+        self.sales.append(record)
+
+    def load_sales(self, start: int = 0, stop: int = None) -> list[dict]:
+        return [sale_row(record) for record in self.sales[start:stop]]
+
+    def bisect_sales(self, timestamp: float, hi: int) -> int:
+        return bisect_left(self.sales, timestamp, hi=hi, key=lambda r: r.timestamp)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vendors (
+    vendor_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    contact_info TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_number TEXT PRIMARY KEY,
+    expiry_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS batches_expiry_date ON batches (expiry_date);
+CREATE TABLE IF NOT EXISTS medicines (
+    identifier TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    batch_number TEXT NOT NULL,
+    expiry_date TEXT NOT NULL,
+    price REAL NOT NULL,
+    vendor_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS medicines_name ON medicines (name);
+CREATE INDEX IF NOT EXISTS medicines_vendor_id ON medicines (vendor_id);
+CREATE INDEX IF NOT EXISTS medicines_batch_number ON medicines (batch_number);
+CREATE TABLE IF NOT EXISTS stock (
+    identifier TEXT PRIMARY KEY,
+    quantity INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stock_quantity ON stock (quantity);
+CREATE TABLE IF NOT EXISTS sales (
+    sale_id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    lines TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sales_timestamp ON sales (timestamp);
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    vendor_id TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    details TEXT NOT NULL,
+    fulfilled_at REAL
+);
+CREATE INDEX IF NOT EXISTS orders_vendor_id ON orders (vendor_id);
+"""
+
+_CHANGE_KEYS = {
+    "vendors": "vendor_id",
+    "batches": "batch_number",
+    "medicines": "identifier",
+    "stock": "identifier",
+    "orders": "order_id",
+    "sales": "sale_id",
+}
+_CHANGE_EVENTS = {"insert": "NEW", "update": "NEW", "delete": "OLD"}
+_CHANGES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tbl TEXT NOT NULL,
+    key TEXT NOT NULL
+);
+""" + "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS {table}_{event}_changes AFTER {event.upper()} ON {table}
+BEGIN
+    INSERT INTO changes (tbl, key) VALUES ('{table}', {row}.{key});
+END;
+"""
+    for table, key in _CHANGE_KEYS.items()
+    for event, row in _CHANGE_EVENTS.items()
+)
+_DROP_CHANGES = "".join(
+    f"DROP TRIGGER IF EXISTS {table}_{event}_changes;\n"
+    for table in _CHANGE_KEYS
+    for event in _CHANGE_EVENTS
+)
+
+_UPSERT_VENDOR = """
+INSERT INTO vendors (vendor_id, name, contact_info)
+VALUES (:vendor_id, :name, :contact_info)
+ON CONFLICT (vendor_id) DO UPDATE SET
+    name = excluded.name, contact_info = excluded.contact_info
+"""
+_UPSERT_BATCH = """
+INSERT INTO batches (batch_number, expiry_date)
+VALUES (:batch_number, :expiry_date)
+ON CONFLICT (batch_number) DO UPDATE SET expiry_date = excluded.expiry_date
+"""
+_UPSERT_MEDICINE = """
+INSERT INTO medicines (identifier, name, batch_number, expiry_date, price, vendor_id)
+VALUES (:identifier, :name, :batch_number, :expiry_date, :price, :vendor_id)
+ON CONFLICT (identifier) DO UPDATE SET
+    name = excluded.name,
+    batch_number = excluded.batch_number,
+    expiry_date = excluded.expiry_date,
+    price = excluded.price,
+    vendor_id = excluded.vendor_id
+"""
+_UPSERT_ORDER = """
+INSERT INTO orders
+    (order_id, vendor_id, identifier, quantity, created_at, details, fulfilled_at)
+VALUES
+    (:order_id, :vendor_id, :identifier, :quantity, :created_at, :details,
+     :fulfilled_at)
+ON CONFLICT (order_id) DO UPDATE SET fulfilled_at = excluded.fulfilled_at
+"""
+_UPSERT_STOCK = """
+INSERT INTO stock (identifier, quantity) VALUES (?, ?)
+ON CONFLICT (identifier) DO UPDATE SET quantity = excluded.quantity
+"""
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path: str, shared: bool = False):
+        if path is None or path == "":
+            raise ValueError("Database path cannot be None or empty")
+        self.path = path
+        self.shared = shared
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._begin_hooks = []
+        self._rollback_hooks = []
+        self._changes_at_begin = 0
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.executescript(_CHANGES_SCHEMA if shared else _DROP_CHANGES)
+
+    def add_begin_hook(self, hook):
+        self._begin_hooks.append(hook)
+
+    def add_rollback_hook(self, hook):
+        self._rollback_hooks.append(hook)
+
+    @contextmanager
+    def locked(self):
+        with self._lock:
+            yield self
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for hook in self._begin_hooks:
+                        hook()
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._changes_at_begin = self._conn.total_changes
+            self._depth += 1
+            try:
+                yield self
+            except BaseException as e:
+                self._depth -= 1
+                if self._depth == 0:
+                    wrote = self._conn.total_changes != self._changes_at_begin
+                    self._conn.execute("ROLLBACK")
+                    if wrote or isinstance(e, sqlite3.Error):
+                        for hook in self._rollback_hooks:
+                            hook()
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _query(self, sql: str, params=()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def save_vendor(self, vendor_obj: vendor.Vendor):
+        self._execute(_UPSERT_VENDOR, vendor_row(vendor_obj))
+
+    def delete_vendor(self, vendor_id: str):
+        self._execute("DELETE FROM vendors WHERE vendor_id = ?", (vendor_id,))
+
+    def load_vendors(self) -> list[dict]:
+        rows = self._query(
+            "SELECT vendor_id, name, contact_info FROM vendors ORDER BY rowid"
+        )
+        return [dict(row) for row in rows]
+
+    def save_batch(self, batch_obj: batch.Batch):
+        self._execute(_UPSERT_BATCH, batch_row(batch_obj))
+
+    def delete_batch(self, batch_number: str):
+        self._execute("DELETE FROM batches WHERE batch_number = ?", (batch_number,))
+
+    def load_batches(self) -> list[dict]:
+        rows = self._query(
+            "SELECT batch_number, expiry_date FROM batches ORDER BY rowid"
+        )
+        return [dict(row) for row in rows]
+
+    def save_medicine(self, medicine_obj: medicine.Medicine):
+        self._execute(_UPSERT_MEDICINE, medicine_row(medicine_obj))
+
+    def delete_medicine(self, identifier: str):
+        self._execute("DELETE FROM medicines WHERE identifier = ?", (identifier,))
+
+    def load_medicines(self) -> list[dict]:
+        rows = self._query(
+            "SELECT identifier, name, batch_number, expiry_date, price, vendor_id"
+            " FROM medicines ORDER BY rowid"
+        )
+        return [dict(row) for row in rows]
+
+    def save_stock(self, identifier: str, quantity: int):
+        if quantity == 0:
+            self._execute("DELETE FROM stock WHERE identifier = ?", (identifier,))
+        else:
+            self._execute(_UPSERT_STOCK, (identifier, quantity))
+
+    def load_stock(self) -> list[tuple[str, int]]:
+        rows = self._query("SELECT identifier, quantity FROM stock ORDER BY rowid")
+        return [(row["identifier"], row["quantity"]) for row in rows]
+
+    def save_order(self, vendor_id: str, order: vendor.Order):
+        self._execute(_UPSERT_ORDER, order_row(vendor_id, order))
+
+    def delete_order(self, order_id: str):
+        self._execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
+
+    def load_orders(self) -> list[dict]:
+        rows = self._query(
+            "SELECT order_id, vendor_id, identifier, quantity, created_at, details,"
+            " fulfilled_at FROM orders"
+            " ORDER BY fulfilled_at IS NOT NULL, fulfilled_at, order_id"
+        )
+        return [dict(row) for row in rows]
+
+    def save_sale(self, record: sales.SaleRecord):
+        row = sale_row(record)
+        self._execute(
+            "INSERT INTO sales (sale_id, timestamp, lines) VALUES (?, ?, ?)",
+            (row["sale_id"], row["timestamp"], json.dumps(row["lines"])),
+        )
+
+    def load_sales(self, start: int = 0, stop: int = None) -> list[dict]:
+        if stop is None:
+            stop = -1
+        rows = self._query(
+            "SELECT sale_id, timestamp, lines FROM sales"
+            " WHERE sale_id >= ? AND (? < 0 OR sale_id < ?) ORDER BY sale_id",
+            (start, stop, stop),
+        )
+        return [
+            {
+                "sale_id": row["sale_id"],
+                "timestamp": row["timestamp"],
+                "lines": json.loads(row["lines"]),
+            }
+            for row in rows
+        ]
+
+    def bisect_sales(self, timestamp: float, hi: int) -> int:
+        return self._query(
+            "SELECT COUNT(*) FROM sales WHERE sale_id < ? AND timestamp < ?",
+            (hi, timestamp),
+        )[0][0]
+
+    def data_version(self) -> int:
+        return self._query("PRAGMA data_version")[0][0]
+
+    def last_change(self) -> int:
+        return self._query("SELECT COALESCE(MAX(seq), 0) FROM changes")[0][0]
+
+    def changes_since(self, seq: int) -> tuple[int, dict[str, set[str]]]:
+        rows = self._query(
+            "SELECT seq, tbl, key FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+        )
+        if not rows:
+            return seq, {}
+        if rows[0]["seq"] > seq + 1:
+            return rows[-1]["seq"], None
+        changed = {}
+        for row in rows:
+            changed.setdefault(row["tbl"], set()).add(row["key"])
+        return rows[-1]["seq"], changed
+
+    def prune_changes(self, before: int):
+        self._execute("DELETE FROM changes WHERE seq < ?", (before,))
+
+    def load_keys(self, table: str, keys) -> dict:
+        if table not in _CHANGE_KEYS or table == "sales":
+            raise ValueError(f"Unknown table {table}.")
+        column = _CHANGE_KEYS[table]
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            rows = self._query(
+                f"SELECT * FROM {table} WHERE {column} IN"
+                f" ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in rows:
+                found[row[column]] = dict(row)
+        return found
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+SNAPSHOT_FILE = "snapshot.json"
+SALES_FILE = "sales.jsonl"
+SALES_INDEX_FILE = "sales.idx"
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+_SALES_INDEX = struct.Struct("<Qd")
+SNAPSHOT_EVERY = 10000
+TABLES = ("vendors", "batches", "medicines", "stock", "orders")
+
+
+class EventLogStorage(Storage):
+    def __init__(
+        self, directory: str, snapshot_every: int = SNAPSHOT_EVERY, fsync: bool = True
+    ):
+        if directory is None or directory == "":
+            raise ValueError("Event log directory cannot be None or empty")
+        if snapshot_every <= 0:
+            raise ValueError("Snapshot interval must be greater than 0")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.tables = {table: {} for table in TABLES}
+        self.sales = []
+        self.lsn = 0
+        self._sales_archived = 0
+        self._sales_bytes = 0
+        self._checkpoints = {}
+        self._checkpoint_providers = {}
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._pending = []
+        self._synced_lsn = 0
+        self._syncing = False
+        self._sync_cond = threading.Condition()
+        self._snapshot_lsn = 0
+        self._snapshot_thread = None
+        self._snapshot_lock = threading.Lock()
+        self._recover()
+        self._synced_lsn = self.lsn
+        segments = self._segments()
+        if segments:
+            self._file = open(segments[-1][1], "ab")
+        else:
+            self._file = self._open_segment(self.lsn + 1)
+        if self.lsn - self._snapshot_lsn >= self.snapshot_every:
+            self.snapshot()
+
+    def _recover(self):
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as stream:
+                snapshot = json.load(stream)
+            self.tables = {table: dict(snapshot["tables"][table]) for table in TABLES}
+            self.sales = list(snapshot.get("sales", ()))
+            self._sales_archived = snapshot.get("sales_archived", 0)
+            self._sales_bytes = snapshot.get("sales_bytes", 0)
+            self._checkpoints = snapshot.get("checkpoints", {})
+            self.lsn = self._snapshot_lsn = snapshot["lsn"]
+        self._trim_sales_archive()
+        for _, segment in self._segments():
+            self._replay(segment)
+
+    def _trim_sales_archive(self):
+        for name, size in (
+            (SALES_FILE, self._sales_bytes),
+            (SALES_INDEX_FILE, self._sales_archived * _SALES_INDEX.size),
+        ):
+            path = os.path.join(self.directory, name)
+            if not os.path.exists(path):
+                if size:
+                    raise ValueError(f"Sales archive {name} is missing.")
+                continue
+            if os.path.getsize(path) < size:
+                raise ValueError(f"Sales archive {name} is shorter than the snapshot.")
+            with open(path, "rb+") as stream:
+                stream.truncate(size)
+
+    def _replay(self, path: str):
+        with open(path, "rb+") as stream:
+            good = 0
+            for line in stream:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                good += len(line)
+                if record["lsn"] <= self.lsn:
+                    continue
+                if record["lsn"] != self.lsn + 1:
+                    raise ValueError(f"Event log is missing record {self.lsn + 1}.")
+                for event in record["events"]:
+                    self._apply(event)
+                self.lsn = record["lsn"]
+            stream.truncate(good)
+
+    def _segments(self) -> list[tuple[int, str]]:
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                start = int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+                segments.append((start, os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    def _open_segment(self, start: int):
+        name = f"{SEGMENT_PREFIX}{start:020d}{SEGMENT_SUFFIX}"
+        return open(os.path.join(self.directory, name), "ab")
+
+    def _apply(self, event: list):
+        op = event[0]
+        if op == "put":
+            self.tables[event[1]][event[2]] = event[3]
+        elif op == "del":
+            self.tables[event[1]].pop(event[2], None)
+        elif op == "sale":
+            self.sales.append(event[1])
+        else:
+            raise ValueError(f"Unknown event {op}.")
+
+    def _record(self, event: list):
+        with self._lock:
+            if self._depth > 0:
+                self._pending.append(event)
+                return
+            lsn = self._commit([event])
+        self._sync(lsn)
+
+    def _commit(self, events: list[list]) -> int:
+        self.lsn += 1
+        line = json.dumps(
+            {"lsn": self.lsn, "events": events}, separators=(",", ":")
+        ).encode()
+        self._file.write(line + b"\n")
+        for event in events:
+            self._apply(event)
+        return self.lsn
+
+    def _sync(self, lsn: int):
+        with self._sync_cond:
+            while self._synced_lsn < lsn and self._syncing:
+                self._sync_cond.wait()
+            if self._synced_lsn >= lsn:
+                return
+            self._syncing = True
+        try:
+            with self._lock:
+                target = self.lsn
+                self._file.flush()
+                fd = os.dup(self._file.fileno())
+            try:
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+        finally:
+            with self._sync_cond:
+                self._syncing = False
+                self._synced_lsn = max(self._synced_lsn, target)
+                self._sync_cond.notify_all()
+        if target - self._snapshot_lsn >= self.snapshot_every:
+            self._start_snapshot()
+
+    @contextmanager
+    def transaction(self):
+        self._lock.acquire()
+        lsn = None
+        try:
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pending = []
+                raise
+            self._depth -= 1
+            if self._depth == 0 and self._pending:
+                lsn = self._commit(self._pending)
+                self._pending = []
+        finally:
+            self._lock.release()
+        if lsn is not None:
+            self._sync(lsn)
+
+    def _start_snapshot(self):
+        with self._lock:
+            if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+                return
+            self._snapshot_thread = threading.Thread(
+                target=self.snapshot, name="eventlog-snapshot", daemon=True
+            )
+            self._snapshot_thread.start()
+
+    def add_checkpoint(self, name: str, provider):
+        with self._lock:
+            self._checkpoint_providers[name] = provider
+
+    def load_checkpoint(self, name: str) -> dict:
+        with self._lock:
+            return self._checkpoints.get(name)
+
+    def snapshot(self):
+        with self._snapshot_lock:
+            self._snapshot()
+
+    def _snapshot(self):
+        with self._lock:
+            lsn = self.lsn
+            for name, provider in self._checkpoint_providers.items():
+                self._checkpoints[name] = provider()
+            archived = self._sales_archived
+            sales = list(self.sales)
+            state = {
+                "lsn": lsn,
+                "tables": {table: dict(rows) for table, rows in self.tables.items()},
+                "checkpoints": dict(self._checkpoints),
+            }
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = self._open_segment(lsn + 1)
+        sales_bytes = self._archive_sales(sales, archived)
+        state["sales_archived"] = archived + len(sales)
+        state["sales_bytes"] = sales_bytes
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as stream:
+            json.dump(state, stream, separators=(",", ":"))
+            stream.flush()
+            if self.fsync:
+                os.fsync(stream.fileno())
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            del self.sales[: len(sales)]
+            self._sales_archived += len(sales)
+            self._sales_bytes = sales_bytes
+        self._snapshot_lsn = lsn
+        for start, segment in self._segments():
+            if start <= lsn:
+                os.remove(segment)
+
+    def _archive_sales(self, rows: list[dict], archived: int) -> int:
+        offset = self._sales_bytes
+        if not rows:
+            return offset
+        lines = []
+        entries = []
+        for row in rows:
+            line = json.dumps(row, separators=(",", ":")).encode() + b"\n"
+            entries.append(_SALES_INDEX.pack(offset, row["timestamp"]))
+            lines.append(line)
+            offset += len(line)
+        for name, chunk in ((SALES_FILE, lines), (SALES_INDEX_FILE, entries)):
+            with open(os.path.join(self.directory, name), "ab") as stream:
+                stream.write(b"".join(chunk))
+                stream.flush()
+                if self.fsync:
+                    os.fsync(stream.fileno())
+        return offset
+
+    def _read_archive(self, start: int, stop: int, archived: int, sales_bytes: int):
+        if start >= stop:
+            return []
+        with open(os.path.join(self.directory, SALES_INDEX_FILE), "rb") as stream:
+            stream.seek(start * _SALES_INDEX.size)
+            data = stream.read((min(stop + 1, archived) - start) * _SALES_INDEX.size)
+        offsets = [offset for offset, _ in _SALES_INDEX.iter_unpack(data)]
+        end = offsets[stop - start] if stop < archived else sales_bytes
+        with open(os.path.join(self.directory, SALES_FILE), "rb") as stream:
+            stream.seek(offsets[0])
+            chunk = stream.read(end - offsets[0])
+        return [json.loads(line) for line in chunk.splitlines()]
+
+    def _archived_timestamp(self, stream, pos: int) -> float:
+        stream.seek(pos * _SALES_INDEX.size)
+        return _SALES_INDEX.unpack(stream.read(_SALES_INDEX.size))[1]
+
+    def save_vendor(self, vendor_obj: vendor.Vendor):
+        self._record(["put", "vendors", vendor_obj.vendor_id, vendor_row(vendor_obj)])
+
+    def delete_vendor(self, vendor_id: str):
+        self._record(["del", "vendors", vendor_id])
+
+    def load_vendors(self) -> list[dict]:
+        with self._lock:
+            return list(self.tables["vendors"].values())
+
+    def save_batch(self, batch_obj: batch.Batch):
+        self._record(["put", "batches", batch_obj.batch_number, batch_row(batch_obj)])
+
+    def delete_batch(self, batch_number: str):
+        self._record(["del", "batches", batch_number])
+
+    def load_batches(self) -> list[dict]:
+        with self._lock:
+            return list(self.tables["batches"].values())
+
+    def save_medicine(self, medicine_obj: medicine.Medicine):
+        self._record(
+            ["put", "medicines", medicine_obj.identifier, medicine_row(medicine_obj)]
+        )
+
+    def delete_medicine(self, identifier: str):
+        self._record(["del", "medicines", identifier])
+
+    def load_medicines(self) -> list[dict]:
+        with self._lock:
+            return list(self.tables["medicines"].values())
+
+    def save_stock(self, identifier: str, quantity: int):
+        if quantity == 0:
+            self._record(["del", "stock", identifier])
+        else:
+            self._record(["put", "stock", identifier, quantity])
+
+    def load_stock(self) -> list[tuple[str, int]]:
+        with self._lock:
+            return list(self.tables["stock"].items())
+
+    def save_order(self, vendor_id: str, order: vendor.Order):
+        self._record(["put", "orders", order.order_id, order_row(vendor_id, order)])
+
+    def delete_order(self, order_id: str):
+        self._record(["del", "orders", order_id])
+
+    def load_orders(self) -> list[dict]:
+        with self._lock:
+            return sorted(self.tables["orders"].values(), key=order_sort_key)
+
+    def save_sale(self, record: sales.SaleRecord):
+        self._record(["sale", sale_row(record)])
+
+    def load_sales(self, start: int = 0, stop: int = None) -> list[dict]:
+        with self._lock:
+            archived = self._sales_archived
+            sales_bytes = self._sales_bytes
+            total = archived + len(self.sales)
+            stop = total if stop is None else min(stop, total)
+            recent = self.sales[max(start - archived, 0) : max(stop - archived, 0)]
+        return (
+            self._read_archive(start, min(stop, archived), archived, sales_bytes)
+            + recent
+        )
+
+    def bisect_sales(self, timestamp: float, hi: int) -> int:
+        with self._lock:
+            archived = self._sales_archived
+            if hi > archived:
+                pos = bisect_left(
+                    self.sales,
+                    timestamp,
+                    hi=hi - archived,
+                    key=lambda row: row["timestamp"],
+                )
+                if pos > 0 or archived == 0:
+                    return archived + pos
+        lo, hi = 0, min(hi, archived)
+        with open(os.path.join(self.directory, SALES_INDEX_FILE), "rb") as stream:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._archived_timestamp(stream, mid) < timestamp:
+                    lo = mid + 1
+                else:
+                    hi = mid
+        return lo
+
+    def close(self):
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+
+
+def open_storage(path: str = None, shared: bool = False) -> Storage:
+    if path is None or path == "":
+        if shared:
+            raise ValueError("Shared mode needs a database path")
+        return MemoryStorage()
+    if path.endswith(os.sep) or os.path.isdir(path):
+        if shared:
+            raise ValueError("Shared mode needs an SQLite database")
+        return EventLogStorage(path)
+    return SQLiteStorage(path, shared=shared)
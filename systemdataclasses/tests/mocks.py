@@ -0,0 +1,25 @@
+from unittest.mock import Mock
+
+
+def make_medicine(
+    identifier,
+    expiry_date="2025-01-01",
+    name=None,
+    price=1.0,
+    vendor_id=None,
+    batch_number=None,
+    vendor=None,
+):
+    med = Mock()
+    med.identifier = identifier
+    med.name = identifier if name is None else name
+    med.price = price
+    med.batch.expiry_date = expiry_date
+    if batch_number is not None:
+        med.batch.batch_number = batch_number
+    if vendor is not None:
+        med.vendor = vendor
+    elif vendor_id is not None:
+        med.vendor.vendor_id = vendor_id
+    med.toJson.return_value = {"identifier": identifier, "price": price}
+    return med
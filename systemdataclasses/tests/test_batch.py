@@ -67,3 +67,37 @@ def test_to_json_returns_correct_format(sample_batch):
         "batch_number": "B123",
         "expiry_date": "2025-12-31"
     }
+
+
+def test_add_duplicate_batch(batch_list_with_one):
+    with pytest.raises(ValueError, match="already exists"):
+        batch_list_with_one.add_batch(Batch("B123", "2026-01-01"))
+
+
+def test_batches_keep_insertion_order(batch_list_with_one, sample_batch):
+    other = Batch("A001", "2026-01-01")
+    batch_list_with_one.add_batch(other)
+    assert batch_list_with_one.get_batches() == [sample_batch, other]
+    assert [b["batch_number"] for b in batch_list_with_one.toJson()] == ["B123", "A001"]
+
+
+def test_version_bumps_on_mutation(sample_batch):
+    bl = BatchList()
+    bl.add_batch(sample_batch)
+    assert bl.version == 1
+    bl.remove_batch("NON_EXISTENT")
+    assert bl.version == 1
+    bl.remove_batch("B123")
+    assert bl.version == 2
+
+
+def test_version_bumps_on_field_change(sample_batch):
+    bl = BatchList()
+    bl.add_batch(sample_batch)
+    version = bl.version
+    sample_batch.expiry_date = "2026-01-01"
+    assert bl.version == version + 1
+    bl.remove_batch("B123")
+    version = bl.version
+    sample_batch.expiry_date = "2027-01-01"
+    assert bl.version == version
@@ -0,0 +1,125 @@
+import io
+import pytest
+from ..batch import Batch, BatchList
+from ..bulkio import (
+    MEDICINE_FIELDS,
+    export_medicines,
+    import_batches,
+    import_medicines,
+    import_vendors,
+    read_rows,
+    write_rows,
+)
+from ..inventory import Inventory
+from ..medicine import MedicineList
+from ..vendor import Vendor, VendorList
+
+
+@pytest.fixture
+def registries():
+    inventory = Inventory()
+    medicine_list = MedicineList()
+    vendor_list = VendorList()
+    batch_list = BatchList()
+    vendor_list.add_vendor(Vendor("V001", "Acme", "123", inventory, medicine_list))
+    batch_list.add_batch(Batch("B001", "2025-01-01"))
+    return inventory, medicine_list, vendor_list, batch_list
+
+
+def test_read_rows_jsonl_reports_bad_lines():
+    stream = io.StringIO('{"a": 1}\n\nnot json\n[1]\n')
+    rows = list(read_rows(stream, "jsonl"))
+    assert rows[0] == (1, {"a": 1}, None)
+    assert rows[1][0] == 3 and rows[1][2].startswith("Invalid JSON")
+    assert rows[2] == (4, None, "Row must be a JSON object")
+
+
+def test_read_rows_invalid_format():
+    with pytest.raises(ValueError):
+        list(read_rows(io.StringIO(""), "xml"))
+
+
+def test_import_batches_csv(registries):
+    *_, batch_list = registries
+    stream = io.StringIO("batch_number,expiry_date\nB002,2026-01-01\nB001,2026-01-01\n")
+    summary = import_batches(read_rows(stream, "csv"), batch_list)
+    assert summary["imported"] == 1
+    assert summary["rejected"] == [
+        {"row": 3, "message": "Batch with this batch number already exists"}
+    ]
+    assert batch_list.find_batch("B002") is not None
+
+
+def test_import_vendors_jsonl(registries):
+    inventory, medicine_list, vendor_list, _ = registries
+    stream = io.StringIO('{"vendor_id": "V002", "name": "Globex", "contact_info": "9"}\n{"vendor_id": "V003"}\n')
+    summary = import_vendors(read_rows(stream, "jsonl"), vendor_list, inventory, medicine_list)
+    assert summary["imported"] == 1
+    assert summary["rejected"] == [{"row": 2, "message": "name is required"}]
+
+
+def test_import_medicines_resolves_references(registries):
+    _, medicine_list, vendor_list, batch_list = registries
+    stream = io.StringIO(
+        "name,batch_number,expiry_date,price,vendor_id\n"
+        "Aspirin,B001,2025-01-01,2.5,V001\n"
+        "Ibuprofen,B999,2025-01-01,2.5,V001\n"
+        "Paracetamol,B001,2025-01-01,free,V001\n"
+    )
+    summary = import_medicines(read_rows(stream, "csv"), medicine_list, batch_list, vendor_list)
+    assert summary["imported"] == 1
+    assert [r["message"] for r in summary["rejected"]] == [
+        "Batch not found",
+        "Price must be a number",
+    ]
+    med = medicine_list.find_by_name("aspirin")[0]
+    assert med.batch is batch_list.find_batch("B001")
+    assert med.price == 2.5
+
+
+def test_export_round_trip(registries):
+    _, medicine_list, vendor_list, batch_list = registries
+    stream = io.StringIO('{"name": "Aspirin", "batch_number": "B001", "expiry_date": "2025-01-01", "price": 2.5, "vendor_id": "V001"}\n')
+    import_medicines(read_rows(stream, "jsonl"), medicine_list, batch_list, vendor_list)
+
+    exported = "".join(write_rows(export_medicines(medicine_list), "csv", MEDICINE_FIELDS))
+    other = MedicineList()
+    summary = import_medicines(read_rows(io.StringIO(exported), "csv"), other, batch_list, vendor_list)
+    assert summary == {"imported": 1, "rejected": []}
+    assert other.get_medicines()[0].identifier == medicine_list.get_medicines()[0].identifier
+
+
+def test_import_vendors_rejects_non_string_fields(registries):
+    inventory, medicine_list, vendor_list, _ = registries
+    stream = io.StringIO(
+        '{"vendor_id": "V002", "name": 123, "contact_info": "9"}\n'
+        '{"vendor_id": "V003", "name": "Globex", "contact_info": "9"}\n'
+    )
+    summary = import_vendors(read_rows(stream, "jsonl"), vendor_list, inventory, medicine_list)
+    assert summary["imported"] == 1
+    assert summary["rejected"] == [{"row": 1, "message": "name must be a string"}]
+    assert vendor_list.find_vendor("V002") is None
+    assert vendor_list.storage.load_vendors()[-1]["vendor_id"] == "V003"
+
+
+def test_import_medicines_rejects_bad_names_and_prices(registries):
+    _, medicine_list, vendor_list, batch_list = registries
+    row = '"batch_number": "B001", "expiry_date": "2025-01-01", "vendor_id": "V001"'
+    stream = io.StringIO(
+        '{"name": 7, "price": 2.5, ' + row + "}\n"
+        '{"name": "Aspirin", "price": "nan", ' + row + "}\n"
+        '{"name": "Aspirin", "price": "inf", ' + row + "}\n"
+        '{"name": "Aspirin", "price": true, ' + row + "}\n"
+        '{"name": "Aspirin", "price": 2.5, "identifier": 5, ' + row + "}\n"
+        '{"name": "Aspirin", "price": 2.5, ' + row + "}\n"
+    )
+    summary = import_medicines(read_rows(stream, "jsonl"), medicine_list, batch_list, vendor_list)
+    assert summary["imported"] == 1
+    assert [r["message"] for r in summary["rejected"]] == [
+        "name must be a string",
+        "Price must be a finite number",
+        "Price must be a finite number",
+        "Price must be a number",
+        "identifier must be a string",
+    ]
+    assert [med.price for med in medicine_list.get_medicines()] == [2.5]
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import Mock
+from unittest.mock import MagicMock, Mock
 from ..cart import Cart
 
 
@@ -15,7 +15,7 @@ def mock_medicine():
 @pytest.fixture
 def cart_setup(mock_medicine):
     sales = Mock()
-    inventory = Mock()
+    inventory = MagicMock()
     cart = Cart(sales, inventory)
     return cart, mock_medicine, sales, inventory
 
@@ -82,23 +82,40 @@ def test_calculate_total(cart_setup):
 def test_generate_receipt_json(cart_setup):
     cart, med, sales, inventory = cart_setup
     cart.add_item(med, 2)
+    inventory.remove_medicines_fefo.return_value = {med: 2}
 
-    inventory.get_quantity.return_value = 5
     receipt = cart.generate_reciept_json()
 
     assert receipt["total"] == 20.0
     assert receipt["items"][0]["name"] == "Paracetamol"
-    inventory.remove_medicine.assert_called_once()
+    inventory.remove_medicines_fefo.assert_called_once_with({med: 2})
     sales.add_sale.assert_called_once_with(cart)
 
 
 def test_generate_receipt_insufficient_inventory(cart_setup):
-    cart, med, _, inventory = cart_setup
+    cart, med, sales, inventory = cart_setup
     cart.add_item(med, 2)
 
-    inventory.get_quantity.return_value = 1
+    inventory.remove_medicines_fefo.side_effect = ValueError(
+        "Not enough Paracetamol in inventory."
+    )
     with pytest.raises(ValueError, match="Not enough Paracetamol in inventory"):
         cart.generate_reciept_json()
+    sales.add_sale.assert_not_called()
+
+
+def test_generate_receipt_restocks_when_sale_fails(cart_setup):
+    cart, med, sales, inventory = cart_setup
+    cart.add_item(med, 2)
+    lot = Mock()
+    inventory.remove_medicines_fefo.return_value = {lot: 2}
+    sales.add_sale.side_effect = RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        cart.generate_reciept_json()
+    inventory.add_medicines.assert_called_once_with({lot: 2})
+    assert cart.get_cart() == {med: 2}
+    inventory.storage.transaction.return_value.__exit__.assert_called_once()
 
 
 def test_get_cart(cart_setup):
@@ -114,3 +131,48 @@ def test_get_cart_json(cart_setup):
     assert result[0]["name"] == "Paracetamol"
     assert result[0]["quantity"] == 2
     assert result[0]["total_price"] == 20.0
+
+
+def test_checkout_many(cart_setup):
+    cart, med, sales, inventory = cart_setup
+    other = Cart(sales, inventory)
+    cart.add_item(med, 1)
+    other.add_item(med, 4)
+    lot = Mock()
+    lot.name = "Paracetamol"
+    lot.price = 10.0
+    inventory.remove_medicines_fefo_bulk.return_value = [
+        ({lot: 1}, None),
+        ({}, "Not enough Paracetamol in inventory."),
+    ]
+
+    results = Cart.checkout_many([cart, other])
+
+    inventory.remove_medicines_fefo_bulk.assert_called_once_with([{med: 1}, {med: 4}])
+    sales.add_sales.assert_called_once_with([cart])
+    assert cart.get_cart() == {lot: 1}
+    assert results[0]["status"] == "ok"
+    assert results[0]["receipt"]["total"] == 10.0
+    assert results[1] == {"status": "error", "message": "Not enough Paracetamol in inventory."}
+
+
+def test_checkout_many_restocks_when_sales_fail(cart_setup):
+    cart, med, sales, inventory = cart_setup
+    other = Cart(sales, inventory)
+    cart.add_item(med, 1)
+    other.add_item(med, 2)
+    lot = Mock()
+    inventory.remove_medicines_fefo_bulk.return_value = [({lot: 1}, None), ({lot: 2}, None)]
+    sales.add_sales.side_effect = RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        Cart.checkout_many([cart, other])
+    inventory.add_medicines.assert_called_once_with({lot: 3})
+    assert cart.get_cart() == {med: 1}
+    assert other.get_cart() == {med: 2}
+
+
+def test_checkout_many_requires_shared_registries(cart_setup):
+    cart, *_ = cart_setup
+    with pytest.raises(ValueError, match="share the same"):
+        Cart.checkout_many([cart, Cart(Mock(), Mock())])
@@ -0,0 +1,57 @@
+import pytest
+from ..columnar import InventorySnapshot
+from ..inventory import Inventory
+from .mocks import make_medicine
+
+
+@pytest.fixture
+def rows():
+    a = make_medicine("a", "2024-01-10", price=2.0, vendor_id="V1", batch_number="B1")
+    b = make_medicine("b", "2024-02-20", price=1.0, vendor_id="V2", batch_number="B1")
+    c = make_medicine("c", "2023-12-01", price=4.0, vendor_id="V1", batch_number="B2")
+    return [(a, 5), (b, 20), (c, 1)]
+
+
+def test_group_sum_and_total(rows):
+    snapshot = InventorySnapshot(rows)
+    assert snapshot.total() == pytest.approx(34.0)
+    assert snapshot.group_sum("vendor") == {"V1": 14.0, "V2": 20.0}
+    assert snapshot.group_sum("batch", "quantity") == {"B1": 25.0, "B2": 1.0}
+    with pytest.raises(ValueError):
+        snapshot.group_sum("shelf")
+
+
+def test_masks_and_counts(rows):
+    snapshot = InventorySnapshot(rows)
+    low = snapshot.mask(max_quantity=10)
+    assert snapshot.group_count("batch", low) == {"B1": 1, "B2": 1}
+    assert snapshot.group_sum("vendor", mask=low) == {"V1": 14.0}
+    assert snapshot.mask(max_quantity=5).tolist() == [True, False, True]
+    expiring = snapshot.mask(expiring_before="2024-01-31")
+    assert snapshot.total("quantity", expiring) == 6
+
+
+def test_expiry_histogram(rows):
+    histogram = InventorySnapshot(rows).expiry_histogram(
+        "2024-01-01", bucket_days=30, buckets=2
+    )
+    assert histogram["expired"] == 1
+    assert [bucket["quantity"] for bucket in histogram["buckets"]] == [5, 20]
+    assert histogram["later"] == 0
+
+
+def test_to_json(rows):
+    columns = InventorySnapshot(rows).toJson()
+    assert columns["identifier"] == ["a", "b", "c"]
+    assert columns["vendor_id"] == ["V1", "V2", "V1"]
+    assert columns["expiry_date"][2] == "2023-12-01"
+
+
+def test_inventory_snapshot_rebuilt_on_version_change(rows):
+    inv = Inventory([med for med, _ in rows], [qty for _, qty in rows])
+    snapshot = inv.columnar_snapshot()
+    assert inv.columnar_snapshot() is snapshot
+    inv.add_medicine(rows[0][0], 1)
+    rebuilt = inv.columnar_snapshot()
+    assert rebuilt is not snapshot
+    assert rebuilt.total("quantity") == 27
@@ -0,0 +1,35 @@
+import json
+from ..fastjson import CachedJson, dumps, extend_object, join_array
+
+
+class Point(CachedJson):
+    _json_fields = ("x",)
+
+    def __init__(self, x):
+        self.x = x
+        self.builds = 0
+
+    def _build_json(self):
+        self.builds += 1
+        return {"x": self.x}
+
+
+def test_join_array():
+    assert json.loads(join_array([dumps({"a": 1}), dumps(2)])) == [{"a": 1}, 2]
+    assert join_array([]) == b"[]"
+
+
+def test_extend_object():
+    assert json.loads(extend_object(b'{"a":1}', b=2)) == {"a": 1, "b": 2}
+    assert json.loads(extend_object(b"{}", b=2)) == {"b": 2}
+
+
+def test_cached_json_builds_once_per_revision():
+    point = Point(1)
+    assert point.toJsonBytes() == b'{"x":1}'
+    point.toJson()
+    assert point.builds == 1
+    point.builds = 0
+    point.x = 2
+    assert point.toJson() == {"x": 2}
+    assert point.toJsonBytes() == b'{"x":2}'
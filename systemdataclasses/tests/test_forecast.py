@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from ..forecast import (
+    MAX_HORIZON_DAYS,
+    MAX_WINDOW_DAYS,
+    forecast,
+    rolling_mean,
+    rolling_std,
+    seasonal_forecast,
+)
+from ..timeseries import SalesSeries
+
+
+def test_rolling_mean_and_std():
+    matrix = np.array([[1.0, 2.0, 3.0, 4.0], [2.0, 2.0, 2.0, 2.0]])
+    np.testing.assert_allclose(rolling_mean(matrix, 2), [[1.5, 2.5, 3.5], [2, 2, 2]])
+    np.testing.assert_allclose(rolling_std(matrix, 2), [[0.5, 0.5, 0.5], [0, 0, 0]])
+    with pytest.raises(ValueError):
+        rolling_mean(matrix, 5)
+
+
+def test_seasonal_forecast_repeats_profile():
+    matrix = np.array([[9.0, 1.0, 3.0, 3.0, 5.0]])
+    np.testing.assert_allclose(seasonal_forecast(matrix, 2, 5), [[2, 4, 2, 4, 2]])
+
+
+def test_forecast_per_sku():
+    series = SalesSeries()
+    now = 86400 * 100 + 3600
+    for day in range(28):
+        series.append(now - day * 86400, "a", 2, 4.0)
+    series.append(now, "b", 7, 7.0)
+    rows = forecast(series.snapshot(), now, {"a": 10}, window_days=7, horizon_days=3)
+    a, b = rows
+    assert a["identifier"] == "a"
+    assert a["moving_average"] == pytest.approx(2.0)
+    assert a["std_dev"] == pytest.approx(0.0)
+    assert a["value_sold"] == pytest.approx(28.0)
+    assert a["days_of_cover"] == pytest.approx(5.0)
+    assert a["forecast"] == pytest.approx([2.0, 2.0, 2.0])
+    assert b["moving_average"] == pytest.approx(1.0)
+    assert b["previous_average"] == 0.0
+    assert b["days_of_cover"] == 0.0
+    assert b["stock"] == 0
+
+
+def test_forecast_without_sales():
+    assert forecast(SalesSeries().snapshot(), 0.0) == []
+    with pytest.raises(ValueError):
+        forecast(SalesSeries().snapshot(), 0.0, window_days=0)
+
+
+def test_forecast_bounds_window_and_horizon():
+    snapshot = SalesSeries().snapshot()
+    with pytest.raises(ValueError, match="Window"):
+        forecast(snapshot, 0.0, window_days=MAX_WINDOW_DAYS + 1)
+    with pytest.raises(ValueError, match="Horizon"):
+        forecast(snapshot, 0.0, horizon_days=MAX_HORIZON_DAYS + 1)
+    assert forecast(snapshot, 0.0, window_days=MAX_WINDOW_DAYS) == []
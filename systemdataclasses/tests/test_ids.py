@@ -0,0 +1,21 @@
+import time
+from ..ids import UlidGenerator, encode_ulid, ulid_timestamp
+
+
+def test_ulids_are_unique_and_sorted():
+    generator = UlidGenerator()
+    ids = [generator.new() for _ in range(10000)]
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(len(ulid) == 26 for ulid in ids)
+
+
+def test_ulid_timestamp():
+    before = time.time()
+    ulid = UlidGenerator().new()
+    assert before - 0.001 <= ulid_timestamp(ulid) <= time.time() + 0.001
+
+
+def test_encode_ulid():
+    assert encode_ulid(0) == "0" * 26
+    assert encode_ulid(31) == "0" * 25 + "Z"
@@ -1,16 +1,15 @@
 import pytest
 from unittest.mock import Mock
+from .. import inventory as inventory_module
+from ..batch import Batch
 from ..inventory import Inventory
+from ..medicine import Medicine
+from .mocks import make_medicine
 
 
 @pytest.fixture
 def mock_medicine():
-    med = Mock()
-    med.identifier = "med001"
-    med.price = 10.0
-    med.batch.expiry_date = "2024-01-01"
-    med.toJson.return_value = {"identifier": "med001", "price": 10.0}
-    return med
+    return make_medicine("med001", "2024-01-01", name="Med001", price=10.0)
 
 
 def test_inventory_init_valid(mock_medicine):
@@ -163,3 +162,313 @@ def test_expiry_toJson_invalid_date(mock_medicine):
     inv = Inventory([mock_medicine], [2])
     with pytest.raises(ValueError):
         inv.expiry_toJson("wrong-format")
+
+
+def test_track_batch_expiry_ordered_by_date():
+    late = make_medicine("late", "2024-06-01")
+    early = make_medicine("early", "2024-01-01")
+    fresh = make_medicine("fresh", "2026-01-01")
+    inv = Inventory([late, early, fresh], [1, 1, 1])
+    assert inv.track_batch_expiry("2025-01-01") == [
+        (early, "2024-01-01"),
+        (late, "2024-06-01"),
+    ]
+
+
+def test_track_batch_expiry_after_removal(mock_medicine):
+    inv = Inventory([mock_medicine], [2])
+    inv.remove_medicine(mock_medicine, 2)
+    assert inv.track_batch_expiry("2025-01-01") == []
+
+
+def test_get_expiring_within():
+    soon = make_medicine("soon", "2024-01-10")
+    edge = make_medicine("edge", "2024-01-31")
+    later = make_medicine("later", "2024-02-01")
+    past = make_medicine("past", "2023-12-31")
+    inv = Inventory([soon, edge, later, past], [1, 1, 1, 1])
+    assert inv.get_expiring_within("2024-01-01", 30) == [
+        (soon, "2024-01-10"),
+        (edge, "2024-01-31"),
+    ]
+
+
+def test_get_expiring_within_invalid(mock_medicine):
+    inv = Inventory([mock_medicine], [2])
+    with pytest.raises(ValueError):
+        inv.get_expiring_within("2024-01-01", -1)
+    with pytest.raises(ValueError):
+        inv.get_expiring_within("bad-date", 1)
+
+
+def test_threshold_alerts_lowest_first():
+    meds = [make_medicine(f"m{i}", "2025-01-01") for i in range(4)]
+    inv = Inventory(meds, [5, 1, 9, 3])
+    assert inv.get_threshold_alerts(5) == [(meds[1], 1), (meds[3], 3), (meds[0], 5)]
+
+
+def test_threshold_alerts_follow_updates():
+    meds = [make_medicine(f"m{i}", "2025-01-01") for i in range(2)]
+    inv = Inventory(meds, [10, 2])
+    inv.remove_medicine(meds[0], 9)
+    inv.add_medicine(meds[1], 10)
+    assert inv.get_threshold_alerts(5) == [(meds[0], 1)]
+
+
+def test_threshold_page_cursor():
+    meds = [make_medicine(f"m{i}", "2025-01-01") for i in range(5)]
+    inv = Inventory(meds, [1, 2, 3, 4, 50])
+    first, cursor = inv.threshold_page(10, limit=2)
+    assert first == [(meds[0], 1), (meds[1], 2)]
+    second, cursor = inv.threshold_page(10, limit=2, cursor=cursor)
+    assert second == [(meds[2], 3), (meds[3], 4)]
+    assert cursor is None
+
+
+def test_stock_page_cursor_is_identifier_keyed():
+    meds = [make_medicine(f"m{i}") for i in (3, 1, 4, 2)]
+    inv = Inventory(meds, [1, 2, 3, 4])
+    first, cursor = inv.stock_page(limit=2)
+    assert [med.identifier for med, _ in first] == ["m1", "m2"]
+    assert cursor == "m2"
+    inv.add_medicine(make_medicine("m0"), 1)
+    inv.remove_medicine(meds[0], 1)
+    second, cursor = inv.stock_page(limit=2, cursor=cursor)
+    assert second == [(meds[2], 3)]
+    assert cursor is None
+    with pytest.raises(ValueError):
+        inv.stock_page(limit=0)
+
+
+def test_threshold_page_invalid_cursor(mock_medicine):
+    inv = Inventory([mock_medicine], [1])
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        inv.threshold_page(2, limit=1, cursor="nope")
+
+
+def test_stock_valuation_tracks_mutations():
+    a = make_medicine("a", price=2.0, vendor_id="V1", batch_number="B1")
+    b = make_medicine("b", price=5.0, vendor_id="V2", batch_number="B1")
+    inv = Inventory([a], [10])
+    inv.add_medicine(b, 4)
+    inv.remove_medicine(a, 3)
+    assert inv.get_stock_valuation() == 34.0
+    assert inv.get_stock_valuation_by_vendor() == {"V1": 14.0, "V2": 20.0}
+    assert inv.get_stock_valuation_by_batch() == {"B1": 34.0}
+
+    inv.remove_medicine(b, 4)
+    assert inv.get_stock_valuation_by_vendor() == {"V1": 14.0}
+
+
+def test_check_stock_valuation_repairs_drift():
+    a = make_medicine("a", price=2.0, vendor_id="V1", batch_number="B1")
+    inv = Inventory([a], [10])
+    assert inv.check_stock_valuation()
+    a.price = 3.0
+    assert not inv.check_stock_valuation()
+    assert inv.get_stock_valuation() == 30.0
+    assert inv.get_stock_valuation_by_vendor() == {"V1": 30.0}
+    assert inv.valuation_drift == 1
+
+
+def test_valuation_check_is_due_after_interval(monkeypatch):
+    monkeypatch.setattr(inventory_module, "VALUATION_CHECK_INTERVAL", 2)
+    a = make_medicine("a", price=2.0, vendor_id="V1", batch_number="B1")
+    inv = Inventory([a], [10])
+    inv._valuation += 1.0
+    assert not inv.valuation_check_due()
+    inv.add_medicine(a, 1)
+    assert inv.valuation_check_due()
+    assert inv.valuation_drift == 0
+    assert not inv.check_stock_valuation()
+    assert inv.valuation_drift == 1
+    assert inv.get_stock_valuation() == 22.0
+    assert not inv.valuation_check_due()
+
+
+def test_price_change_restates_valuation_and_lots():
+    batch = Batch("B1", "2030-01-01")
+    vendor = Mock()
+    vendor.vendor_id = "V1"
+    a = Medicine("Aspirin", batch, "2030-01-01", 2.0, vendor)
+    b = Medicine("Aspirin", batch, "2030-01-01", 3.0, vendor)
+    inv = Inventory([a, b], [10, 5])
+    version = inv.version
+    a.price = 3.0
+    assert inv.version > version
+    assert inv.get_stock_valuation() == 45.0
+    assert inv.get_stock_valuation_by_vendor() == {"V1": 45.0}
+    assert dict(inv.lots_of(b)) == {a: 10, b: 5}
+    assert inv.check_stock_valuation()
+    assert inv.valuation_drift == 0
+
+    inv.remove_medicine(a, 10)
+    a.price = 4.0
+    assert inv.get_stock_valuation() == 15.0
+
+
+def test_remove_medicines_fefo_is_all_or_nothing():
+    a = make_medicine("a", "2025-01-01")
+    a.name = "A"
+    b = make_medicine("b", "2025-01-01")
+    b.name = "B"
+    inv = Inventory([a, b], [5, 1])
+    with pytest.raises(ValueError, match="Not enough B in inventory"):
+        inv.remove_medicines_fefo({a: 2, b: 3}, "2024-01-01")
+    assert inv.get_quantity(a) == 5
+    assert inv.get_quantity(b) == 1
+
+    inv.remove_medicines_fefo({a: 2, b: 1}, "2024-01-01")
+    assert inv.get_quantity(a) == 3
+    assert b not in inv.inventory
+
+
+def test_add_medicines_groups_by_sku():
+    a = make_medicine("a", "2025-01-01")
+    b = make_medicine("b", "2025-01-01")
+    inv = Inventory([a], [2])
+    inv.add_medicines({a: 3, b: 4})
+    assert inv.get_quantity(a) == 5
+    assert inv.get_quantity(b) == 4
+    assert inv.get_stock_valuation() == pytest.approx(9.0)
+    with pytest.raises(ValueError):
+        inv.add_medicines({a: 0})
+
+
+def test_remove_medicines_fefo_concurrent_no_oversell():
+    import threading
+
+    med = make_medicine("a", "2025-01-01")
+    inv = Inventory([med], [100])
+    failures = []
+
+    def checkout():
+        for _ in range(30):
+            try:
+                inv.remove_medicines_fefo({med: 1}, "2024-01-01")
+            except ValueError:
+                failures.append(1)
+
+    threads = [threading.Thread(target=checkout) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert med not in inv.inventory
+    assert len(failures) == 50
+    assert inv.get_stock_valuation() == 0.0
+
+
+def test_remove_medicines_fefo_bulk_reports_errors_per_cart():
+    a = make_medicine("a", "2025-01-01")
+    a.name = "A"
+    b = make_medicine("b", "2025-01-01")
+    b.name = "B"
+    inv = Inventory([a, b], [5, 2])
+    results = inv.remove_medicines_fefo_bulk(
+        [{a: 2, b: 1}, {b: 2}, {a: 3}, {a: 0}], "2024-01-01"
+    )
+    assert [error for _, error in results] == [
+        None,
+        "Not enough B in inventory.",
+        None,
+        "Quantity must be greater than 0",
+    ]
+    assert a not in inv.inventory
+    assert inv.get_quantity(b) == 1
+
+
+def test_version_bumps_on_mutation(mock_medicine):
+    inv = Inventory()
+    versions = [inv.version]
+    inv.add_medicine(mock_medicine, 3)
+    versions.append(inv.version)
+    inv.remove_medicines_fefo({mock_medicine: 1}, "2023-01-01")
+    versions.append(inv.version)
+    inv.get_quantity(mock_medicine)
+    inv.toJson()
+    versions.append(inv.version)
+    assert versions[0] < versions[1] < versions[2] == versions[3]
+
+
+def test_remove_medicines_fefo_allocates_earliest_lots_first():
+    late = make_medicine("late", "2025-06-01", name="Aspirin", vendor_id="V1")
+    early = make_medicine("early", "2025-01-01", name="Aspirin", vendor_id="V1")
+    middle = make_medicine("middle", "2025-03-01", name="aspirin ", vendor_id="V1")
+    other = make_medicine("other", "2024-01-01", name="Ibuprofen", vendor_id="V1")
+    inv = Inventory([late, early, middle, other], [5, 2, 3, 4])
+
+    assert inv.remove_medicines_fefo({late: 4}, "2023-12-01") == {early: 2, middle: 2}
+    assert early not in inv.inventory
+    assert inv.get_quantity(middle) == 1
+    assert inv.lots_of(late) == [(middle, 1), (late, 5)]
+
+    with pytest.raises(ValueError, match="Not enough Aspirin in inventory"):
+        inv.remove_medicines_fefo({late: 7}, "2023-12-01")
+    assert inv.lots_of(late) == [(middle, 1), (late, 5)]
+
+    assert inv.remove_medicines_fefo({middle: 6, other: 1}, "2023-12-01") == {
+        middle: 1,
+        late: 5,
+        other: 1,
+    }
+    assert inv.lots_of(late) == []
+
+
+def test_fefo_lots_survive_restock_and_compaction():
+    lots = [
+        make_medicine(f"m{i}", f"2025-01-{i + 1:02d}", name="Aspirin", vendor_id="V1")
+        for i in range(6)
+    ]
+    inv = Inventory(lots, [1] * 6)
+    inv.remove_medicines_fefo({lots[0]: 4}, "2024-12-01")
+    inv.add_medicine(lots[0], 3)
+    assert inv.lots_of(lots[0]) == [(lots[0], 3), (lots[4], 1), (lots[5], 1)]
+    assert len(inv._lots[("V1", "aspirin", 1.0)]) <= 2 * 3
+    assert inv.track_batch_expiry("2025-01-05") == [(lots[0], "2025-01-01")]
+
+
+def test_fefo_keeps_vendors_and_prices_apart():
+    scanned = make_medicine("scanned", "2030-01-01", name="Aspirin", vendor_id="V1")
+    other_vendor = make_medicine("v2", "2029-01-01", name="aspirin", vendor_id="V2")
+    pricier = make_medicine(
+        "pricey", "2029-01-01", name="Aspirin", price=25.0, vendor_id="V1"
+    )
+    inv = Inventory([scanned, other_vendor, pricier], [2, 5, 5])
+
+    assert inv.remove_medicines_fefo({scanned: 2}, "2026-01-01") == {scanned: 2}
+    with pytest.raises(ValueError, match="Not enough Aspirin in inventory"):
+        inv.remove_medicines_fefo({scanned: 1}, "2026-01-01")
+    assert inv.get_quantity(other_vendor) == 5
+    assert inv.get_quantity(pricier) == 5
+
+
+def test_fefo_skips_expired_lots():
+    expired = make_medicine("expired", "2020-01-01", name="Aspirin", vendor_id="V1")
+    fresh = make_medicine("fresh", "2030-01-01", name="Aspirin", vendor_id="V1")
+    inv = Inventory([expired, fresh], [5, 2])
+
+    assert inv.remove_medicines_fefo({expired: 2}, "2026-01-01") == {fresh: 2}
+    with pytest.raises(ValueError, match="Not enough Aspirin in inventory"):
+        inv.remove_medicines_fefo({expired: 1}, "2026-01-01")
+    assert inv.get_quantity(expired) == 5
+    assert inv.track_batch_expiry("2026-01-01") == [(expired, "2020-01-01")]
+
+
+def test_fefo_bulk_allocates_carts_in_order():
+    early = make_medicine("early", "2030-01-01", name="Aspirin", vendor_id="V1")
+    late = make_medicine("late", "2031-01-01", name="Aspirin", vendor_id="V1")
+    inv = Inventory([early, late], [2, 2])
+
+    results = inv.remove_medicines_fefo_bulk(
+        [{late: 1}, {late: 4}, {late: 2}, {late: 0}], "2026-01-01"
+    )
+
+    assert results == [
+        ({early: 1}, None),
+        ({}, "Not enough Aspirin in inventory."),
+        ({early: 1, late: 1}, None),
+        ({}, "Quantity must be greater than 0"),
+    ]
+    assert early not in inv.inventory
+    assert inv.get_quantity(late) == 1
@@ -81,6 +81,18 @@ def test_add_medicine_valid(sample_medicine):
     assert sample_medicine in med_list.get_medicines()
 
 
+def test_version_bumps_on_field_change(sample_medicine):
+    med_list = MedicineList()
+    med_list.add_medicine(sample_medicine)
+    version = med_list.version
+    sample_medicine.price = 45.0
+    assert med_list.version == version + 1
+    med_list.remove_medicine(sample_medicine.identifier)
+    version = med_list.version
+    sample_medicine.price = 50.0
+    assert med_list.version == version
+
+
 def test_add_medicine_invalid():
     med_list = MedicineList()
     with pytest.raises(ValueError):
@@ -112,3 +124,95 @@ def test_to_json(sample_medicine):
     result = med_list.toJson()
     assert isinstance(result, list)
     assert result[0]["name"] == "Cough Syrup"
+
+
+def test_add_medicine_duplicate(sample_medicine):
+    med_list = MedicineList()
+    med_list.add_medicine(sample_medicine)
+    with pytest.raises(ValueError, match="already exists"):
+        med_list.add_medicine(sample_medicine)
+
+
+def test_secondary_indexes(sample_batch, sample_vendor):
+    sample_batch.batch_number = "B001"
+    sample_vendor.vendor_id = "V001"
+    med = Medicine("Cough  Syrup", sample_batch, "2025-01-01", 40.0, sample_vendor)
+    med_list = MedicineList()
+    med_list.add_medicine(med)
+    assert med_list.find_by_name("cough syrup") == [med]
+    assert med_list.find_by_vendor("V001") == [med]
+    assert med_list.find_by_batch("B001") == [med]
+
+    med_list.remove_medicine(med.identifier)
+    assert med_list.find_by_name("cough syrup") == []
+    assert med_list.find_by_vendor("V001") == []
+    assert med_list.find_by_batch("B001") == []
+    assert med_list.find_medicine(med.identifier) is None
+
+
+def test_to_json_cache_invalidated_on_change():
+    from ..batch import Batch
+
+    batch = Batch("B001", "2025-01-01")
+    vendor = Mock()
+    vendor.toJson.return_value = {"vendor_id": "V001"}
+    med = Medicine("Aspirin", batch, "2025-01-01", 2.5, vendor)
+    first = med.toJson()
+    first["quantity"] = 3
+    assert "quantity" not in med.toJson()
+
+    med.price = 4.0
+    assert med.toJson()["price"] == 4.0
+    assert b'"price":4.0' in med.toJsonBytes()
+
+    batch.expiry_date = "2026-01-01"
+    assert med.toJson()["batch"]["expiry_date"] == "2026-01-01"
+
+
+def test_to_json_nested_copies_do_not_touch_cache():
+    from ..batch import Batch
+
+    batch = Batch("B001", "2025-01-01")
+    vendor = Mock()
+    vendor.toJson.return_value = {"vendor_id": "V001"}
+    med = Medicine("Aspirin", batch, "2025-01-01", 2.5, vendor)
+    data = med.toJson()
+    data["batch"]["expiry_date"] = "1999-01-01"
+    data["vendor"]["vendor_id"] = "X"
+    assert med.toJson()["batch"]["expiry_date"] == "2025-01-01"
+    assert med.toJson()["vendor"]["vendor_id"] == "V001"
+    assert b'"expiry_date":"2025-01-01"' in med.toJsonBytes()
+
+
+def test_query_uses_indexes():
+    def make(name, vendor_id, batch_number):
+        batch = Mock()
+        batch.batch_number = batch_number
+        vendor = Mock()
+        vendor.vendor_id = vendor_id
+        return Medicine(name, batch, "2025-01-01", 1.0, vendor)
+
+    aspirin = make("Aspirin", "V1", "B1")
+    aspirin_forte = make("Aspirin Forte", "V2", "B1")
+    ibuprofen = make("Ibuprofen", "V1", "B2")
+    med_list = MedicineList()
+    for med in (aspirin, aspirin_forte, ibuprofen):
+        med_list.add_medicine(med)
+
+    assert list(med_list.query()) == [aspirin, aspirin_forte, ibuprofen]
+    assert med_list.find_by_name_prefix("ASP") == [aspirin, aspirin_forte]
+    assert list(med_list.query(name_prefix="asp", vendor_id="V2")) == [aspirin_forte]
+    assert list(med_list.query(vendor_id="V1", batch_number="B2")) == [ibuprofen]
+    assert list(med_list.query(vendor_id="V9")) == []
+
+    med_list.remove_medicine(aspirin.identifier)
+    assert med_list.find_by_name_prefix("asp") == [aspirin_forte]
+
+
+def test_medicine_list_search(sample_batch, sample_vendor):
+    med_list = MedicineList()
+    med = Medicine("Paracetamol", sample_batch, "2025-01-01", 1.0, sample_vendor)
+    med_list.add_medicine(med)
+    assert med_list.search("parac") == [med]
+    med_list.remove_medicine(med.identifier)
+    assert med_list.search("parac") == []
@@ -0,0 +1,27 @@
+import pytest
+from ..paging import paginate, project
+
+
+def test_paginate_pages_through_items():
+    rows, cursor = paginate(iter(range(5)), limit=2)
+    assert rows == [0, 1] and cursor == "2"
+    rows, cursor = paginate(iter(range(5)), limit=2, cursor=cursor)
+    assert rows == [2, 3] and cursor == "4"
+    rows, cursor = paginate(iter(range(5)), limit=2, cursor=cursor)
+    assert rows == [4] and cursor is None
+
+
+def test_paginate_without_limit():
+    assert paginate(iter(range(3)), cursor="1") == ([1, 2], None)
+
+
+@pytest.mark.parametrize("limit, cursor", [(0, None), (1, "abc"), (1, "-1")])
+def test_paginate_invalid(limit, cursor):
+    with pytest.raises(ValueError):
+        paginate([], limit, cursor)
+
+
+def test_project():
+    row = {"a": 1, "b": 2}
+    assert project(row, ["a", "missing"]) == {"a": 1}
+    assert project(row, []) is row
@@ -0,0 +1,141 @@
+import time
+import pytest
+from unittest.mock import Mock
+from .. import inventory as inventory_module
+from ..inventory import Inventory
+from ..replenishment import ReplenishmentEngine
+from ..sales import Sales
+from .mocks import make_medicine
+
+
+@pytest.fixture
+def vendor():
+    vendor = Mock()
+    vendor.vendor_id = "V1"
+    vendor.add_orders.side_effect = lambda orders: [o["identifier"] for o in orders]
+    return vendor
+
+
+def test_crossing_reorder_point_queues_once(vendor):
+    med = make_medicine("a", vendor=vendor)
+    inv = Inventory([med], [10])
+    engine = ReplenishmentEngine(inv, Sales(), default_reorder_point=5)
+    inv.remove_medicine(med, 4)
+    assert engine._pending == {}
+    inv.remove_medicine(med, 2)
+    inv.remove_medicine(med, 1)
+    assert engine._pending == {"a": med}
+    assert engine.run_once() == {"V1": ["a"]}
+    inv.add_medicine(med, 1)
+    inv.remove_medicine(med, 1)
+    assert engine._pending == {}
+
+    inv.add_medicine(med, 10)
+    inv.remove_medicine(med, 10)
+    assert engine._pending == {"a": med}
+
+
+def test_run_once_checks_valuation_off_the_request_path(vendor, monkeypatch):
+    monkeypatch.setattr(inventory_module, "VALUATION_CHECK_INTERVAL", 2)
+    med = make_medicine("a", price=2.0, vendor=vendor)
+    inv = Inventory([med], [10])
+    engine = ReplenishmentEngine(inv, Sales(), default_reorder_point=5)
+    inv._valuation += 1.0
+    inv.add_medicine(med, 1)
+    assert inv.valuation_drift == 0
+    assert engine._wakeup.is_set()
+    engine.run_once()
+    assert inv.valuation_drift == 1
+    assert inv.get_stock_valuation() == 22.0
+    assert not inv.valuation_check_due()
+
+
+def test_run_once_batches_per_vendor(vendor):
+    a = make_medicine("a", vendor=vendor)
+    b = make_medicine("b", vendor=vendor)
+    inv = Inventory([a, b], [6, 10])
+    engine = ReplenishmentEngine(inv, Sales(), default_reorder_point=5)
+    engine.set_reorder_point("b", 8)
+    inv.remove_medicines_fefo({a: 3, b: 3}, "2024-01-01")
+    engine.run_once()
+    vendor.add_orders.assert_called_once()
+    orders = vendor.add_orders.call_args[0][0]
+    assert [(o["identifier"], o["quantity"]) for o in orders] == [("a", 2), ("b", 1)]
+    assert orders[0]["replenishment_id"] == orders[1]["replenishment_id"]
+
+
+def test_selling_out_places_an_order(vendor):
+    med = make_medicine("a", vendor=vendor)
+    inv = Inventory([med], [10])
+    engine = ReplenishmentEngine(inv, Sales(), default_reorder_point=5)
+    inv.remove_medicine(med, 10)
+    assert med not in inv.inventory
+    assert engine.run_once() == {"V1": ["a"]}
+    assert vendor.add_orders.call_args[0][0][0]["quantity"] == 5
+    inv.add_medicine(med, 1)
+    inv.remove_medicine(med, 1)
+    assert engine._pending == {}
+
+
+def test_failed_order_is_retried(vendor):
+    med = make_medicine("a", vendor=vendor)
+    inv = Inventory([med], [6])
+    engine = ReplenishmentEngine(inv, Sales(), default_reorder_point=5)
+    vendor.add_orders.side_effect = ValueError("vendor offline")
+    inv.remove_medicine(med, 6)
+    assert engine.run_once() == {}
+    assert engine._pending == {"a": med}
+    assert "a" not in engine._on_order
+
+    vendor.add_orders.side_effect = lambda orders: [o["identifier"] for o in orders]
+    assert engine.run_once() == {"V1": ["a"]}
+    assert "a" in engine._on_order
+
+
+def test_background_thread_survives_errors(vendor, monkeypatch):
+    monkeypatch.setattr("systemdataclasses.replenishment.COALESCE_SECONDS", 0.01)
+    engine = ReplenishmentEngine(Inventory(), Sales())
+    calls = []
+
+    def run_once():
+        engine._wakeup.clear()
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return {}
+
+    engine.run_once = run_once
+    engine.start()
+    try:
+        for expected in (1, 2):
+            engine._wakeup.set()
+            deadline = time.time() + 2
+            while len(calls) < expected and time.time() < deadline:
+                time.sleep(0.01)
+        assert len(calls) == 2
+        assert engine._thread.is_alive()
+    finally:
+        engine.stop()
+
+
+def test_order_quantity_uses_sales_velocity(vendor):
+    med = make_medicine("a", vendor=vendor)
+    sales = Sales()
+    sales.get_quantity_sold = Mock(return_value=28)
+    inv = Inventory([med], [3])
+    engine = ReplenishmentEngine(inv, sales, default_reorder_point=5)
+    assert engine.order_quantity(med, now=86400 * 30) == 5 + 14 - 3
+    sales.get_quantity_sold.assert_called_once_with("a", 86400 * 16, 86400 * 30)
+
+
+def test_invalid_reorder_point(vendor):
+    engine = ReplenishmentEngine(Inventory(), Sales())
+    with pytest.raises(ValueError):
+        engine.set_reorder_point("a", -1)
+
+
+def test_start_and_stop(vendor):
+    engine = ReplenishmentEngine(Inventory(), Sales())
+    engine.start()
+    engine.stop()
+    assert engine._thread is None
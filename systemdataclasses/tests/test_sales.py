@@ -1,6 +1,8 @@
+import threading
 import pytest
 from unittest.mock import Mock
-from ..sales import Sales
+from dataclasses import FrozenInstanceError
+from ..sales import Sales, SaleRecord
 
 
 @pytest.fixture
@@ -33,14 +35,17 @@ def mock_cart(mock_medicine):
 
 def test_sales_initialization():
     sales = Sales()
-    assert sales.sales_list == []
+    assert list(sales.sales_list) == []
 
 
 def test_add_sale_valid(mock_cart):
     sales = Sales()
-    sales.add_sale(mock_cart)
+    record = sales.add_sale(mock_cart)
     assert len(sales.sales_list) == 1
-    assert sales.sales_list[0] == mock_cart
+    assert sales.sales_list[0] is record
+    assert isinstance(record, SaleRecord)
+    assert record.lines[0].identifier == "amoxicillin_001"
+    assert record.total == 50.0
 
 
 def test_add_sale_invalid():
@@ -67,3 +72,159 @@ def test_get_sales_history_json(mock_cart):
     assert isinstance(history, list)
     assert history[0][0]["name"] == "Amoxicillin"
     assert history[0][0]["quantity"] == 2
+
+
+def test_get_sales_statistics_accumulates(mock_cart, mock_medicine):
+    sales = Sales()
+    sales.add_sale(mock_cart)
+    sales.add_sale(mock_cart)
+    stats = sales.get_sales_statistics()
+    assert len(stats) == 1
+    assert stats[0]["quantity_sold"] == 4
+    assert stats[0]["value_sold"] == 100.0
+
+
+def test_get_sales_rollup(mock_cart):
+    sales = Sales()
+    sales.add_sale(mock_cart, timestamp=3600 * 2 + 10)
+    sales.add_sale(mock_cart, timestamp=3600 * 2 + 20)
+    sales.add_sale(mock_cart, timestamp=86400 + 5)
+
+    hourly = sales.get_sales_rollup("hourly")
+    assert [bucket["quantity_sold"] for bucket in hourly] == [4, 2]
+    assert hourly[0]["bucket_start"] == "1970-01-01T02:00:00+00:00"
+    assert hourly[0]["items"][0]["identifier"] == "amoxicillin_001"
+
+    daily = sales.get_sales_rollup("daily", start=86400)
+    assert len(daily) == 1
+    assert daily[0]["value_sold"] == 50.0
+
+
+def test_get_quantity_sold(mock_cart):
+    sales = Sales()
+    sales.add_sale(mock_cart, timestamp=10)
+    sales.add_sale(mock_cart, timestamp=86400 + 5)
+    sales.add_sale(mock_cart, timestamp=86400 * 3)
+    assert sales.get_quantity_sold("amoxicillin_001", 0, 86400 * 3) == 4
+    assert sales.get_quantity_sold("amoxicillin_001", 86400, 86400 * 4) == 4
+    assert sales.get_quantity_sold("other", 0, 86400 * 4) == 0
+
+
+def test_get_sales_rollup_invalid_granularity():
+    sales = Sales()
+    with pytest.raises(ValueError, match="Granularity"):
+        sales.get_sales_rollup("weekly")
+
+
+def test_sale_record_is_frozen(mock_cart):
+    record = Sales().add_sale(mock_cart)
+    with pytest.raises(FrozenInstanceError):
+        record.timestamp = 0
+    assert not hasattr(record, "__dict__")
+
+
+def test_sale_history_keeps_price_at_sale_time(mock_cart, mock_medicine):
+    sales = Sales()
+    sales.add_sale(mock_cart)
+    mock_medicine.price = 99.0
+    history = sales.get_sales_history_json()
+    assert history[0][0]["price"] == 25.0
+    assert history[0][0]["total_price"] == 50.0
+    assert sales.get_sales_statistics()[0]["value_sold"] == 50.0
+
+
+def test_get_sales_history_newest_first(mock_cart):
+    sales = Sales()
+    first = sales.add_sale(mock_cart)
+    second = sales.add_sale(mock_cart)
+    assert sales.get_sales_history_json(newest_first=True) == [
+        second.toJson(),
+        first.toJson(),
+    ]
+
+
+def test_get_sales_history_page_cursor(mock_cart):
+    sales = Sales()
+    for ts in range(5):
+        sales.add_sale(mock_cart, timestamp=float(ts))
+
+    page, before = sales.get_sales_history_page(limit=2)
+    assert [record.sale_id for record in page] == [4, 3]
+    page, before = sales.get_sales_history_page(limit=2, before=before)
+    assert [record.sale_id for record in page] == [2, 1]
+    page, before = sales.get_sales_history_page(limit=2, before=before)
+    assert [record.sale_id for record in page] == [0]
+    assert before is None
+
+
+def test_get_sales_history_page_date_range(mock_cart):
+    sales = Sales()
+    for ts in range(10):
+        sales.add_sale(mock_cart, timestamp=float(ts))
+    page, before = sales.get_sales_history_page(start=3.0, end=6.0)
+    assert [record.sale_id for record in page] == [5, 4, 3]
+    assert before is None
+
+    data = sales.get_sales_history_page_json(limit=1, start=3.0, end=6.0)
+    assert data["items"][0]["sale_id"] == 5
+    assert data["next_before"] == 5
+
+
+def test_add_sales(mock_cart):
+    sales = Sales()
+    records = sales.add_sales([mock_cart, mock_cart], timestamp=10.0)
+    assert [record.sale_id for record in records] == [0, 1]
+    assert sales.get_sales_statistics()[0]["quantity_sold"] == 4
+
+
+def test_version_bumps_on_sale(mock_cart):
+    sales = Sales()
+    sales.add_sale(mock_cart)
+    sales.add_sales([mock_cart, mock_cart])
+    assert sales.version == 3
+
+
+def test_timestamps_stay_monotonic(mock_cart):
+    sales = Sales()
+    sales.add_sale(mock_cart, timestamp=100.0)
+    late = sales.add_sale(mock_cart, timestamp=50.0)
+    assert late.timestamp == 100.0
+    sales.add_sale(mock_cart, timestamp=200.0)
+    page, _ = sales.get_sales_history_page(start=100.0, end=150.0)
+    assert [record.sale_id for record in page] == [1, 0]
+
+
+def test_statistics_read_while_selling():
+    sales = Sales()
+    stop = threading.Event()
+    errors = []
+
+    def sell():
+        for pos in range(500):
+            med = Mock()
+            med.identifier = f"m{pos}"
+            med.name = f"M{pos}"
+            med.price = 1.0
+            med.toJson.return_value = {"identifier": med.identifier}
+            med.toJsonBytes.return_value = b"{}"
+            cart = Mock()
+            cart.get_cart.return_value = {med: 1}
+            sales.add_sale(cart, timestamp=pos * 3600.0)
+        stop.set()
+
+    def read():
+        try:
+            while not stop.is_set():
+                sales.get_sales_statistics()
+                sales.get_sales_statistics_bytes()
+                sales.get_sales_rollup("hourly")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=sell), threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(sales.get_sales_statistics()) == 500
@@ -0,0 +1,50 @@
+import pytest
+from ..search import SearchIndex, bounded_edit_distance
+
+
+@pytest.fixture
+def index():
+    idx = SearchIndex()
+    for key, name in [
+        ("1", "Paracetamol"),
+        ("2", "Paracetamol Extra"),
+        ("3", "Cough Syrup"),
+        ("4", "Extra Strength Aspirin"),
+        ("5", "Para"),
+    ]:
+        idx.add(key, name, name)
+    return idx
+
+
+def test_prefix_ranking(index):
+    assert index.search("para") == ["Para", "Paracetamol", "Paracetamol Extra"]
+
+
+def test_token_prefix_match(index):
+    assert index.search("asp") == ["Extra Strength Aspirin"]
+    assert index.search("extra para") == ["Paracetamol Extra"]
+
+
+def test_typo_tolerance(index):
+    assert index.search("paracetmol")[0] == "Paracetamol"
+    assert index.search("cogh") == ["Cough Syrup"]
+
+
+def test_remove(index):
+    index.remove("3")
+    assert index.search("cough") == []
+    index.add("1", "Ibuprofen", "Ibuprofen")
+    assert index.search("ibu") == ["Ibuprofen"]
+    assert "Paracetamol" not in index.search("paracetamol")
+
+
+def test_search_limit(index):
+    assert len(index.search("para", limit=1)) == 1
+    assert index.search("   ") == []
+    with pytest.raises(ValueError):
+        index.search("para", limit=0)
+
+
+def test_bounded_edit_distance():
+    assert bounded_edit_distance("kitten", "sitting", 3) == 3
+    assert bounded_edit_distance("kitten", "sitting", 1) == 2
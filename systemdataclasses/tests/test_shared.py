@@ -0,0 +1,174 @@
+import pytest
+from ..batch import Batch, BatchList
+from ..cart import Cart
+from ..inventory import Inventory
+from ..medicine import Medicine, MedicineList
+from ..sales import Sales
+from ..shared import RegistrySync
+from ..storage import MemoryStorage, SQLiteStorage
+from ..vendor import Vendor, VendorList
+
+
+def _worker(path):
+    store = SQLiteStorage(path, shared=True)
+    inventory = Inventory(storage=store)
+    medicine_list = MedicineList(storage=store)
+    vendor_list = VendorList(storage=store)
+    batch_list = BatchList(storage=store)
+    sales = Sales(storage=store)
+    sync = RegistrySync(store, batch_list, vendor_list, medicine_list, inventory, sales)
+    sync.attach()
+    batch_list.load()
+    vendor_list.load(inventory, medicine_list)
+    medicine_list.load(batch_list, vendor_list)
+    inventory.load(medicine_list)
+    sales.load(medicine_list)
+    return store, sync, inventory, medicine_list, vendor_list, batch_list, sales
+
+
+@pytest.fixture
+def workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first = _worker(path)
+    _, _, inventory, medicine_list, vendor_list, batch_list, _ = first
+    vendor = Vendor("V001", "Acme", "123", inventory, medicine_list)
+    vendor_list.add_vendor(vendor)
+    batch = Batch("B001", "2030-01-01")
+    batch_list.add_batch(batch)
+    med = Medicine("Aspirin", batch, "2030-01-01", 2.5, vendor)
+    medicine_list.add_medicine(med)
+    inventory.add_medicine(med, 10)
+    second = _worker(path)
+    yield first, second, med.identifier
+    first[0].close()
+    second[0].close()
+
+
+def test_stock_changes_propagate(workers):
+    first, second, identifier = workers
+    med_a = first[3].find_medicine(identifier)
+    med_b = second[3].find_medicine(identifier)
+    assert second[2].get_quantity(med_b) == 10
+
+    first[2].remove_medicine(med_a, 4)
+    assert second[2].get_quantity(med_b) == 10
+    assert second[1].refresh() is True
+    assert second[2].get_quantity(med_b) == 6
+    assert second[1].refresh() is False
+
+
+def test_writes_check_fresh_stock(workers):
+    first, second, identifier = workers
+    med_a = first[3].find_medicine(identifier)
+    med_b = second[3].find_medicine(identifier)
+    second[2].remove_medicines_fefo({med_b: 9})
+    with pytest.raises(ValueError, match="Not enough Aspirin"):
+        first[2].remove_medicines_fefo({med_a: 3})
+    assert first[2].get_quantity(med_a) == 1
+
+
+def test_sales_orders_and_catalog_propagate(workers):
+    first, second, identifier = workers
+    med_a = first[3].find_medicine(identifier)
+    cart = Cart(first[6], first[2])
+    cart.add_item(med_a, 2)
+    cart.generate_reciept_json()
+    order_id = first[4].find_vendor("V001").add_order(
+        {"identifier": identifier, "quantity": 5}
+    )
+    batch = Batch("B002", "2031-01-01")
+    first[5].add_batch(batch)
+    first[3].add_medicine(
+        Medicine("Ibuprofen", batch, "2031-01-01", 1.0, first[4].find_vendor("V001"))
+    )
+
+    second[1].refresh()
+    assert len(second[6].sales_list) == 1
+    assert second[6].add_sale(Cart(second[6], second[2])).sale_id == 1
+    assert [m.name for m in second[3].find_by_name_prefix("ibu")] == ["Ibuprofen"]
+    vendor_b = second[4].find_order_vendor(order_id)
+    assert vendor_b is second[4].find_vendor("V001")
+    vendor_b.fullfill_order(order_id)
+
+    first[1].refresh()
+    vendor_a = first[4].find_vendor("V001")
+    assert vendor_a.get_orders() == []
+    assert [o["order_id"] for o in vendor_a.get_fulfilled_orders()] == [order_id]
+    assert first[2].get_quantity(med_a) == 13
+    assert len(first[6].sales_list) == 2
+
+
+def test_concurrent_approvals_apply_once(workers):
+    first, second, identifier = workers
+    order_id = first[4].find_vendor("V001").add_order(
+        {"identifier": identifier, "quantity": 5}
+    )
+    second[1].refresh()
+    first[4].find_vendor("V001").fullfill_order(order_id)
+
+    with pytest.raises(ValueError, match="Order ID not found"):
+        second[4].find_vendor("V001").fullfill_order(order_id)
+    med_b = second[3].find_medicine(identifier)
+    assert second[2].get_quantity(med_b) == 15
+    assert second[0].load_stock() == [(identifier, 15)]
+    results = second[4].find_vendor("V001").process_orders([order_id], "approve")
+    assert results[0]["status"] == "error"
+
+
+def test_rollback_restores_registries(workers):
+    first, second, identifier = workers
+    vendor_a = first[4].find_vendor("V001")
+    order_id = vendor_a.add_order({"identifier": identifier, "quantity": 5})
+    med_a = first[3].find_medicine(identifier)
+    with pytest.raises(RuntimeError):
+        with first[0].transaction():
+            vendor_a.fullfill_order(order_id)
+            raise RuntimeError("boom")
+
+    vendor_a = first[4].find_vendor("V001")
+    assert first[2].get_quantity(med_a) == 10
+    assert [o["order_id"] for o in vendor_a.get_orders()] == [order_id]
+    assert vendor_a.get_fulfilled_orders() == []
+    assert first[4].find_order_vendor(order_id) is vendor_a
+    vendor_a.fullfill_order(order_id)
+    assert first[2].get_quantity(med_a) == 15
+
+
+def test_field_changes_propagate(workers):
+    first, second, identifier = workers
+    med_a = first[3].find_medicine(identifier)
+    med_b = second[3].find_medicine(identifier)
+    vendor_a = first[4].find_vendor("V001")
+    med_a.price = 4.0
+    med_a.name = "Aspirin Forte"
+    first[0].save_medicine(med_a)
+    vendor_a.name = "Acme Health"
+    first[0].save_vendor(vendor_a)
+    medicines_version = second[3].version
+    vendors_version = second[4].version
+
+    assert second[1].refresh() is True
+    assert second[3].find_medicine(identifier) is med_b
+    assert med_b.price == 4.0
+    assert second[3].version > medicines_version
+    assert second[4].version > vendors_version
+    assert second[3].find_by_name("aspirin forte") == [med_b]
+    assert second[3].find_by_name("aspirin") == []
+    assert second[2].get_stock_valuation() == 40.0
+    assert med_b.toJson()["vendor"]["name"] == "Acme Health"
+
+
+def test_full_resync_after_pruned_changes(workers):
+    first, second, identifier = workers
+    med_a = first[3].find_medicine(identifier)
+    first[2].remove_medicine(med_a, 1)
+    first[3].remove_medicine(identifier)
+    first[0].prune_changes(first[0].last_change() + 1)
+    first[2].add_medicine(med_a, 1)
+    second[1].refresh()
+    assert second[3].find_medicine(identifier) is None
+
+
+def test_requires_shared_storage():
+    with pytest.raises(ValueError):
+        RegistrySync(MemoryStorage(), None, None, None, None, None)
@@ -0,0 +1,313 @@
+import json
+import os
+import threading
+import time
+import pytest
+from ..batch import Batch, BatchList
+from ..cart import Cart
+from ..inventory import Inventory
+from ..medicine import Medicine, MedicineList
+from ..sales import Sales
+from ..storage import EventLogStorage, MemoryStorage, SQLiteStorage, open_storage
+from ..vendor import Vendor, VendorList
+
+
+@pytest.fixture(params=["memory", "sqlite", "eventlog"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryStorage()
+    elif request.param == "sqlite":
+        store = SQLiteStorage(str(tmp_path / "pharmacy.db"))
+    else:
+        store = EventLogStorage(str(tmp_path / "log"))
+    yield store
+    store.close()
+
+
+def _registries(storage):
+    inventory = Inventory(storage=storage)
+    medicine_list = MedicineList(storage=storage)
+    vendor_list = VendorList(storage=storage)
+    batch_list = BatchList(storage=storage)
+    sales = Sales(storage=storage)
+    return inventory, medicine_list, vendor_list, batch_list, sales
+
+
+def _load(storage):
+    inventory, medicine_list, vendor_list, batch_list, sales = _registries(storage)
+    batch_list.load()
+    vendor_list.load(inventory, medicine_list)
+    medicine_list.load(batch_list, vendor_list)
+    inventory.load(medicine_list)
+    sales.load(medicine_list)
+    return inventory, medicine_list, vendor_list, batch_list, sales
+
+
+def test_registries_round_trip(storage):
+    inventory, medicine_list, vendor_list, batch_list, sales = _registries(storage)
+    vendor = Vendor("V001", "Acme", "123", inventory, medicine_list)
+    vendor_list.add_vendor(vendor)
+    batch = Batch("B001", "2030-01-01")
+    batch_list.add_batch(batch)
+    med = Medicine("Aspirin", batch, "2030-01-01", 2.5, vendor)
+    medicine_list.add_medicine(med)
+    inventory.add_medicine(med, 10)
+    cart = Cart(sales, inventory)
+    cart.add_item(med, 4)
+    cart.generate_reciept_json()
+
+    inventory, medicine_list, vendor_list, batch_list, sales = _load(storage)
+    assert vendor_list.find_vendor("V001").name == "Acme"
+    assert batch_list.find_batch("B001").expiry_date == "2030-01-01"
+    loaded = medicine_list.find_medicine(med.identifier)
+    assert loaded.price == 2.5
+    assert loaded.vendor is vendor_list.find_vendor("V001")
+    assert inventory.get_quantity(loaded) == 6
+    assert inventory.get_stock_valuation() == 15.0
+    assert sales.get_sales_statistics()[0]["quantity_sold"] == 4
+    assert sales.get_sales_history_json()[0][0]["total_price"] == 10.0
+
+
+def test_removals_are_persisted(storage):
+    inventory, medicine_list, vendor_list, batch_list, _ = _registries(storage)
+    vendor = Vendor("V001", "Acme", "123", inventory, medicine_list)
+    vendor_list.add_vendor(vendor)
+    batch = Batch("B001", "2025-01-01")
+    batch_list.add_batch(batch)
+    med = Medicine("Aspirin", batch, "2025-01-01", 2.5, vendor)
+    medicine_list.add_medicine(med)
+    inventory.add_medicine(med, 3)
+    inventory.remove_medicine(med, 3)
+    medicine_list.remove_medicine(med.identifier)
+    batch_list.remove_batch("B001")
+    vendor_list.remove_vendor("V001")
+
+    assert storage.load_vendors() == []
+    assert storage.load_batches() == []
+    assert storage.load_medicines() == []
+    assert storage.load_stock() == []
+
+
+def test_orders_round_trip(storage):
+    inventory, medicine_list, vendor_list, batch_list, _ = _registries(storage)
+    vendor = Vendor("V001", "Acme", "123", inventory, medicine_list)
+    vendor_list.add_vendor(vendor)
+    batch = Batch("B001", "2025-01-01")
+    batch_list.add_batch(batch)
+    med = Medicine("Aspirin", batch, "2025-01-01", 2.5, vendor)
+    medicine_list.add_medicine(med)
+    fulfilled, denied, pending = [
+        vendor.add_order({"identifier": med.identifier, "quantity": qty})
+        for qty in (3, 4, 5)
+    ]
+    vendor.fullfill_order(fulfilled)
+    vendor.reject_order(denied)
+
+    _, _, vendor_list, _, _ = _load(storage)
+    loaded = vendor_list.find_vendor("V001")
+    assert [order["order_id"] for order in loaded.get_orders()] == [pending]
+    assert [order["order_id"] for order in loaded.get_fulfilled_orders()] == [fulfilled]
+    assert loaded.get_fulfilled_orders()[0]["fulfilled_at"] is not None
+    assert vendor_list.find_order_vendor(pending) is loaded
+    assert storage.load_stock() == [(med.identifier, 3)]
+
+
+def test_failed_sale_keeps_stock(storage, monkeypatch):
+    inventory, medicine_list, vendor_list, batch_list, sales = _registries(storage)
+    vendor = Vendor("V001", "Acme", "123", inventory, medicine_list)
+    vendor_list.add_vendor(vendor)
+    batch = Batch("B001", "2030-01-01")
+    batch_list.add_batch(batch)
+    med = Medicine("Aspirin", batch, "2030-01-01", 2.5, vendor)
+    medicine_list.add_medicine(med)
+    inventory.add_medicine(med, 10)
+
+    def fail(cart):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(sales, "add_sale", fail)
+    cart = Cart(sales, inventory)
+    cart.add_item(med, 4)
+    with pytest.raises(RuntimeError):
+        cart.generate_reciept_json()
+    assert inventory.get_quantity(med) == 10
+    assert dict(storage.load_stock()) == {med.identifier: 10}
+
+
+def test_open_storage(tmp_path):
+    assert isinstance(open_storage(None), MemoryStorage)
+    store = open_storage(str(tmp_path / "x.db"))
+    assert isinstance(store, SQLiteStorage)
+    store.close()
+    store = open_storage(str(tmp_path / "log") + os.sep)
+    assert isinstance(store, EventLogStorage)
+    store.close()
+
+
+def test_sqlite_transaction_rolls_back(tmp_path):
+    store = SQLiteStorage(str(tmp_path / "x.db"))
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.save_batch(Batch("B001", "2025-01-01"))
+            raise RuntimeError("boom")
+    assert store.load_batches() == []
+    store.close()
+
+
+def test_eventlog_replays_after_restart(tmp_path):
+    directory = str(tmp_path / "log")
+    store = EventLogStorage(directory)
+    store.save_batch(Batch("B001", "2025-01-01"))
+    store.save_stock("a", 3)
+    store.save_stock("b", 1)
+    store.save_stock("b", 0)
+    store.close()
+
+    store = EventLogStorage(directory)
+    assert store.load_batches() == [{"batch_number": "B001", "expiry_date": "2025-01-01"}]
+    assert store.load_stock() == [("a", 3)]
+    assert store.lsn == 4
+    store.close()
+
+
+def test_eventlog_snapshot_bounds_replay(tmp_path):
+    directory = str(tmp_path / "log")
+    store = EventLogStorage(directory, snapshot_every=5)
+    for qty in range(1, 13):
+        store.save_stock("a", qty)
+    store.close()
+    segments = [name for name in os.listdir(directory) if name.startswith("wal-")]
+    assert len(segments) <= 2
+
+    store = EventLogStorage(directory, snapshot_every=5)
+    assert store.load_stock() == [("a", 12)]
+    assert store.lsn == 12
+    assert store.lsn - store._snapshot_lsn < 5
+    store.close()
+
+
+def test_eventlog_ignores_torn_tail(tmp_path):
+    directory = str(tmp_path / "log")
+    store = EventLogStorage(directory)
+    store.save_stock("a", 1)
+    store.save_stock("a", 2)
+    store.close()
+    segment = os.path.join(directory, sorted(os.listdir(directory))[-1])
+    with open(segment, "ab") as stream:
+        stream.write(b'{"lsn":3,"events":[["put","stock","a",')
+
+    store = EventLogStorage(directory)
+    assert store.load_stock() == [("a", 2)]
+    store.save_stock("a", 7)
+    store.close()
+    store = EventLogStorage(directory)
+    assert store.load_stock() == [("a", 7)]
+    store.close()
+
+
+def test_eventlog_transaction_is_atomic(tmp_path):
+    store = EventLogStorage(str(tmp_path / "log"))
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.save_stock("a", 1)
+            raise RuntimeError("boom")
+    with store.transaction():
+        store.save_stock("a", 2)
+        with store.transaction():
+            store.save_stock("b", 3)
+    assert store.lsn == 1
+    assert store.load_stock() == [("a", 2), ("b", 3)]
+    store.close()
+
+
+def test_eventlog_group_commit(tmp_path, monkeypatch):
+    store = EventLogStorage(str(tmp_path / "log"))
+    syncs = []
+
+    def slow_fsync(fd):
+        syncs.append(fd)
+        time.sleep(0.005)
+
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+
+    def writer(pos):
+        for qty in range(1, 51):
+            store.save_stock(f"sku{pos}", qty)
+
+    threads = [threading.Thread(target=writer, args=(pos,)) for pos in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.lsn == 400
+    assert len(syncs) < 200
+    assert dict(store.load_stock()) == {f"sku{pos}": 50 for pos in range(8)}
+    store.close()
+
+
+def test_eventlog_restart_reuses_segment(tmp_path):
+    directory = str(tmp_path / "log")
+    for qty in range(1, 4):
+        store = EventLogStorage(directory)
+        store.save_stock("a", qty)
+        store.close()
+    segments = [name for name in os.listdir(directory) if name.startswith("wal-")]
+    assert len(segments) == 1
+
+    store = EventLogStorage(directory)
+    assert store.load_stock() == [("a", 3)]
+    assert store.lsn == 3
+    store.close()
+
+
+def test_eventlog_restores_sales_from_checkpoint(tmp_path, monkeypatch):
+    directory = str(tmp_path / "log")
+    store = EventLogStorage(directory)
+    inventory, medicine_list, vendor_list, batch_list, sales = _registries(store)
+    vendor = Vendor("V001", "Acme", "123", inventory, medicine_list)
+    vendor_list.add_vendor(vendor)
+    batch = Batch("B001", "2030-01-01")
+    batch_list.add_batch(batch)
+    med = Medicine("Aspirin", batch, "2030-01-01", 2.5, vendor)
+    medicine_list.add_medicine(med)
+    cart = Cart(sales, inventory)
+    cart.cart = {med: 2}
+    for day in range(5):
+        sales.add_sale(cart, timestamp=day * 86400.0)
+    store.snapshot()
+    sales.add_sale(cart, timestamp=5 * 86400.0)
+    store.close()
+    with open(os.path.join(directory, "snapshot.json"), encoding="utf-8") as stream:
+        assert "sales" not in json.load(stream)
+
+    appended = []
+    original = Sales._append
+
+    def counting_append(self, record):
+        appended.append(record)
+        original(self, record)
+
+    monkeypatch.setattr(Sales, "_append", counting_append)
+    store = EventLogStorage(directory)
+    inventory, medicine_list, vendor_list, batch_list, sales = _load(store)
+    assert [record.sale_id for record in appended] == [5]
+    assert len(sales.sales_list) == 6
+    assert sales.get_sales_statistics()[0]["quantity_sold"] == 12
+    assert sales.get_quantity_sold(med.identifier, 0, 6 * 86400) == 12
+    assert len(sales.series) == 6
+
+    page, next_before = sales.get_sales_history_page(limit=3)
+    assert [record.sale_id for record in page] == [5, 4, 3]
+    page, next_before = sales.get_sales_history_page(limit=3, before=next_before)
+    assert [record.sale_id for record in page] == [2, 1, 0]
+    assert next_before is None
+    page, _ = sales.get_sales_history_page(start=2 * 86400.0, end=5.5 * 86400)
+    assert [record.sale_id for record in page] == [5, 4, 3, 2]
+    assert len(sales.get_sales_history_json()) == 6
+
+    sales.add_sale(cart, timestamp=6 * 86400.0)
+    store.snapshot()
+    store.close()
+    store = EventLogStorage(directory)
+    assert [row["sale_id"] for row in store.load_sales(4)] == [4, 5, 6]
+    store.close()
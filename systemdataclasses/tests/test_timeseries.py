@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from ..timeseries import SalesSeries
+
+
+def test_append_grows_arrays():
+    series = SalesSeries(capacity=2)
+    for pos in range(5):
+        series.append(pos * 10.0, "a" if pos % 2 else "b", pos, pos * 2.5)
+    assert len(series) == 5
+    assert series.identifiers == ["b", "a"]
+    assert series.skus.tolist() == [0, 1, 0, 1, 0]
+    assert series.quantities.tolist() == [0, 1, 2, 3, 4]
+    assert series.values.tolist() == [0.0, 2.5, 5.0, 7.5, 10.0]
+
+
+def test_daily_matrix():
+    series = SalesSeries()
+    series.append(86400 + 5, "a", 2, 4.0)
+    series.append(86400 + 50, "a", 3, 6.0)
+    series.append(86400 * 2, "b", 1, 1.0)
+    series.append(86400 * 9, "b", 7, 7.0)
+    matrix = series.daily_matrix(86400, 3)
+    np.testing.assert_array_equal(matrix, [[5, 0, 0], [0, 1, 0]])
+    values = series.daily_matrix(86400, 3, field="values")
+    np.testing.assert_array_equal(values, [[10.0, 0, 0], [0, 1.0, 0]])
+    with pytest.raises(ValueError):
+        series.daily_matrix(0, 0)
+
+
+def test_snapshot_is_stable_while_appending():
+    series = SalesSeries(capacity=2)
+    series.append(86400.0, "a", 1, 1.0)
+    snapshot = series.snapshot()
+    for pos in range(5):
+        series.append(86400.0, f"sku{pos}", 2, 2.0)
+    assert len(snapshot) == 1
+    assert snapshot.identifiers == ["a"]
+    np.testing.assert_array_equal(snapshot.daily_matrix(86400, 1), [[1.0]])
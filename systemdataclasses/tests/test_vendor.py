@@ -1,3 +1,4 @@
+import threading
 import pytest
 from unittest.mock import Mock
 from ..vendor import Vendor, VendorList 
@@ -44,7 +45,8 @@ def test_fulfill_order_success(sample_vendor):
 
     sample_vendor.fullfill_order(order_id)
 
-    assert order_id in sample_vendor.orders_fulfilled
+    fulfilled = sample_vendor.get_fulfilled_orders()
+    assert [order["order_id"] for order in fulfilled] == [order_id]
     assert order_id not in sample_vendor.orders
     sample_vendor.inventory_obj.add_medicine.assert_called_once_with(medicine_mock, 5)
 
@@ -99,6 +101,7 @@ def test_vendorlist_add_and_find():
     vendor_list = VendorList()
     vendor = Mock(spec=Vendor)
     vendor.vendor_id = "V003"
+    vendor.name = "Vendor V003"
     vendor_list.add_vendor(vendor)
     assert vendor_list.find_vendor("V003") == vendor
 
@@ -107,6 +110,7 @@ def test_vendorlist_remove():
     vendor_list = VendorList()
     vendor = Mock(spec=Vendor)
     vendor.vendor_id = "V004"
+    vendor.name = "Vendor V004"
     vendor_list.add_vendor(vendor)
     vendor_list.remove_vendor("V004")
     assert vendor_list.find_vendor("V004") is None
@@ -114,7 +118,188 @@ def test_vendorlist_remove():
 
 def test_vendorlist_to_json():
     vendor = Mock(spec=Vendor)
+    vendor.vendor_id = "V005"
+    vendor.name = "Vendor V005"
     vendor.toJson.return_value = {"vendor_id": "V005"}
     vendor_list = VendorList()
     vendor_list.add_vendor(vendor)
     assert vendor_list.toJson() == [{"vendor_id": "V005"}]
+
+
+def test_vendorlist_add_duplicate():
+    vendor_list = VendorList()
+    vendor = Mock(spec=Vendor)
+    vendor.vendor_id = "V006"
+    vendor.name = "Vendor V006"
+    vendor_list.add_vendor(vendor)
+    with pytest.raises(ValueError, match="already exists"):
+        vendor_list.add_vendor(vendor)
+
+
+def test_vendorlist_remove_missing():
+    vendor_list = VendorList()
+    with pytest.raises(ValueError, match="Vendor ID not found"):
+        vendor_list.remove_vendor("V404")
+
+
+def test_vendorlist_query():
+    vendor_list = VendorList()
+    acme = Vendor("V1", "Acme", "1", Mock(), Mock())
+    globex = Vendor("V2", "Globex", "2", Mock(), Mock())
+    vendor_list.add_vendor(acme)
+    vendor_list.add_vendor(globex)
+    assert list(vendor_list.query()) == [acme, globex]
+    assert list(vendor_list.query(name_prefix="glo")) == [globex]
+    assert list(vendor_list.query(vendor_id="V1", name_prefix="glo")) == []
+    assert list(vendor_list.query(vendor_id="V1")) == [acme]
+
+
+def test_vendorlist_tracks_field_changes():
+    vendor_list = VendorList()
+    acme = Vendor("V1", "Acme", "1", Mock(), Mock())
+    vendor_list.add_vendor(acme)
+    version = vendor_list.version
+    acme.name = "Globex"
+    assert vendor_list.version == version + 1
+    assert list(vendor_list.query(name_prefix="glo")) == [acme]
+    assert list(vendor_list.query(name_prefix="acm")) == []
+
+
+def test_add_order_returns_unique_sortable_ids(sample_vendor):
+    ids = [sample_vendor.add_order({"identifier": "X", "quantity": 1}) for _ in range(100)]
+    assert len(set(ids)) == 100
+    assert list(sample_vendor.orders) == ids == sorted(ids)
+
+
+def test_vendorlist_order_index():
+    vendor_list = VendorList()
+    vendor = Vendor("V1", "Acme", "1", Mock(), Mock())
+    vendor_list.add_vendor(vendor)
+    order_id = vendor.add_order({"identifier": "X", "quantity": 1})
+    assert vendor_list.find_order_vendor(order_id) is vendor
+    vendor.reject_order(order_id)
+    assert vendor_list.find_order_vendor(order_id) is None
+
+    order_id = vendor.add_order({"identifier": "X", "quantity": 1})
+    vendor_list.remove_vendor("V1")
+    assert vendor_list.find_order_vendor(order_id) is None
+
+
+def test_get_orders_does_not_mutate_orders(sample_vendor):
+    order = {"identifier": "XYZ", "quantity": 1, "name": "Aspirin"}
+    order_id = sample_vendor.add_order(order)
+    listed = sample_vendor.get_orders()
+    listed[0]["quantity"] = 99
+    assert order == {"identifier": "XYZ", "quantity": 1, "name": "Aspirin"}
+    assert sample_vendor.get_orders() == [
+        {
+            "name": "Aspirin",
+            "order_id": order_id,
+            "identifier": "XYZ",
+            "quantity": 1,
+            "created_at": sample_vendor.orders[order_id].created_at,
+        }
+    ]
+
+
+def test_get_orders_page(sample_vendor):
+    ids = [sample_vendor.add_order({"identifier": "X", "quantity": 1}) for _ in range(5)]
+    orders, cursor = sample_vendor.get_orders_page(limit=2)
+    assert [order.order_id for order in orders] == ids[:2]
+    orders, cursor = sample_vendor.get_orders_page(limit=2, cursor=cursor)
+    assert [order.order_id for order in orders] == ids[2:4]
+    sample_vendor.reject_order(ids[4])
+    orders, cursor = sample_vendor.get_orders_page(limit=2, cursor=cursor)
+    assert orders == [] and cursor is None
+    with pytest.raises(ValueError):
+        sample_vendor.get_orders_page(limit=0)
+
+
+def test_fulfilled_orders_archived_by_segment(sample_vendor):
+    sample_vendor.medicine_list_obj.find_medicine.return_value = Mock()
+    ids = [sample_vendor.add_order({"identifier": "X", "quantity": 1}) for _ in range(3)]
+    sample_vendor._archive(sample_vendor.orders[ids[0]], fulfilled_at=86400 * 2 + 5)
+    sample_vendor._archive(sample_vendor.orders[ids[1]], fulfilled_at=86400 + 5)
+    sample_vendor._archive(sample_vendor.orders[ids[2]], fulfilled_at=86400 + 6)
+    assert sorted(sample_vendor.orders_fulfilled) == [86400, 86400 * 2]
+
+    orders, cursor = sample_vendor.get_fulfilled_orders_page(limit=1)
+    assert [order.order_id for order in orders] == [ids[1]]
+    orders, cursor = sample_vendor.get_fulfilled_orders_page(limit=2, cursor=cursor)
+    assert [order.order_id for order in orders] == [ids[2], ids[0]]
+    assert cursor is None
+    assert sample_vendor.get_fulfilled_orders()[0]["fulfilled_at"] == 86400 + 5
+    with pytest.raises(ValueError):
+        sample_vendor.get_fulfilled_orders_page(cursor="bad")
+
+
+def test_process_orders_approve(sample_vendor):
+    medicine_mock = Mock()
+    sample_vendor.medicine_list_obj.find_medicines.return_value = {"A": medicine_mock}
+    first = sample_vendor.add_order({"identifier": "A", "quantity": 2})
+    second = sample_vendor.add_order({"identifier": "A", "quantity": 3})
+    missing = sample_vendor.add_order({"identifier": "B", "quantity": 1})
+    results = sample_vendor.process_orders([first, "nope", second, missing, first], "approve")
+    assert [result["status"] for result in results] == ["ok", "error", "ok", "error", "error"]
+    assert results[3]["message"] == "Medicine not found in inventory 2."
+    sample_vendor.inventory_obj.add_medicines.assert_called_once_with({medicine_mock: 5})
+    assert list(sample_vendor.orders) == [missing]
+    assert [order["order_id"] for order in sample_vendor.get_fulfilled_orders()] == [first, second]
+
+
+def test_process_orders_deny(sample_vendor):
+    order_id = sample_vendor.add_order({"identifier": "A", "quantity": 2})
+    results = sample_vendor.process_orders([order_id], "deny")
+    assert results == [
+        {"order_id": order_id, "status": "ok", "message": "Order denied successfully"}
+    ]
+    assert sample_vendor.orders == {}
+    assert sample_vendor.get_fulfilled_orders() == []
+    with pytest.raises(ValueError, match="Invalid action"):
+        sample_vendor.process_orders([order_id], "ship")
+
+
+def test_concurrent_orders_keep_pending_ids_sorted(sample_vendor):
+    def writer():
+        for _ in range(200):
+            sample_vendor.add_order({"identifier": "A", "quantity": 1})
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sample_vendor._pending_ids == sorted(sample_vendor.orders)
+    orders, _ = sample_vendor.get_orders_page()
+    assert len(orders) == 800
+
+
+def test_remove_pending_leaves_other_ids(sample_vendor):
+    first = sample_vendor.add_order({"identifier": "A", "quantity": 1})
+    second = sample_vendor.add_order({"identifier": "A", "quantity": 1})
+    sample_vendor._pending_ids.remove(first)
+    sample_vendor._remove_pending(first)
+    assert sample_vendor._pending_ids == [second]
+    assert [order.order_id for order in sample_vendor.get_orders_page()[0]] == [second]
+
+
+def test_concurrent_fulfills_apply_once(sample_vendor):
+    order_id = sample_vendor.add_order({"identifier": "A", "quantity": 5})
+    sample_vendor.medicine_list_obj.find_medicine.return_value = Mock()
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def approve():
+        barrier.wait()
+        try:
+            sample_vendor.fullfill_order(order_id)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=approve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sample_vendor.inventory_obj.add_medicine.call_count == 1
+    assert errors == ["Order ID not found."] * 3
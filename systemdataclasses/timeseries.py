@@ -0,0 +1,127 @@
+from __future__ import annotations
+import numpy as np
+
+INITIAL_CAPACITY = 1024
+
+
+class SalesSeries:
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("Capacity must be greater than 0")
+        self.identifiers = []
+        self._sku_index = {}
+        self._size = 0
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._skus = np.empty(capacity, dtype=np.int32)
+        self._quantities = np.empty(capacity, dtype=np.int64)
+        self._values = np.empty(capacity, dtype=np.float64)
+
+    def __len__(self):
+        return self._size
+
+    def sku_index(self, identifier: str) -> int:
+        index = self._sku_index.get(identifier)
+        if index is None:
+            index = self._sku_index[identifier] = len(self.identifiers)
+            self.identifiers.append(identifier)
+        return index
+
+    def append(self, timestamp: float, identifier: str, quantity: int, value: float):
+        if self._size == len(self._timestamps):
+            self._grow()
+        pos = self._size
+        self._timestamps[pos] = timestamp
+        self._skus[pos] = self.sku_index(identifier)
+        self._quantities[pos] = quantity
+        self._values[pos] = value
+        self._size += 1
+
+    def _grow(self):
+        capacity = len(self._timestamps) * 2
+        for name in ("_timestamps", "_skus", "_quantities", "_values"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, name, new)
+
+    @classmethod
+    def from_json(cls, data: dict):
+        size = len(data["timestamps"])
+        series = cls(max(size, INITIAL_CAPACITY))
+        for identifier in data["identifiers"]:
+            series.sku_index(identifier)
+        series._timestamps[:size] = data["timestamps"]
+        series._skus[:size] = data["skus"]
+        series._quantities[:size] = data["quantities"]
+        series._values[:size] = data["values"]
+        series._size = size
+        return series
+
+    def snapshot(self) -> SeriesSnapshot:
+        size = self._size
+        return SeriesSnapshot(
+            list(self.identifiers),
+            self._timestamps[:size],
+            self._skus[:size],
+            self._quantities[:size],
+            self._values[:size],
+        )
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[: self._size]
+
+    @property
+    def skus(self) -> np.ndarray:
+        return self._skus[: self._size]
+
+    @property
+    def quantities(self) -> np.ndarray:
+        return self._quantities[: self._size]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[: self._size]
+
+    def daily_matrix(self, start: float, days: int, field: str = "quantities"):
+        return self.snapshot().daily_matrix(start, days, field)
+
+
+class SeriesSnapshot:
+    def __init__(
+        self,
+        identifiers: list[str],
+        timestamps: np.ndarray,
+        skus: np.ndarray,
+        quantities: np.ndarray,
+        values: np.ndarray,
+    ):
+        self.identifiers = identifiers
+        self.timestamps = timestamps
+        self.skus = skus
+        self.quantities = quantities
+        self.values = values
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def toJson(self, since: float = None):
+        mask = slice(None) if since is None else self.timestamps >= since
+        return {
+            "identifiers": list(self.identifiers),
+            "timestamps": self.timestamps[mask].tolist(),
+            "skus": self.skus[mask].tolist(),
+            "quantities": self.quantities[mask].tolist(),
+            "values": self.values[mask].tolist(),
+        }
+
+    def daily_matrix(self, start: float, days: int, field: str = "quantities"):
+        if days <= 0:
+            raise ValueError("Days must be greater than 0")
+        if field not in ("quantities", "values"):
+            raise ValueError("Field must be one of: quantities, values")
+        day = np.floor((self.timestamps - start) / 86400).astype(np.int64)
+        mask = (day >= 0) & (day < days)
+        matrix = np.zeros((len(self.identifiers), days), dtype=np.float64)
+        np.add.at(matrix, (self.skus[mask], day[mask]), getattr(self, field)[mask])
+        return matrix
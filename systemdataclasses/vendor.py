@@ -1,13 +1,77 @@
 from __future__ import annotations
+from bisect import bisect_left, bisect_right, insort
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
 from typing import TYPE_CHECKING
-import random
+import json
+import threading
+import time
+from .fastjson import CachedJson, dumps, extend_object, join_array
+from .ids import new_ulid
+from .sortedindex import SortedIndex
+from .storage import MemoryStorage
 
 if TYPE_CHECKING:
     import inventory  # noqa: F401
     import medicine  # noqa: F401
+    import storage
 
+ARCHIVE_SEGMENT_SECONDS = 86400
+
+
+@dataclass(frozen=True, slots=True)
+class Order:
+    order_id: str
+    identifier: str
+    quantity: int
+    created_at: float
+    details: bytes
+    fulfilled_at: float = None
+
+    @classmethod
+    def from_dict(cls, order_id: str, order: dict, created_at: float):
+        details = {
+            key: value
+            for key, value in order.items()
+            if key not in ("order_id", "identifier", "quantity")
+        }
+        return cls(
+            order_id,
+            order["identifier"],
+            order["quantity"],
+            created_at,
+            dumps(details),
+        )
+
+    def toJsonBytes(self) -> bytes:
+        fields = {
+            "order_id": self.order_id,
+            "identifier": self.identifier,
+            "quantity": self.quantity,
+            "created_at": self.created_at,
+        }
+        if self.fulfilled_at is not None:
+            fields["fulfilled_at"] = self.fulfilled_at
+        return extend_object(self.details, **fields)
+
+    def toJson(self) -> dict:
+        return json.loads(self.toJsonBytes())
+
+    @classmethod
+    def from_row(cls, row: dict):
+        return cls(
+            row["order_id"],
+            row["identifier"],
+            row["quantity"],
+            row["created_at"],
+            row["details"].encode(),
+            row["fulfilled_at"],
+        )
+
+
+class Vendor(CachedJson):
+    _json_fields = ("vendor_id", "name", "contact_info")
 
-class Vendor:
     def __init__(
         self,
         vendor_id: str,
@@ -30,59 +94,222 @@ class Vendor:
         self.contact_info = contact_info
         self.orders = {}
         self.orders_fulfilled = {}
+        self._pending_ids = []
         self.inventory_obj = inventory_obj
         self.medicine_list_obj = medicine_list_obj
+        self.order_index = None
+        self.storage = None
+        self._lock = threading.RLock()
+
+    def add_order(self, order: dict) -> str:
+        if order is None:
+            raise ValueError("Order cannot be None")
+        with self._transaction(), self._lock:
+            order_id = new_ulid()
+            record = Order.from_dict(order_id, order, time.time())
+            self.orders.update({order_id: record})
+            insort(self._pending_ids, order_id)
+            if self.order_index is not None:
+                self.order_index[order_id] = self
+            if self.storage is not None:
+                self.storage.save_order(self.vendor_id, record)
+        return order_id
+
+    def restore_order(self, order: Order):
+        with self._lock:
+            if order.fulfilled_at is not None:
+                segment = _archive_segment(order.fulfilled_at)
+                self.orders_fulfilled.setdefault(segment, []).append(order)
+                return
+            self.orders[order.order_id] = order
+            insort(self._pending_ids, order.order_id)
+            if self.order_index is not None:
+                self.order_index[order.order_id] = self
 
-    def add_order(self, order):
-        order_id = "".join(
-            random.choice("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
-            for _ in range(5)
+    def add_orders(self, orders: list[dict]) -> list[str]:
+        with self._transaction():
+            return [self.add_order(order) for order in orders]
+
+    def sync_order(self, order_id: str, order: Order = None):
+        with self._lock:
+            if order_id in self.orders and (
+                order is None or order.fulfilled_at is not None
+            ):
+                self._remove_pending(order_id)
+                if self.order_index is not None:
+                    self.order_index.pop(order_id, None)
+            if (
+                order is None
+                or order.order_id in self.orders
+                or self._is_archived(order)
+            ):
+                return
+            self.restore_order(order)
+
+    def _is_archived(self, order: Order) -> bool:
+        if order.fulfilled_at is None:
+            return False
+        return any(
+            archived.order_id == order.order_id
+            for archived in self.orders_fulfilled.get(
+                _archive_segment(order.fulfilled_at), ()
+            )
         )
-        self.orders.update({order_id: order})
 
     def fullfill_order(self, order_id: str):
         if order_id is None or order_id == "":
             raise ValueError("Order ID cannot be None/Empty")
-        if order_id in self.orders:
+        with self._transaction(), self._lock:
+            if order_id not in self.orders:
+                raise ValueError("Order ID not found.")
             order = self.orders[order_id]
-            medicine_obj = self.medicine_list_obj.find_medicine(order["identifier"])
-            if medicine_obj:
-                self.inventory_obj.add_medicine(medicine_obj, order["quantity"])
-                self.orders_fulfilled.update({order_id: order})
-                del self.orders[order_id]
-            else:
+            medicine_obj = self.medicine_list_obj.find_medicine(order.identifier)
+            if not medicine_obj:
                 raise ValueError("Medicine not found in inventory 2.")
-        else:
-            raise ValueError("Order ID not found.")
+            self.inventory_obj.add_medicine(medicine_obj, order.quantity)
+            self._archive(order)
 
     def reject_order(self, order_id: str):
         if order_id is None or order_id == "":
             raise ValueError("Order ID cannot be None/Empty")
-        if order_id in self.orders:
-            del self.orders[order_id]
-        else:
-            raise ValueError("Order ID not found.")
+        with self._transaction(), self._lock:
+            if order_id not in self.orders:
+                raise ValueError("Order ID not found.")
+            self._discard(order_id)
+
+    def process_orders(self, order_ids: list[str], action: str) -> list[dict]:
+        if action != "approve" and action != "deny":
+            raise ValueError("Invalid action")
+        with self._transaction(), self._lock:
+            results = []
+            selected = {}
+            for order_id in order_ids:
+                if order_id is None or order_id == "":
+                    results.append(
+                        _order_result(order_id, "Order ID cannot be None/Empty")
+                    )
+                elif order_id not in self.orders or order_id in selected:
+                    results.append(_order_result(order_id, "Order ID not found."))
+                else:
+                    selected[order_id] = self.orders[order_id]
+                    results.append(None)
+            if action == "approve":
+                self._approve(selected)
+                message = "Order fulfilled successfully"
+            else:
+                for order_id in selected:
+                    self._discard(order_id)
+                message = "Order denied successfully"
+        for pos, order_id in enumerate(order_ids):
+            if results[pos] is not None:
+                continue
+            if order_id in selected:
+                results[pos] = {"order_id": order_id, "status": "ok", "message": message}
+            else:
+                results[pos] = _order_result(order_id, "Medicine not found in inventory 2.")
+        return results
+
+    def _approve(self, selected: dict[str, Order]):
+        medicines = self.medicine_list_obj.find_medicines(
+            {order.identifier for order in selected.values()}
+        )
+        increments = {}
+        for order_id, order in list(selected.items()):
+            medicine_obj = medicines.get(order.identifier)
+            if medicine_obj is None:
+                del selected[order_id]
+                continue
+            increments[medicine_obj] = increments.get(medicine_obj, 0) + order.quantity
+        fulfilled_at = time.time()
+        if increments:
+            self.inventory_obj.add_medicines(increments)
+        for order in selected.values():
+            self._archive(order, fulfilled_at)
+
+    def clear_orders(self):
+        with self._lock:
+            if self.order_index is not None:
+                for order_id in self.orders:
+                    self.order_index.pop(order_id, None)
+            self.orders = {}
+            self.orders_fulfilled = {}
+            self._pending_ids = []
+
+    def _remove_pending(self, order_id: str) -> Order:
+        order = self.orders.pop(order_id)
+        pos = bisect_left(self._pending_ids, order_id)
+        if pos < len(self._pending_ids) and self._pending_ids[pos] == order_id:
+            del self._pending_ids[pos]
+        return order
+
+    def _discard(self, order_id: str):
+        self._remove_pending(order_id)
+        if self.order_index is not None:
+            self.order_index.pop(order_id, None)
+        if self.storage is not None:
+            self.storage.delete_order(order_id)
+
+    def _archive(self, order: Order, fulfilled_at: float = None):
+        self._remove_pending(order.order_id)
+        if fulfilled_at is None:
+            fulfilled_at = time.time()
+        fulfilled = replace(order, fulfilled_at=fulfilled_at)
+        self.restore_order(fulfilled)
+        if self.storage is not None:
+            self.storage.save_order(self.vendor_id, fulfilled)
+
+    def _transaction(self):
+        if self.storage is None:
+            return nullcontext()
+        return self.storage.transaction()
 
     def __str__(self):
         return f"Vendor ID: {self.vendor_id}, Name: {self.name}, Contact Info: {self.contact_info}"
 
-    def get_orders(self):
-        res = []
-        order: dict
-        for id, order in self.orders.items():
-            order.update({"order_id": id})
-            res.append(order)
-        return res
-
-    def get_fulfilled_orders(self):
-        res = []
-        order: dict
-        for id, order in self.orders_fulfilled.items():
-            order.update({"order_id": id})
-            res.append(order)
-        return res
+    def get_orders(self, limit: int = None, cursor: str = None) -> list[dict]:
+        return [order.toJson() for order in self.get_orders_page(limit, cursor)[0]]
 
-    def toJson(self):
+    def get_orders_page(
+        self, limit: int = None, cursor: str = None
+    ) -> tuple[list[Order], str]:
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be greater than 0")
+        with self._lock:
+            start = 0 if not cursor else bisect_right(self._pending_ids, cursor)
+            stop = len(self._pending_ids) if limit is None else start + limit
+            order_ids = self._pending_ids[start:stop]
+            next_cursor = order_ids[-1] if stop < len(self._pending_ids) else None
+            return [self.orders[order_id] for order_id in order_ids], next_cursor
+
+    def get_fulfilled_orders(self, limit: int = None, cursor: str = None) -> list[dict]:
+        return [
+            order.toJson() for order in self.get_fulfilled_orders_page(limit, cursor)[0]
+        ]
+
+    def get_fulfilled_orders_page(
+        self, limit: int = None, cursor: str = None
+    ) -> tuple[list[Order], str]:
+        if limit is not None and limit <= 0:
+            raise ValueError("Limit must be greater than 0")
+        segment_start, offset = _decode_archive_cursor(cursor)
+        with self._lock:
+            segments = {
+                segment: list(archived)
+                for segment, archived in self.orders_fulfilled.items()
+                if segment >= segment_start
+            }
+        orders = []
+        for segment in sorted(segments):
+            archived = segments[segment]
+            start = offset if segment == segment_start else 0
+            if limit is not None and len(orders) + len(archived) - start > limit:
+                stop = start + limit - len(orders)
+                orders.extend(archived[start:stop])
+                return orders, f"{segment}:{stop}"
+            orders.extend(archived[start:])
+        return orders, None
+
+    def _build_json(self):
         return {
             "vendor_id": self.vendor_id,
             "name": self.name,
@@ -91,37 +318,123 @@ class Vendor:
 
 
 class VendorList:
-    def __init__(self):
-        self.vendors = []
+    def __init__(self, storage: storage.Storage = None):
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.vendors = {}
+        self.version = 0
+        self.order_index = {}
+        self._names = SortedIndex()
 
     def add_vendor(self, vendor: Vendor):
         if vendor is None:
             raise ValueError("Vendor cannot be None or not of type Vendor")
-        self.vendors.append(vendor)
+        if vendor.vendor_id in self.vendors:
+            raise ValueError("Vendor with this ID already exists")
+        self._insert(vendor)
+        self.storage.save_vendor(vendor)
 
     def remove_vendor(self, vendor_id: str):
         if vendor_id is None:
             raise ValueError("Vendor ID cannot be None")
         if vendor_id == "":
             raise ValueError("Vendor ID cannot be empty")
-        if not any(vendor.vendor_id == vendor_id for vendor in self.vendors):
+        if self._discard(vendor_id) is None:
             raise ValueError("Vendor ID not found")
-        self.vendors = [
-            vendor for vendor in self.vendors if vendor.vendor_id != vendor_id
-        ]
+        self.storage.delete_vendor(vendor_id)
+
+    def load(
+        self,
+        inventory_obj: inventory.Inventory,
+        medicine_list_obj: medicine.MedicineList,
+    ):
+        for row in self.storage.load_vendors():
+            vendor = Vendor(
+                row["vendor_id"],
+                row["name"],
+                row["contact_info"],
+                inventory_obj,
+                medicine_list_obj,
+            )
+            self._insert(vendor)
+        for row in self.storage.load_orders():
+            vendor = self.vendors.get(row["vendor_id"])
+            if vendor is not None:
+                vendor.restore_order(Order.from_row(row))
+
+    def _insert(self, vendor: Vendor):
+        self.vendors[vendor.vendor_id] = vendor
+        vendor.order_index = self.order_index
+        vendor.storage = self.storage
+        self._names.add(vendor, vendor.name.lower())
+        vendor.watch(self._touch)
+        self.version += 1
+
+    def _discard(self, vendor_id: str):
+        vendor = self.vendors.pop(vendor_id, None)
+        if vendor is not None:
+            self._names.discard(vendor)
+            vendor.unwatch(self._touch)
+            vendor.order_index = None
+            vendor.storage = None
+            self.version += 1
+        return vendor
+
+    def _touch(self, vendor: Vendor):
+        self._names.add(vendor, vendor.name.lower())
+        self.version += 1
 
     def get_vendors(self):
-        return self.vendors
+        return list(self.vendors.values())
+
+    def query(self, vendor_id: str = None, name_prefix: str = None):
+        if vendor_id is not None:
+            vendor = self.vendors.get(vendor_id)
+            candidates = [] if vendor is None else [vendor]
+        elif name_prefix is not None:
+            prefix = name_prefix.lower()
+            return iter(self._names.values(lo=prefix, hi=prefix + "\uffff"))
+        else:
+            return iter(self.vendors.values())
+        if name_prefix is not None:
+            prefix = name_prefix.lower()
+            candidates = [v for v in candidates if v.name.lower().startswith(prefix)]
+        return iter(candidates)
 
     def find_vendor(self, vendor_id: str):
         if vendor_id is None:
             raise ValueError("Vendor ID cannot be None")
         if vendor_id == "":
             raise ValueError("Vendor ID cannot be empty")
-        for vendor in self.vendors:
-            if vendor.vendor_id == vendor_id:
-                return vendor
-        return None
+        return self.vendors.get(vendor_id)
+
+    def find_order_vendor(self, order_id: str):
+        if order_id is None or order_id == "":
+            raise ValueError("Order ID cannot be None/Empty")
+        vendor = self.order_index.get(order_id)
+        if vendor is None or self.vendors.get(vendor.vendor_id) is not vendor:
+            return None
+        return vendor
 
     def toJson(self):
-        return [vendor.toJson() for vendor in self.vendors]
+        return [vendor.toJson() for vendor in self.vendors.values()]
+
+    def toJsonBytes(self) -> bytes:
+        return join_array(vendor.toJsonBytes() for vendor in self.vendors.values())
+
+
+def _archive_segment(fulfilled_at: float) -> int:
+    return int(fulfilled_at // ARCHIVE_SEGMENT_SECONDS) * ARCHIVE_SEGMENT_SECONDS
+
+
+def _order_result(order_id: str, message: str) -> dict:
+    return {"order_id": order_id, "status": "error", "message": message}
+
+
+def _decode_archive_cursor(cursor: str) -> tuple[int, int]:
+    if cursor is None or cursor == "":
+        return 0, 0
+    try:
+        segment, offset = cursor.split(":")
+        return int(segment), int(offset)
+    except ValueError:
+        raise ValueError("Invalid cursor")